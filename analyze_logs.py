@@ -1,81 +1,375 @@
 import re
+import os
+import gzip
+import glob
+import base64
+import hashlib
 from datetime import datetime
 import sys
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 import json
 
-def analyze_log_file(file_path):
+from match_store import atomic_write_json
+from profiling_hooks import profiled, stage
+
+# Patterns to match
+# multi_source_matches logs "Retrieved N matches from Football-Data.org"
+match_pattern = re.compile(r"(?:Found|Retrieved) (\d+) matches from Football-Data\.org")
+notification_pattern = re.compile(r"Sent Telegram notification for match: (.*?) vs (.*?)$")
+error_pattern = re.compile(r"ERROR.*?: (.*?)$")
+api_pattern = re.compile(r"API Response Headers.*?X-Requests-Available-Minute: (\d+)")
+timestamp_pattern = re.compile(r"(\d{4}-\d{2}-\d{2})")
+
+# One scan per line decides whether any of the patterns above can match;
+# the specific patterns only run on the few lines that pass it
+interesting_pattern = re.compile(
+    r"(?:Found|Retrieved) \d+ matches from Football-Data\.org|Sent Telegram notification for match: |ERROR|API Response Headers"
+)
+
+# Plain segments larger than this are split into byte ranges analyzed in parallel
+CHUNK_SIZE = 32 * 1024 * 1024
+# Below this total size a process pool costs more than it saves
+PARALLEL_THRESHOLD = 16 * 1024 * 1024
+
+# Incremental mode: per-file checkpoints and running aggregates
+STATE_FILE = 'log_analysis_state.json'
+READ_BLOCK = 1024 * 1024
+# Bytes at the start of the file hashed to notice a log replaced in place
+HEAD_BYTES = 256
+
+# The date in effect at the start of a byte range is only known after merging
+# with the previous range
+UNKNOWN_DATE = '<unknown>'
+
+
+class LogAggregate:
+    """Partial results of one log segment or byte range, mergeable in file order"""
+
+    def __init__(self, start_date=UNKNOWN_DATE):
+        self.current_date = start_date
+        self.saw_date = start_date != UNKNOWN_DATE
+        # Match count seen before the range's first timestamp, keyed later
+        # by whatever date the previous range ended on
+        self.pending_count = None
+        self.match_counts = {}
+        self.notification_counts = defaultdict(int)
+        self.errors = []
+        self.api_calls = []
+
+    def add_line(self, line):
+        if line.startswith('{'):
+            self.add_event(line)
+            return
+
+        if timestamp_match := timestamp_pattern.match(line):
+            self.current_date = timestamp_match.group(1)
+            self.saw_date = True
+
+        if not interesting_pattern.search(line):
+            return
+
+        # Count matches found
+        if match := match_pattern.search(line):
+            count = int(match.group(1))
+            if self.current_date == UNKNOWN_DATE:
+                self.pending_count = count
+            else:
+                self.match_counts[self.current_date] = count
+
+        # Count notifications sent
+        if match := notification_pattern.search(line):
+            home, away = match.groups()
+            self.notification_counts[f"{home} vs {away}"] += 1
+
+        # Collect errors
+        if match := error_pattern.search(line):
+            self.errors.append(match.group(1))
+
+        # Track API usage
+        if match := api_pattern.search(line):
+            self.api_calls.append(int(match.group(1)))
+
+    def add_event(self, line):
+        """Fast path for JSON Lines logs (FOOTBALL_LOG_FORMAT=jsonl): no regexes"""
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            return
+        if date := entry.get('ts', '')[:10]:
+            self.current_date = date
+            self.saw_date = True
+
+        event = entry.get('event')
+        if event == 'fetch' and entry.get('source') == 'Football-Data.org':
+            self.match_counts[self.current_date] = entry.get('count', 0)
+        elif event == 'notification_sent':
+            self.notification_counts[f"{entry.get('home')} vs {entry.get('away')}"] += 1
+        elif event == 'api_call' and entry.get('source') == 'football_data' \
+                and entry.get('quota_remaining') is not None:
+            self.api_calls.append(entry['quota_remaining'])
+
+        if entry.get('level') == 'ERROR':
+            self.errors.append(entry.get('message', ''))
+
+    def merge(self, other):
+        """Fold the aggregate of the following range into this one"""
+        if other.pending_count is not None:
+            self.match_counts[self.current_date] = other.pending_count
+        for date, count in other.match_counts.items():
+            self.match_counts[date] = count
+        for match, count in other.notification_counts.items():
+            self.notification_counts[match] += count
+        self.errors.extend(other.errors)
+        self.api_calls.extend(other.api_calls)
+        if other.saw_date:
+            self.current_date = other.current_date
+        return self
+
+    def to_dict(self):
+        return {
+            'current_date': self.current_date,
+            'pending_count': self.pending_count,
+            # A list of pairs keeps a None date, which JSON object keys can't
+            'match_counts': list(self.match_counts.items()),
+            'notification_counts': dict(self.notification_counts),
+            'errors': self.errors,
+            'api_calls': self.api_calls
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        aggregate = cls(start_date=data['current_date'])
+        aggregate.pending_count = data['pending_count']
+        aggregate.match_counts = dict((date, count) for date, count in data['match_counts'])
+        aggregate.notification_counts.update(data['notification_counts'])
+        aggregate.errors = data['errors']
+        aggregate.api_calls = data['api_calls']
+        return aggregate
+
+
+def _open_segment(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def analyze_range(path, start=0, end=None, start_date=UNKNOWN_DATE):
+    """Aggregate the lines of path that start within [start, end).
+
+    Reads line by line so memory stays flat however large the file is.
+    """
+    aggregate = LogAggregate(start_date)
+    with _open_segment(path) as f:
+        if start:
+            # Skip the line straddling start; the previous range owns it
+            f.seek(start - 1)
+            f.readline()
+        position = f.tell()
+        for raw_line in f:
+            if end is not None and position >= end:
+                break
+            position += len(raw_line)
+            aggregate.add_line(raw_line.decode('utf-8', errors='replace').rstrip('\r\n'))
+    return aggregate
+
+
+def log_segments(file_path, include_rotated=False):
+    """Return the log file and, optionally, its rotated segments oldest first.
+
+    Rotated segments follow the logging.handlers naming: file.log.1 is newer
+    than file.log.2, and either may be gzip-compressed (file.log.2.gz).
+    """
+    segments = []
+    if include_rotated:
+        rotated = []
+        for candidate in glob.glob(glob.escape(file_path) + '.*'):
+            suffix = candidate[len(file_path) + 1:]
+            if suffix.endswith('.gz'):
+                suffix = suffix[:-3]
+            if suffix.isdigit():
+                rotated.append((int(suffix), candidate))
+        segments = [candidate for _, candidate in sorted(rotated, reverse=True)]
+    if os.path.exists(file_path) or not segments:
+        segments.append(file_path)
+    return segments
+
+
+def plan_tasks(segments, chunk_size=None):
+    """Split segments into (path, start, end) tasks in file order"""
+    chunk_size = chunk_size or CHUNK_SIZE
+    tasks = []
+    for path in segments:
+        size = os.path.getsize(path)
+        if path.endswith('.gz') or size <= chunk_size:
+            tasks.append((path, 0, None))
+            continue
+        for start in range(0, size, chunk_size):
+            tasks.append((path, start, min(start + chunk_size, size)))
+    return tasks
+
+
+def _analyze_task(task):
+    path, start, end = task
+    return analyze_range(path, start, end)
+
+
+def aggregate_logs(file_path, include_rotated=False, workers=None):
+    """Aggregate a log (and its rotated segments) in a single streaming pass.
+
+    Large inputs are split into byte ranges analyzed on a process pool and
+    merged in order, so the result is the same as a sequential scan.
+    """
+    segments = log_segments(file_path, include_rotated)
+    tasks = plan_tasks(segments)
+    total_size = sum(os.path.getsize(path) for path in segments)
+
+    if workers != 1 and len(tasks) > 1 and total_size >= PARALLEL_THRESHOLD:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            partials = list(executor.map(_analyze_task, tasks))
+    else:
+        partials = [_analyze_task(task) for task in tasks]
+
+    # Before the first timestamp the original analyzer counted under None
+    result = LogAggregate(start_date=None)
+    for partial in partials:
+        result.merge(partial)
+    return result
+
+
+def _head_hash(path, length):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read(length)).hexdigest()
+
+
+def _read_appended(path, checkpoint, aggregate):
+    """Feed the complete lines appended after the checkpoint into aggregate.
+
+    A trailing line without its newline yet is kept as carry-over and
+    parsed on the next run, once it is complete.
+    """
+    carry = base64.b64decode(checkpoint.get('carry', ''))
+    offset = checkpoint.get('offset', 0)
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        while block := f.read(READ_BLOCK):
+            offset += len(block)
+            lines = (carry + block).split(b'\n')
+            carry = lines.pop()
+            for line in lines:
+                aggregate.add_line(line.decode('utf-8', errors='replace').rstrip('\r'))
+    checkpoint['offset'] = offset
+    checkpoint['carry'] = base64.b64encode(carry).decode('ascii')
+
+
+def _find_rotated(file_path, inode, device):
+    """Locate the uncompressed rotated segment that used to be file_path"""
+    for candidate in log_segments(file_path, include_rotated=True)[:-1]:
+        if candidate.endswith('.gz'):
+            continue
+        stat = os.stat(candidate)
+        if stat.st_ino == inode and stat.st_dev == device:
+            return candidate
+    return None
+
+
+def incremental_aggregate(file_path, state_file=STATE_FILE):
+    """Update the persisted aggregate of file_path with newly appended lines only.
+
+    The checkpoint records the file's inode, the byte offset reached and any
+    partial last line. A new inode means the log was rotated: the rest of
+    the old file is read from its rotated name before starting the new one.
+    A file shorter than the offset, or whose first bytes changed, was
+    truncated or replaced and is read again from the start.
+    """
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        state = {}
+
+    key = os.path.abspath(file_path)
+    entry = state.get(key)
+    stat = os.stat(file_path)
+
+    if entry is None:
+        aggregate = LogAggregate(start_date=None)
+        checkpoint = {'offset': 0, 'carry': ''}
+    else:
+        aggregate = LogAggregate.from_dict(entry['aggregate'])
+        checkpoint = entry['checkpoint']
+        if (checkpoint['inode'], checkpoint['device']) != (stat.st_ino, stat.st_dev):
+            rotated = _find_rotated(file_path, checkpoint['inode'], checkpoint['device'])
+            if rotated:
+                _read_appended(rotated, checkpoint, aggregate)
+                if checkpoint['carry']:
+                    aggregate.add_line(base64.b64decode(checkpoint['carry']).decode('utf-8', errors='replace'))
+            else:
+                print(f"Warning: {file_path} was rotated and its previous segment is gone or compressed; "
+                      f"lines written after the last run may be missing")
+            checkpoint = {'offset': 0, 'carry': ''}
+        elif stat.st_size < checkpoint['offset'] or (
+                checkpoint.get('head') and _head_hash(file_path, checkpoint['head_length']) != checkpoint['head']):
+            print(f"Warning: {file_path} was truncated, reading it again from the start")
+            checkpoint = {'offset': 0, 'carry': ''}
+
+    _read_appended(file_path, checkpoint, aggregate)
+    checkpoint['inode'] = stat.st_ino
+    checkpoint['device'] = stat.st_dev
+    checkpoint['head_length'] = min(HEAD_BYTES, checkpoint['offset'])
+    checkpoint['head'] = _head_hash(file_path, checkpoint['head_length'])
+
+    state[key] = {'checkpoint': checkpoint, 'aggregate': aggregate.to_dict()}
+    atomic_write_json(state_file, state)
+    return aggregate
+
+
+@profiled('analyze_logs')
+def analyze_log_file(file_path, include_rotated=False, workers=None, incremental=False):
     """Analyze the log file and extract useful information"""
-    match_counts = defaultdict(int)
-    notification_counts = defaultdict(int)
-    errors = []
-    api_calls = []
-    
-    # Patterns to match
-    match_pattern = re.compile(r"Found (\d+) matches from Football-Data\.org")
-    notification_pattern = re.compile(r"Sent Telegram notification for match: (.*?) vs (.*?)$")
-    error_pattern = re.compile(r"ERROR.*?: (.*?)$")
-    api_pattern = re.compile(r"API Response Headers.*?X-Requests-Available-Minute: (\d+)")
-    
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-            
+        if not os.path.exists(file_path) and not (include_rotated and len(log_segments(file_path, True)) > 1):
+            raise FileNotFoundError(file_path)
+
         print(f"\n📊 Log Analysis Report")
         print(f"{'='*50}")
-        
-        # Analyze each line
-        current_date = None
-        for line in lines:
-            # Extract timestamp
-            timestamp_match = re.match(r"(\d{4}-\d{2}-\d{2})", line)
-            if timestamp_match:
-                current_date = timestamp_match.group(1)
-            
-            # Count matches found
-            if match := match_pattern.search(line):
-                count = int(match.group(1))
-                match_counts[current_date] = count
-            
-            # Count notifications sent
-            if match := notification_pattern.search(line):
-                home, away = match.groups()
-                notification_counts[f"{home} vs {away}"] += 1
-            
-            # Collect errors
-            if match := error_pattern.search(line):
-                errors.append(match.group(1))
-            
-            # Track API usage
-            if match := api_pattern.search(line):
-                api_calls.append(int(match.group(1)))
-        
+
+        with stage('aggregate'):
+            if incremental:
+                aggregate = incremental_aggregate(file_path)
+            else:
+                aggregate = aggregate_logs(file_path, include_rotated, workers)
+        match_counts = aggregate.match_counts
+        notification_counts = aggregate.notification_counts
+        errors = aggregate.errors
+        api_calls = aggregate.api_calls
+
         # Report: Matches Found
         print("\n📅 Matches Found by Date:")
         print("-" * 30)
         for date, count in match_counts.items():
             print(f"{date}: {count} matches")
-        
+
         # Report: Notifications
         print("\n📬 Notifications Sent:")
         print("-" * 30)
         for match, count in notification_counts.items():
             print(f"{match}: {count} notifications")
-        
+
         # Report: API Usage
         if api_calls:
             print("\n🔄 API Usage:")
             print("-" * 30)
             print(f"Average requests remaining: {sum(api_calls)/len(api_calls):.1f}")
             print(f"Lowest requests remaining: {min(api_calls)}")
-        
+
         # Report: Errors
         if errors:
             print("\n⚠️ Errors Found:")
             print("-" * 30)
             for error in errors:
                 print(f"- {error}")
-        
+
         # Save report to file
         report = {
             'matches_by_date': dict(match_counts),
@@ -83,18 +377,24 @@ def analyze_log_file(file_path):
             'api_calls': api_calls,
             'errors': errors
         }
-        
-        with open('log_analysis_report.json', 'w', encoding='utf-8') as f:
+
+        with stage('save_report'), open('log_analysis_report.json', 'w', encoding='utf-8') as f:
             json.dump(report, f, indent=2)
         print("\n📋 Report saved to log_analysis_report.json")
-        
+
     except FileNotFoundError:
         print(f"Error: Could not find log file at {file_path}")
     except Exception as e:
         print(f"Error analyzing logs: {str(e)}")
 
-if __name__ == "__main__":
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    args = [arg for arg in argv if not arg.startswith('--')]
     log_file = 'football_notifications.log'
-    if len(sys.argv) > 1:
-        log_file = sys.argv[1]
-    analyze_log_file(log_file)
+    if args:
+        log_file = args[0]
+    analyze_log_file(log_file, include_rotated='--rotated' in argv,
+                     incremental='--incremental' in argv)
+
+if __name__ == "__main__":
+    main()
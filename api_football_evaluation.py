@@ -3,6 +3,7 @@ import requests
 from datetime import datetime
 from dotenv import load_dotenv
 import logging
+from competition_catalog import get_catalog, canonical_competition, api_season
 
 # Configure logging
 logging.basicConfig(
@@ -27,8 +28,8 @@ class APIFootballDataSource:
             'X-RapidAPI-Host': 'api-football-v1.p.rapidapi.com'
         }
     
-    def fetch_matches(self, date=None, league_id=None):
-        """Fetch football matches for a specific date and optional league"""
+    def fetch_matches(self, date=None, league_id=None, competition=None):
+        """Fetch football matches for a specific date and optional league (by id or competition name)"""
         date = date or datetime.now().strftime('%Y-%m-%d')
         
         try:
@@ -36,6 +37,12 @@ class APIFootballDataSource:
             params = {
                 'date': date
             }
+            if competition and not league_id:
+                # League ids come from the cached catalog (python competition_catalog.py --sync)
+                league_id = get_catalog().ids('api_football', [competition]).get(canonical_competition(competition))
+                if league_id:
+                    params['season'] = api_season(canonical_competition(competition),
+                                                  datetime.strptime(date, '%Y-%m-%d').date())
             if league_id:
                 params['league'] = league_id
             
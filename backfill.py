@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Backfill historical fixtures and results into the match store.
+
+Usage:
+    python backfill.py --competitions "Serie A,Premier League,La Liga" --from 2023-08-01 --to 2025-05-31
+    python backfill.py ... --provider api_sports --workers 4
+
+The range is split into chunks each provider can answer in one request.
+Chunks run in parallel but never faster than the provider's per-minute
+limit, and stop for the day when its daily quota is used up. Every finished
+chunk is saved under backfill/, so running the same command again resumes
+with the missing chunks; once all chunks are done their matches are merged
+into matches.json in one write.
+"""
+import os
+import json
+import time
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+
+from match_store import merge_matches, atomic_write_json
+from live_mode import parse_football_data, parse_api_sports
+from competition_catalog import get_catalog, api_season, canonical_competition, CALENDAR_YEAR
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_DIR = 'backfill'
+
+# Days of fixtures per request; API-Sports also needs the season, so chunks never cross a season
+CHUNK_DAYS = {'football_data': 10, 'api_sports': 31}
+
+
+def season_end(competition, day):
+    """Last day of the api_season that day belongs to"""
+    if competition in CALENDAR_YEAR:
+        return date(day.year, 12, 31)
+    return date(api_season(competition, day) + 1, 6, 30)
+
+
+def plan_chunks(provider, competitions, date_from, date_to, ids):
+    """(chunk_id, competition, provider id, start, end) covering the range for each competition.
+
+    competitions are canonical names and ids their provider IDs from the
+    competition catalog; those without one are skipped.
+    """
+    chunks = []
+    for competition in competitions:
+        if competition not in ids:
+            logger.warning(f"{provider} has no code for {competition}, skipping it")
+            continue
+        start = date_from
+        while start <= date_to:
+            end = min(start + timedelta(days=CHUNK_DAYS[provider] - 1), date_to)
+            if provider == 'api_sports':
+                end = min(end, season_end(competition, start))
+            chunk_id = f"{provider}-{ids[competition]}-{start.isoformat()}-{end.isoformat()}"
+            chunks.append((chunk_id, competition, ids[competition], start, end))
+            start = end + timedelta(days=1)
+    return chunks
+
+
+class RateLimiter:
+    """Spaces calls at least 60/per_minute seconds apart across threads"""
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute
+        self.next_slot = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            slot = max(self.next_slot, time.monotonic())
+            self.next_slot = slot + self.interval
+        time.sleep(max(0.0, slot - time.monotonic()))
+
+
+class QuotaExhausted(Exception):
+    pass
+
+
+class Backfill:
+    def __init__(self, sources, provider, checkpoint_dir=CHECKPOINT_DIR):
+        self.sources = sources
+        self.provider = provider
+        self.api = sources.apis[provider]
+        self.checkpoint_dir = checkpoint_dir
+        self.limiter = RateLimiter(self.api['rate_limit'])
+        self.quota_lock = threading.Lock()
+        self.remaining = self._remaining_quota()
+
+    def _remaining_quota(self):
+        if self.api.get('daily_limit') is None:
+            return None
+        from provider_metrics import get_metrics
+        return self.api['daily_limit'] - get_metrics().requests_today(self.provider)
+
+    def _chunk_path(self, chunk_id):
+        return os.path.join(self.checkpoint_dir, f"{chunk_id}.json")
+
+    def done(self, chunk_id):
+        return os.path.exists(self._chunk_path(chunk_id))
+
+    def _take_quota(self):
+        with self.quota_lock:
+            if self.remaining is not None:
+                if self.remaining <= 0:
+                    raise QuotaExhausted(self.provider)
+                self.remaining -= 1
+
+    def _request(self, competition, code, start, end):
+        if self.provider == 'football_data':
+            response = self.sources._get(
+                'football_data',
+                f"{self.api['base_url']}/competitions/{code}/matches",
+                params={'dateFrom': start.isoformat(), 'dateTo': end.isoformat()},
+                headers={'X-Auth-Token': self.api['key']}
+            )
+            parse, source = parse_football_data, 'Football-Data.org'
+        else:
+            response = self.sources._get(
+                'api_sports',
+                f"{self.api['base_url']}/fixtures",
+                params={'league': code, 'season': api_season(competition, start),
+                        'from': start.isoformat(), 'to': end.isoformat()},
+                headers={'x-rapidapi-key': self.api['key'], 'x-rapidapi-host': 'v3.football.api-sports.io'}
+            )
+            parse, source = parse_api_sports, 'API-Sports'
+        if response.status_code != 200:
+            raise RuntimeError(f"{response.status_code} - {response.text[:200]}")
+        matches = parse(response.json())
+        for match in matches:
+            # Store the canonical competition name whatever the provider calls it
+            match['competition'] = competition
+            match['source'] = source
+        return matches
+
+    def run_chunk(self, chunk):
+        chunk_id, competition, code, start, end = chunk
+        self._take_quota()
+        self.limiter.wait()
+        matches = self._request(competition, code, start, end)
+        atomic_write_json(self._chunk_path(chunk_id), matches, indent=None)
+        return len(matches)
+
+    def run(self, chunks, workers=4):
+        """Fetch every chunk not done yet; returns (finished, failed, skipped_for_quota)"""
+        pending = [chunk for chunk in chunks if not self.done(chunk[0])]
+        logger.info(f"{len(chunks) - len(pending)}/{len(chunks)} chunks already done, {len(pending)} to fetch")
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        finished = failed = skipped = 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(self.run_chunk, chunk): chunk for chunk in pending}
+            for future in as_completed(futures):
+                chunk_id = futures[future][0]
+                try:
+                    count = future.result()
+                    finished += 1
+                    logger.info(f"Chunk {chunk_id}: {count} matches")
+                except QuotaExhausted:
+                    skipped += 1
+                except Exception as e:
+                    failed += 1
+                    logger.error(f"Chunk {chunk_id} failed: {e}")
+        if skipped:
+            logger.warning(f"{self.provider} daily quota used up, {skipped} chunks left for the next run")
+        return finished, failed, skipped
+
+    def load(self, chunks):
+        """Bulk-load the matches of all finished chunks into the match store"""
+        matches = []
+        for chunk_id, *_ in chunks:
+            if self.done(chunk_id):
+                with open(self._chunk_path(chunk_id), 'r', encoding='utf-8') as f:
+                    matches.extend(json.load(f))
+        return merge_matches(matches)
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='Backfill historical fixtures into matches.json')
+    parser.add_argument('--competitions', required=True, help='comma-separated competition names or aliases')
+    parser.add_argument('--from', dest='date_from', required=True, help='YYYY-MM-DD')
+    parser.add_argument('--to', dest='date_to', required=True, help='YYYY-MM-DD')
+    parser.add_argument('--provider', choices=sorted(CHUNK_DAYS), default='football_data')
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    date_from = datetime.strptime(args.date_from, '%Y-%m-%d').date()
+    date_to = datetime.strptime(args.date_to, '%Y-%m-%d').date()
+    competitions = [canonical_competition(name.strip()) for name in args.competitions.split(',') if name.strip()]
+
+    from multi_source_matches import FootballDataSources
+    from provider_metrics import get_metrics
+    sources = FootballDataSources()
+    catalog = get_catalog()
+    catalog.sync(sources, [args.provider])
+    backfill = Backfill(sources, args.provider)
+    chunks = plan_chunks(args.provider, competitions, date_from, date_to, catalog.ids(args.provider, competitions))
+    finished, failed, skipped = backfill.run(chunks, args.workers)
+    get_metrics().save()
+
+    added, updated = backfill.load(chunks)
+    print(f"{finished} chunks fetched, {failed} failed, {skipped} left for quota; "
+          f"store: {added} matches added, {updated} updated")
+    if failed or skipped:
+        print("Run the same command again to resume")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark cold start of the football CLI: a bare interpreter, a tick with
+nothing due and the import of the module behind each command, each in a
+fresh process.
+
+Usage:
+    python bench_startup.py [--runs N] [--breakdown]
+
+Runs happen in an empty temporary directory, so no plan is due and no
+data file is touched. --breakdown adds the slowest packages per command
+from `python -X importtime`.
+"""
+import os
+import sys
+import time
+import tempfile
+import argparse
+import subprocess
+import statistics
+
+from football_cli import COMMANDS, import_breakdown
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CLI = os.path.join(HERE, 'football_cli.py')
+
+def scenarios():
+    """(label, argv after the interpreter) for every measured start"""
+    cases = [
+        ('python (bare interpreter)', ['-c', 'pass']),
+        ('football_cli.py --help', [CLI, '--help']),
+        ('football_cli.py tick (nothing due)', [CLI, 'tick']),
+    ]
+    for command, (module, _, _) in COMMANDS.items():
+        cases.append((f"import {module} ({command})",
+                      ['-c', f"import sys; sys.path.insert(0, {HERE!r}); import {module}"]))
+    return cases
+
+def measure(argv, runs, cwd):
+    """Return (median, best) wall seconds of a fresh interpreter running argv"""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *argv], cwd=cwd, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL, check=False)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), min(times)
+
+def breakdown(argv, cwd, top=5):
+    result = subprocess.run([sys.executable, '-X', 'importtime', *argv], cwd=cwd,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    return import_breakdown(result.stderr)[:top]
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark CLI cold start')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--breakdown', action='store_true', help='show the slowest imported packages')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cwd:
+        print(f"{'start':<44}{'median ms':>11}{'best ms':>10}")
+        for label, argv in scenarios():
+            median, best = measure(argv, args.runs, cwd)
+            print(f"{label:<44}{median * 1000:>11.1f}{best * 1000:>10.1f}")
+            if args.breakdown:
+                for name, ms in breakdown(argv, cwd):
+                    print(f"    {name:<40}{ms:>11.1f}")
+
+if __name__ == "__main__":
+    main()
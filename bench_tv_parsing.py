@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark TV guide page parsing: full-DOM BeautifulSoup vs the targeted
+section slicing + SoupStrainer path used by fetch_tv_schedule.
+
+Usage:
+    python bench_tv_parsing.py [PAGES_DIR] [--runs N]
+
+PAGES_DIR holds saved guide pages named after their broadcaster
+(raiplay*.html, mediaset*.html, sky*.html, dazn*.html). Without it,
+synthetic pages of realistic size are generated.
+"""
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+from bs4 import BeautifulSoup
+
+import fetch_tv_schedule as tv
+
+PARSERS = {
+    'raiplay': tv.parse_raiplay_page,
+    'mediaset': tv.parse_mediaset_page,
+    'sky': tv.parse_sky_sport_page,
+    'dazn': tv.parse_dazn_page,
+}
+
+def _noise(blocks):
+    """Navigation, scripts and unrelated listings that make up most of a real page"""
+    return ''.join(
+        f'<div class="nav-block"><ul>{"".join(f"<li><a href=/p/{i}/{j}>Link {j}</a></li>" for j in range(20))}</ul>'
+        f'<script>var data{i} = {{"items": [{",".join(str(j) for j in range(50))}]}};</script></div>'
+        for i in range(blocks)
+    )
+
+def synthetic_page(broadcaster, channels=40, programs=40):
+    """Build a large guide page with the listing structure each scraper expects"""
+    if broadcaster == 'raiplay':
+        sections = ''.join(
+            f'<section data-channel="{name}"><ul>' + ''.join(
+                f'<li class="program"><h3 class="program-title">{"Calcio Serie A" if p % 10 == 0 else f"Programma {p}"}</h3>'
+                f'<p class="program-time">{p % 24:02d}:00</p></li>' for p in range(programs)
+            ) + '</ul></section>'
+            for name in ['Rai 1', 'Rai 2'] + [f'Rai {n}' for n in range(3, channels)]
+        )
+    elif broadcaster == 'mediaset':
+        sections = ''.join(
+            f'<div data-channel="{name}">' + ''.join(
+                f'<div class="program"><h3 class="program-title">{"Champions League" if p % 10 == 0 else f"Show {p}"}</h3>'
+                f'<span class="time">{p % 24:02d}:30</span></div>' for p in range(programs)
+            ) + '</div>'
+            for name in ['CANALE 5', 'ITALIA 1'] + [f'CANALE {n}' for n in range(6, channels)]
+        )
+    else:
+        wrapper, card, competition = {
+            'sky': ('div class="matches-today"', 'match', 'match-competition'),
+            'dazn': ('section class="today-matches"', 'match-card', 'competition'),
+        }[broadcaster]
+        tag = wrapper.split()[0]
+        sections = f'<{wrapper}>' + ''.join(
+            f'<div class="{card}"><span class="match-time">{p % 24:02d}:45</span>'
+            f'<div class="match-teams">Team {p} - Team {p + 1}</div><div class="{competition}">Serie A</div></div>'
+            for p in range(programs)
+        ) + f'</{tag}>' + ''.join(
+            f'<div class="news-card"><h2>Notizia {n}</h2><p>{"Testo " * 40}</p></div>' for n in range(channels * 20)
+        )
+    return f'<html><head><title>Guida TV</title></head><body>{_noise(channels * 5)}{sections}{_noise(channels * 5)}</body></html>'
+
+def _full_dom(html, strainer, tag, start_pattern):
+    """The previous behaviour: build the whole document tree"""
+    return BeautifulSoup(html, 'html.parser')
+
+def measure(parse, html, runs):
+    """Return (best seconds per parse, peak traced bytes, programs found)"""
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        parse(html)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    programs = parse(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, len(programs)
+
+def load_pages(pages_dir):
+    pages = []
+    for filename in sorted(os.listdir(pages_dir)):
+        for broadcaster in PARSERS:
+            if filename.lower().startswith(broadcaster):
+                with open(os.path.join(pages_dir, filename), 'rb') as f:
+                    pages.append((filename, broadcaster, f.read().decode('utf-8', errors='replace')))
+    return pages
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark TV guide parsing')
+    parser.add_argument('pages_dir', nargs='?', help='directory of saved guide pages')
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    if args.pages_dir:
+        pages = load_pages(args.pages_dir)
+        if not pages:
+            print(f"No guide pages found in {args.pages_dir}")
+            sys.exit(1)
+    else:
+        pages = [(f"{b} (synthetic)", b, synthetic_page(b)) for b in PARSERS]
+
+    print(f"Parser backend: {tv.PARSER}")
+    print(f"{'page':<24}{'size':>9}{'full ms':>10}{'fast ms':>10}{'speedup':>9}{'full MB':>9}{'fast MB':>9}{'mem x':>7}")
+    targeted = tv.parse_sections
+    for name, broadcaster, html in pages:
+        parse = PARSERS[broadcaster]
+        tv.parse_sections = _full_dom
+        try:
+            full_time, full_peak, full_count = measure(parse, html, args.runs)
+        finally:
+            tv.parse_sections = targeted
+        fast_time, fast_peak, fast_count = measure(parse, html, args.runs)
+        if full_count != fast_count:
+            print(f"WARNING: {name}: full DOM found {full_count} programs, targeted {fast_count}")
+        print(f"{name:<24}{len(html) // 1024:>8}K{full_time * 1000:>10.1f}{fast_time * 1000:>10.1f}"
+              f"{full_time / fast_time:>8.1f}x{full_peak / 2**20:>9.1f}{fast_peak / 2**20:>9.1f}"
+              f"{full_peak / max(fast_peak, 1):>6.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Catalog of provider competition/league IDs for the supported competitions.
+
+Usage:
+    python competition_catalog.py [--sync] [--force]
+
+Each provider's competition list is fetched at most once per TTL and cached
+in available_competitions.json, mapped to the competitions listed in the
+README. Fetchers use the IDs to ask providers for those competitions only
+instead of every league worldwide.
+"""
+import json
+import logging
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from football_keywords import get_matcher
+from match_store import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+CATALOG_FILE = 'available_competitions.json'
+TTL = timedelta(days=7)
+
+# README competitions -> how each provider names them: a football-data.org code,
+# an API-Sports (country, league name) pair and a The Odds API sport key
+SUPPORTED_COMPETITIONS = {
+    'UEFA Champions League': {'football_data': 'CL', 'api_sports': ('World', 'UEFA Champions League'),
+                              'odds_api': 'soccer_uefa_champs_league'},
+    'Premier League': {'football_data': 'PL', 'api_sports': ('England', 'Premier League'),
+                       'odds_api': 'soccer_epl'},
+    'Serie A': {'football_data': 'SA', 'api_sports': ('Italy', 'Serie A'), 'odds_api': 'soccer_italy_serie_a'},
+    'La Liga': {'football_data': 'PD', 'api_sports': ('Spain', 'La Liga'), 'odds_api': 'soccer_spain_la_liga'},
+    'Bundesliga': {'football_data': 'BL1', 'api_sports': ('Germany', 'Bundesliga'),
+                   'odds_api': 'soccer_germany_bundesliga'},
+    'Ligue 1': {'football_data': 'FL1', 'api_sports': ('France', 'Ligue 1'), 'odds_api': 'soccer_france_ligue_one'},
+    'Serie B': {'api_sports': ('Italy', 'Serie B'), 'odds_api': 'soccer_italy_serie_b'},
+    'European Championship': {'football_data': 'EC', 'api_sports': ('World', 'Euro Championship'),
+                              'odds_api': 'soccer_uefa_european_championship'},
+    'FIFA World Cup': {'football_data': 'WC', 'api_sports': ('World', 'World Cup'),
+                       'odds_api': 'soccer_fifa_world_cup'},
+    'Coppa Italia': {'api_sports': ('Italy', 'Coppa Italia'), 'odds_api': 'soccer_italy_coppa_italia'},
+    'FA Cup': {'api_sports': ('England', 'FA Cup'), 'odds_api': 'soccer_fa_cup'},
+}
+
+# Provider -> (list endpoint, hint key in SUPPORTED_COMPETITIONS)
+CATALOG_ENDPOINTS = {
+    'football_data': ('/competitions', 'football_data'),
+    'api_sports': ('/leagues', 'api_sports'),
+    'api_football': ('/leagues', 'api_sports'),
+    'rapidapi': ('/leagues', 'api_sports'),
+    'odds_api': ('', 'odds_api'),  # base_url is already /v4/sports, which costs no quota
+}
+# Competitions played within a calendar year; API-Sports names their season by that year
+CALENDAR_YEAR = {'European Championship', 'FIFA World Cup'}
+
+
+def canonical_competition(name):
+    """README name for a competition alias ('Primera Division' -> 'La Liga'), or the name itself"""
+    for kind, canonical in get_matcher().scan(name or ''):
+        if kind == 'competition':
+            return canonical
+    return name
+
+
+def api_season(competition, day):
+    """API-Sports season for a competition on a date: the starting year of European seasons"""
+    if competition in CALENDAR_YEAR:
+        return day.year
+    return day.year if day.month >= 7 else day.year - 1
+
+
+def _map_football_data(payload):
+    by_code = {c.get('code'): c for c in payload.get('competitions', [])}
+    mapping = {}
+    for canonical, hints in SUPPORTED_COMPETITIONS.items():
+        entry = by_code.get(hints.get('football_data'))
+        if entry:
+            mapping[canonical] = {'id': entry['code'], 'name': entry.get('name'),
+                                  'country': entry.get('area', {}).get('name')}
+    return mapping
+
+
+def _map_api_sports(payload):
+    by_name = {}
+    for item in payload.get('response', []):
+        league, country = item.get('league', {}), item.get('country', {})
+        by_name.setdefault((country.get('name'), league.get('name')), league)
+    mapping = {}
+    for canonical, hints in SUPPORTED_COMPETITIONS.items():
+        league = by_name.get(hints.get('api_sports'))
+        if league:
+            mapping[canonical] = {'id': league['id'], 'name': league.get('name'),
+                                  'country': hints['api_sports'][0]}
+    return mapping
+
+
+def _map_odds_api(payload):
+    active = {sport['key']: sport for sport in payload if sport.get('active', True)}
+    return {
+        canonical: {'id': hints['odds_api'], 'name': active[hints['odds_api']].get('title'), 'country': None}
+        for canonical, hints in SUPPORTED_COMPETITIONS.items() if hints.get('odds_api') in active
+    }
+
+
+MAPPERS = {'football_data': _map_football_data, 'api_sports': _map_api_sports, 'odds_api': _map_odds_api}
+
+
+class CompetitionCatalog:
+    def __init__(self, path=CATALOG_FILE):
+        self.path = path
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            data = {}
+        # The file started out as an empty list
+        self.data = data if isinstance(data, dict) else {}
+        self.data.setdefault('synced', {})
+        self.data.setdefault('providers', {})
+
+    def is_fresh(self, provider, now=None):
+        synced = self.data['synced'].get(provider)
+        if not synced:
+            return False
+        now = now or datetime.now(timezone.utc)
+        return now - datetime.fromisoformat(synced) < TTL
+
+    def sync(self, sources, providers=None, force=False):
+        """Refresh the providers whose cached list is older than TTL; returns the providers synced"""
+        synced = []
+        for provider in providers or CATALOG_ENDPOINTS:
+            if provider not in sources.apis or not sources.apis[provider]['key']:
+                continue
+            if not force and self.is_fresh(provider):
+                continue
+            path, style = CATALOG_ENDPOINTS[provider]
+            api = sources.apis[provider]
+            params = {'apiKey': api['key']} if provider == 'odds_api' else None
+            try:
+                response = sources._get(provider, f"{api['base_url']}{path}", params=params,
+                                        headers=sources.auth_headers(provider))
+            except Exception as e:
+                from retry_policy import describe_error
+                logger.error(f"Catalog sync of {provider} failed: {describe_error(e)}")
+                continue
+            if response.status_code != 200:
+                logger.error(f"Catalog sync of {provider} failed: {response.status_code}")
+                continue
+            self.data['providers'][provider] = MAPPERS[style](response.json())
+            self.data['synced'][provider] = datetime.now(timezone.utc).isoformat(timespec='seconds')
+            synced.append(provider)
+            logger.info(f"Catalog: {len(self.data['providers'][provider])} supported competitions on {provider}")
+        if synced:
+            atomic_write_json(self.path, self.data)
+        return synced
+
+    def ids(self, provider, competitions):
+        """Provider IDs of the given competitions (any alias); those the provider lacks are left out"""
+        mapping = self.data['providers'].get(provider, {})
+        wanted = {canonical_competition(name) for name in competitions}
+        return {name: mapping[name]['id'] for name in wanted if name in mapping}
+
+    def known(self, provider):
+        return provider in self.data['providers']
+
+
+_catalog = None
+
+
+def get_catalog():
+    """Process-wide catalog, read from disk on first use"""
+    global _catalog
+    if _catalog is None:
+        _catalog = CompetitionCatalog()
+    return _catalog
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='Sync and show provider competition IDs')
+    parser.add_argument('--sync', action='store_true', help='refresh providers older than the TTL')
+    parser.add_argument('--force', action='store_true', help='refresh every provider now')
+    args = parser.parse_args()
+
+    catalog = get_catalog()
+    if args.sync or args.force:
+        from multi_source_matches import FootballDataSources
+        catalog.sync(FootballDataSources(), force=args.force)
+
+    providers = sorted(catalog.data['providers'])
+    if not providers:
+        print(f"{CATALOG_FILE} is empty, run with --sync")
+        return
+    print(f"{'competition':<25}" + ''.join(f"{p:>26}" for p in providers))
+    for competition in SUPPORTED_COMPETITIONS:
+        row = [str(catalog.data['providers'][p].get(competition, {}).get('id', '-')) for p in providers]
+        print(f"{competition:<25}" + ''.join(f"{value:>26}" for value in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,12 @@
 import os
+import time
 import logging
 import requests
 from dotenv import load_dotenv
 from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
+from structured_logging import configure_logging, log_event
+from profiling_hooks import profiled, stage
 
 # Funzione per sanitizzare una variabile d'ambiente
 def sanitize_env_var(env_var: str) -> str:
@@ -13,8 +16,8 @@ def sanitize_env_var(env_var: str) -> str:
         else ""
     )
 
-# Funzione per inviare un messaggio via Telegram
-def send_telegram_message(message: str) -> None:
+# Funzione per inviare un messaggio via Telegram; matches sono le partite di cui parla il messaggio
+def send_telegram_message(message: str, matches=()) -> None:
     telegram_bot_token = sanitize_env_var(os.getenv("TELEGRAM_BOT_TOKEN"))
     url = f"https://api.telegram.org/bot{telegram_bot_token}/sendMessage"
     payload = {
@@ -22,13 +25,21 @@ def send_telegram_message(message: str) -> None:
         "text": message,
     }
     try:
+        start = time.perf_counter()
         response = requests.post(url, json=payload)
-        logging.info(f"Response Code: {response.status_code}")
+        log_event(logging.getLogger(), 'telegram_send', f"Response Code: {response.status_code}",
+                  source='telegram', status=response.status_code,
+                  latency_ms=round((time.perf_counter() - start) * 1000, 1))
         logging.info(f"Response Text: {response.text}")
         if response.status_code != 200:
             logging.error(
                 f"Failed to send message: {response.status_code} - {response.text}"
             )
+            return
+        for match in matches:
+            home, away = match.get('home_team'), match.get('away_team')
+            log_event(logging.getLogger(), 'notification_sent', f"Sent Telegram notification for match: {home} vs {away}",
+                      source='telegram', home=home, away=away)
     except requests.exceptions.RequestException as e:
         logging.error(f"Exception during Telegram API call: {e}")
 
@@ -72,13 +83,21 @@ def get_calendar_events():
     return ["Evento 1 alle 14:00", "Evento 2 alle 18:00"]
 
 # Funzione principale per verificare l'ora e inviare il messaggio
+@profiled('fetch_matches')
 def main():
+    # Configura i log
+    configure_logging(format='%(levelname)s:%(name)s:%(message)s')
+
+    # Carica le variabili d'ambiente
+    load_dotenv()
+
     # Imposta il fuso orario di Roma
     rome_tz = ZoneInfo("Europe/Rome")
     current_time = datetime.now(rome_tz)
 
     # Esegue la cancellazione dei messaggi obsoleti
-    delete_old_telegram_messages()
+    with stage('delete_old_messages'):
+        delete_old_telegram_messages()
 
     # Controlla se è mezzogiorno
     if current_time.hour == 12 and current_time.minute == 0:
@@ -89,16 +108,10 @@ def main():
         else:
             # Messaggio per indicare che non ci sono eventi
             message = "Non ci sono eventi calendarizzati per oggi."
-        send_telegram_message(message)
+        with stage('send'):
+            send_telegram_message(message)
     else:
         logging.info("Non è l'ora prevista per l'invio.")
 
 if __name__ == "__main__":
-    # Configura i log
-    logging.basicConfig(level=logging.INFO)
-
-    # Carica le variabili d'ambiente
-    load_dotenv()
-
-    # Esegue lo script
     main()
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Plan provider refreshes around kickoffs without exceeding any quota.
+
+Usage:
+    python fetch_planner.py plan [--hours 24]   # write fetch_plan.json
+    python fetch_planner.py simulate            # check budgets and freshness offline
+    python fetch_planner.py run                 # execute the plan as a worker
+    python fetch_planner.py tick [--window 5] [--replan 60]  # run the refreshes due now, from cron
+
+Instead of refreshing at fixed times, refreshes cluster before each kickoff
+(2h, 1h and 15 minutes before, then around half-time and full-time) on top
+of a sparse baseline. Providers with small daily quotas are only used for
+the most valuable slots.
+"""
+import sys
+import json
+import time
+import logging
+import argparse
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from match_store import load_matches, match_kickoff, atomic_write_json
+from tv_match_join import ROME_TZ
+
+logger = logging.getLogger(__name__)
+
+PLAN_FILE = 'fetch_plan.json'
+
+# (minutes relative to kickoff, weight): higher weight = fresher data matters more
+KICKOFF_SLOTS = [(-120, 1.0), (-60, 2.0), (-15, 3.0), (50, 1.5), (115, 1.5)]
+BASELINE_INTERVAL = timedelta(hours=3)
+BASELINE_WEIGHT = 0.5
+# Candidate refreshes closer than this are merged into one
+MERGE_WINDOW = timedelta(minutes=10)
+# Share of each daily quota kept free for retries and manual runs
+RESERVE = 0.1
+
+FINISHED_STATUSES = {'FINISHED', 'AWARDED', 'CANCELLED', 'POSTPONED'}
+
+
+def provider_budgets(competitions=None):
+    """Per-minute and per-day budgets of each provider and the cost of one refresh, healthiest first.
+
+    The cost follows the competitions fetched (FOOTBALL_COMPETITIONS by
+    default): odds_api spends credits per sport key and API-Sports style
+    providers one request per pushed-down league.
+    """
+    from multi_source_matches import FootballDataSources, default_competitions
+    sources = FootballDataSources()
+    apis = sources.apis
+    competitions = default_competitions() if competitions is None else competitions
+    try:
+        from provider_metrics import get_metrics
+        order = get_metrics().source_order(list(apis))
+    except ImportError:
+        order = list(apis)
+    return {
+        name: {'per_minute': apis[name]['rate_limit'], 'per_day': apis[name].get('daily_limit'),
+               'cost': sources.request_cost(name, competitions)}
+        for name in order
+    }
+
+
+def used_today(budgets):
+    """Quota already used today per provider.
+
+    Counted from the requests recorded in the metrics store, or taken from
+    the last quota-remaining header when that shows more is spent (requests
+    made elsewhere, or credits costing more than one per request). Per-minute
+    headers say nothing about the day and are ignored.
+    """
+    try:
+        from provider_metrics import get_metrics, QUOTA_PERIODS
+    except ImportError:
+        return {}
+    metrics = get_metrics()
+    used = {}
+    for provider, budget in budgets.items():
+        used[provider] = metrics.requests_today(provider)
+        remaining = metrics.last_quota(provider)
+        if budget['per_day'] is not None and remaining is not None and QUOTA_PERIODS.get(provider) != 'minute':
+            used[provider] = max(used[provider], budget['per_day'] - remaining)
+    return used
+
+
+def upcoming_kickoffs(matches, start, end):
+    """(kickoff, label) of unfinished matches starting between start and end"""
+    kickoffs = []
+    for match in matches:
+        kickoff = match_kickoff(match)
+        if kickoff is None or match.get('status') in FINISHED_STATUSES:
+            continue
+        if start - timedelta(hours=2) <= kickoff <= end:
+            kickoffs.append((kickoff, f"{match.get('home_team')} vs {match.get('away_team')}"))
+    return sorted(kickoffs)
+
+
+def candidate_slots(kickoffs, start, end):
+    """Weighted refresh times, merged when closer than MERGE_WINDOW"""
+    candidates = []
+    at = start
+    while at < end:
+        candidates.append((at, BASELINE_WEIGHT, 'baseline'))
+        at += BASELINE_INTERVAL
+    for kickoff, label in kickoffs:
+        for offset, weight in KICKOFF_SLOTS:
+            at = kickoff + timedelta(minutes=offset)
+            if start <= at < end:
+                candidates.append((at, weight, f"kickoff{offset:+d}m {label}"))
+
+    merged = []
+    for at, weight, reason in sorted(candidates):
+        if merged and at - merged[-1]['at'] < MERGE_WINDOW:
+            slot = merged[-1]
+            slot['weight'] = max(slot['weight'], weight)
+            if reason != 'baseline':
+                slot['reasons'].append(reason)
+            continue
+        merged.append({'at': at, 'weight': weight, 'reasons': [reason]})
+    return merged
+
+
+def build_plan(matches, budgets, now=None, hours=24, used=None):
+    """Assign providers to refresh slots, most valuable slots first.
+
+    A provider is added to a slot while its remaining budget for that UTC
+    day (minus RESERVE) and per-minute limit allow the cost of one refresh.
+    Slots that end up with no provider are dropped.
+    """
+    now = now or datetime.now(timezone.utc)
+    end = now + timedelta(hours=hours)
+    used = used or {}
+    slots = candidate_slots(upcoming_kickoffs(matches, now, end), now, end)
+
+    spent = defaultdict(int)  # (provider, day) -> requests planned
+    per_minute = defaultdict(int)  # (provider, minute) -> requests planned
+    today = now.date()
+    for slot in sorted(slots, key=lambda s: (-s['weight'], s['at'])):
+        slot['providers'] = []
+        for provider, budget in budgets.items():
+            cost = budget.get('cost', 1)
+            if cost == 0:
+                continue  # the provider carries none of the fetched competitions
+            day = slot['at'].date()
+            if budget['per_day'] is not None:
+                allowed = int(budget['per_day'] * (1 - RESERVE))
+                if day == today:
+                    allowed -= used.get(provider, 0)
+                if spent[(provider, day)] + cost > allowed:
+                    continue
+            minute = slot['at'].replace(second=0, microsecond=0)
+            if per_minute[(provider, minute)] + cost > budget['per_minute']:
+                continue
+            spent[(provider, day)] += cost
+            per_minute[(provider, minute)] += cost
+            slot['providers'].append(provider)
+
+    return {
+        'generated': now.isoformat(timespec='seconds'),
+        'horizon_hours': hours,
+        'budgets': budgets,
+        'slots': [
+            {
+                'at': slot['at'].isoformat(timespec='seconds'),
+                'weight': slot['weight'],
+                'reasons': slot['reasons'],
+                'providers': slot['providers']
+            }
+            for slot in sorted(slots, key=lambda s: s['at']) if slot['providers']
+        ]
+    }
+
+
+def simulate(plan, matches=None):
+    """Replay a plan offline: check quotas and report data age at each kickoff"""
+    budgets = plan['budgets']
+    per_day = defaultdict(int)
+    per_minute = defaultdict(int)
+    refreshes = []
+    for slot in plan['slots']:
+        at = datetime.fromisoformat(slot['at'])
+        refreshes.append(at)
+        for provider in slot['providers']:
+            cost = budgets[provider].get('cost', 1)
+            per_day[(provider, at.date())] += cost
+            per_minute[(provider, at.replace(second=0, microsecond=0))] += cost
+
+    violations = []
+    for (provider, day), count in per_day.items():
+        limit = budgets[provider]['per_day']
+        if limit is not None and count > limit:
+            violations.append(f"{provider} uses {count}/{limit} requests on {day}")
+    for (provider, minute), count in per_minute.items():
+        if count > budgets[provider]['per_minute']:
+            violations.append(f"{provider} uses {count}/{budgets[provider]['per_minute']} requests at {minute}")
+
+    staleness = []
+    if matches is not None:
+        start = datetime.fromisoformat(plan['generated'])
+        end = start + timedelta(hours=plan['horizon_hours'])
+        for kickoff, label in upcoming_kickoffs(matches, start, end):
+            before = [at for at in refreshes if at <= kickoff]
+            if before:
+                staleness.append((label, kickoff, (kickoff - before[-1]).total_seconds() / 60))
+
+    return {
+        'refreshes': len(refreshes),
+        'requests': dict(sorted(
+            (provider, sum(c for (p, _), c in per_day.items() if p == provider)) for provider in budgets
+        )),
+        'violations': violations,
+        'staleness_minutes': staleness
+    }
+
+
+def load_plan(path=PLAN_FILE):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_plan(hours=24, path=PLAN_FILE):
+    """Build a plan from the match store and the remaining quotas and save it"""
+    budgets = provider_budgets()
+    plan = build_plan(load_matches(), budgets, hours=hours, used=used_today(budgets))
+    atomic_write_json(path, plan)
+    return plan
+
+
+def current_plan(max_age, path=PLAN_FILE):
+    """The saved plan, rebuilt first if it is missing or was generated more than max_age ago"""
+    try:
+        plan = load_plan(path)
+    except (FileNotFoundError, json.JSONDecodeError):
+        plan = None
+    if plan is None or datetime.now(timezone.utc) - datetime.fromisoformat(plan['generated']) > max_age:
+        logger.info(f"Regenerating {path}")
+        plan = write_plan(path=path)
+    return plan
+
+
+def refresh(providers):
+    """Fetch today's matches from providers and publish the changes as multi_source_matches does"""
+    from multi_source_matches import FootballDataSources, publish_changes
+
+    sources = FootballDataSources()
+    matches = sources.fetch_matches(providers=providers)
+    if not matches:
+        logger.warning("Planned refresh fetched no matches")
+        return []
+    changes = publish_changes(matches, datetime.now().strftime('%Y-%m-%d'), sources=sources)
+    logger.info(f"Planned refresh fetched {len(matches)} matches, {len(changes)} changes")
+    return changes
+
+
+def run(plan, grace=timedelta(minutes=5)):
+    """Execute each planned refresh at its time; missed slots older than grace are skipped"""
+    for slot in plan['slots']:
+        at = datetime.fromisoformat(slot['at'])
+        now = datetime.now(timezone.utc)
+        if at < now - grace:
+            continue
+        if at > now:
+            time.sleep((at - now).total_seconds())
+        logger.info(f"Planned refresh at {slot['at']} ({', '.join(slot['reasons'])}) "
+                    f"using {', '.join(slot['providers'])}")
+        refresh(slot['providers'])
+
+
+def due_slots(plan, window, now=None):
+    """Slots planned within the last window, oldest first"""
+    now = now or datetime.now(timezone.utc)
+    return [slot for slot in plan['slots'] if now - window < datetime.fromisoformat(slot['at']) <= now]
+
+
+def tick(plan, window=timedelta(minutes=5)):
+    """Run the refreshes that fell due since the previous tick; cron calls this every window.
+
+    Nothing is imported beyond the plan itself unless a refresh is due, so
+    a tick with nothing to do exits in milliseconds.
+    """
+    due = due_slots(plan, window)
+    if not due:
+        return 0
+
+    # One fetch covers every provider of the slots due together
+    providers = sorted({provider for slot in due for provider in slot['providers']})
+    logger.info(f"Planned refresh ({'; '.join(reason for slot in due for reason in slot['reasons'])}) "
+                f"using {', '.join(providers)}")
+    refresh(providers)
+    return len(due)
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='Quota-aware fetch planner')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    plan_parser = subparsers.add_parser('plan', help=f'build {PLAN_FILE} from the match store')
+    plan_parser.add_argument('--hours', type=int, default=24)
+    subparsers.add_parser('simulate', help='check the plan against budgets and kickoffs')
+    subparsers.add_parser('run', help='execute the plan')
+    tick_parser = subparsers.add_parser('tick', help='run the refreshes due since the last tick and exit')
+    tick_parser.add_argument('--window', type=int, default=5, help='minutes between ticks')
+    tick_parser.add_argument('--replan', type=int, metavar='MINUTES',
+                             help='rebuild the plan first when it is older than this')
+    args = parser.parse_args(argv)
+
+    if args.command == 'plan':
+        plan = write_plan(args.hours)
+        print(f"{len(plan['slots'])} refreshes planned in {PLAN_FILE}")
+        for slot in plan['slots']:
+            local = datetime.fromisoformat(slot['at']).astimezone(ROME_TZ).strftime('%a %H:%M')
+            print(f"{local}  {','.join(slot['providers']):<55} {'; '.join(slot['reasons'])[:80]}")
+    elif args.command == 'simulate':
+        result = simulate(load_plan(), load_matches())
+        print(f"Refreshes: {result['refreshes']}")
+        for provider, count in result['requests'].items():
+            print(f"  {provider}: {count} requests")
+        for label, kickoff, minutes in result['staleness_minutes']:
+            print(f"  {kickoff.astimezone(ROME_TZ):%a %H:%M} {label}: data {minutes:.0f} min old at kickoff")
+        if result['violations']:
+            print("Budget violations:")
+            for violation in result['violations']:
+                print(f"  {violation}")
+            sys.exit(1)
+        print("No budget violations")
+    elif args.command == 'tick':
+        if args.replan is not None:
+            plan = current_plan(timedelta(minutes=args.replan))
+        else:
+            try:
+                plan = load_plan()
+            except FileNotFoundError:
+                return
+        tick(plan, timedelta(minutes=args.window))
+    else:
+        run(load_plan())
+
+
+if __name__ == "__main__":
+    main()
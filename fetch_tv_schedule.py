@@ -1,234 +1,533 @@
-
-import os
-import requests
-
-# Stampa i valori delle variabili di ambiente
-print("TELEGRAM_CHAT_ID:", os.getenv('TELEGRAM_CHAT_ID'))
-print("TELEGRAM_BOT_TOKEN:", os.getenv('TELEGRAM_BOT_TOKEN'))
-print("FOOTBALL_DATA_API_KEY:", os.getenv('FOOTBALL_DATA_API_KEY'))
-
-# Codice esistente...
 import os
 import json
+import time
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 import requests
-from bs4 import BeautifulSoup
-import pytz
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, SoupStrainer
+try:
+    import lxml  # noqa: F401
+    PARSER = 'lxml'
+except ImportError:
+    PARSER = 'html.parser'
 import re
+import sys
+import codecs
+import shutil
+import hashlib
+import argparse
 
-# Set up logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+from match_store import atomic_write_json
+from football_keywords import get_matcher
+from tv_match_join import program_minutes, ROME_TZ
+from tv_guide import load_day
+from structured_logging import configure_logging, log_event
+from profiling_hooks import profiled, stage, profile_call
 
-def fetch_raiplay_schedule():
-    """Fetch football matches from RaiPlay guide"""
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# (connect, read) timeout in seconds used when a broadcaster doesn't set its own
+DEFAULT_TIMEOUT = (5, 15)
+MAX_RETRIES = 2
+
+SCHEDULE_FILE = 'tv_schedule.json'
+SHARDS_DIR = 'tv_schedule'
+CACHE_FILE = 'tv_guide_cache.json'
+# Bump when a parse_*_page function changes so cached programs are parsed again
+PARSER_VERSION = 1
+
+def create_session(retries=MAX_RETRIES, pool_size=10):
+    """Create an HTTP session with retries on connection errors and transient statuses"""
+    retry = Retry(
+        total=retries,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=['GET'],
+        respect_retry_after_header=True
+    )
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+def fetch_page(url, session=None, timeout=DEFAULT_TIMEOUT, headers=None):
+    """GET a guide page with a timeout, raising for HTTP errors"""
+    session = session or create_session()
+    response = session.get(url, timeout=timeout, headers=headers)
+    response.raise_for_status()
+    return response
+
+class GuideCache:
+    """Validators, section hashes and parsed programs of each guide page.
+
+    Persisted between runs so unchanged pages are neither downloaded again
+    (conditional GET) nor re-parsed (same hash of the extracted sections).
+    Entries written by another parser version or HTML backend are ignored.
+    """
+
+    def __init__(self, path=CACHE_FILE, parser=f"{PARSER_VERSION}/{PARSER}"):
+        self.path = path
+        self.parser = parser
+        self.changed = set()
+        self.dirty = False
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.entries = {}
+
+    def _entry(self, url):
+        entry = self.entries.get(url)
+        return entry if entry and entry.get('parser') == self.parser else None
+
+    def conditional_headers(self, url):
+        entry = self._entry(url) or {}
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def cached_programs(self, url, section_hash=None):
+        """Return the cached programs if still valid for section_hash, else None"""
+        entry = self._entry(url)
+        if entry is None or (section_hash and entry.get('section_hash') != section_hash):
+            return None
+        return entry.get('programs', [])
+
+    def store(self, url, response, section_hash, programs):
+        entry = self.entries.setdefault(url, {})
+        validators = {'etag': response.headers.get('ETag'), 'last_modified': response.headers.get('Last-Modified')}
+        if any(entry.get(key) != value for key, value in validators.items()):
+            entry.update(validators)
+            self.dirty = True
+        if entry.get('section_hash') != section_hash or entry.get('parser') != self.parser:
+            entry.update(section_hash=section_hash, programs=programs, parser=self.parser)
+            self.changed.add(url)
+            self.dirty = True
+
+    def save(self):
+        """Write the cache if any page's validators or programs changed"""
+        if self.dirty:
+            atomic_write_json(self.path, self.entries)
+            self.dirty = False
+
+def guide_url(url, day_url, day=None):
+    """URL of the guide page for day; today's page lives at the plain URL"""
+    if day is None or day == datetime.now(ROME_TZ).date():
+        return url
+    return day_url.format(day=day)
+
+META_CHARSET = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.IGNORECASE)
+
+def _known_codec(name):
     try:
-        url = "https://www.raiplay.it/guidatv"
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        programs = []
-        
-        # Find program cards for RAI 1 and RAI 2
-        for channel in ['Rai 1', 'Rai 2']:
-            channel_section = soup.find('section', {'data-channel': channel})
-            if channel_section:
-                for program in channel_section.find_all('li', class_='program'):
-                    title = program.find('h3', class_='program-title')
-                    time = program.find('p', class_='program-time')
+        return codecs.lookup(name).name
+    except (LookupError, TypeError):
+        return None
+
+def decode_page(response):
+    """Decode the page bytes exactly once.
+
+    requests reports ISO-8859-1 for any text/* response without a charset,
+    so its encoding is only trusted when Content-Type names one. Otherwise
+    the page's own <meta charset> decides, then UTF-8 when the bytes are
+    valid UTF-8, and only then charset detection over the body.
+    """
+    content = response.content
+    encoding = None
+    if 'charset=' in response.headers.get('Content-Type', '').lower():
+        encoding = _known_codec(response.encoding)
+    if encoding is None:
+        meta = META_CHARSET.search(content[:4096])
+        encoding = _known_codec(meta.group(1).decode('ascii')) if meta else None
+    if encoding is None:
+        try:
+            return content.decode('utf-8')
+        except UnicodeDecodeError:
+            encoding = _known_codec(response.apparent_encoding) or 'utf-8'
+    return content.decode(encoding, errors='replace')
+
+def extract_sections(html, tag, start_pattern):
+    """Slice out the elements opened by start_pattern without parsing the page.
+
+    Scans forward from each match counting nested <tag>/</tag> pairs to find
+    the matching close tag, so only the listing markup reaches the parser.
+    """
+    tag_pattern = re.compile(rf'<(/?){tag}\b', re.IGNORECASE)
+    sections = []
+    position = 0
+    while True:
+        start = start_pattern.search(html, position)
+        if not start:
+            break
+        depth = 0
+        end = len(html)
+        for tag_match in tag_pattern.finditer(html, start.start()):
+            depth += -1 if tag_match.group(1) else 1
+            if depth == 0:
+                end = html.find('>', tag_match.end()) + 1 or len(html)
+                break
+        sections.append(html[start.start():end])
+        position = end
+    return sections
+
+def parse_sections(html, strainer, tag, start_pattern):
+    """Build a tree containing only the sections we need.
+
+    Returns None without parsing when the page has none of them, e.g. when
+    the broadcaster serves a page without the listing we look for.
+    """
+    sections = extract_sections(html, tag, start_pattern)
+    if not sections:
+        return None
+    return BeautifulSoup(''.join(sections), PARSER, parse_only=strainer)
+
+def scrape_guide(url, parse, tag, start_pattern, session=None, timeout=DEFAULT_TIMEOUT, cache=None):
+    """Download a guide page and parse it, skipping work when nothing changed.
+
+    With a cache the request is conditional; on 304, or when the extracted
+    listing sections hash the same as last time, the cached programs are
+    returned without parsing.
+    """
+    headers = cache.conditional_headers(url) if cache else None
+    response = fetch_page(url, session, timeout, headers)
+    if cache and response.status_code == 304:
+        programs = cache.cached_programs(url)
+        if programs is not None:
+            return programs
+        response = fetch_page(url, session, timeout)
+
+    sections = ''.join(extract_sections(decode_page(response), tag, start_pattern))
+    section_hash = hashlib.sha256(sections.encode('utf-8')).hexdigest()
+    programs = cache.cached_programs(url, section_hash) if cache else None
+    if programs is None:
+        programs = parse(sections)
+    if cache:
+        cache.store(url, response, section_hash, programs)
+    return programs
+
+RAI_CHANNELS = ['Rai 1', 'Rai 2']
+RAI_STRAINER = SoupStrainer('section', attrs={'data-channel': RAI_CHANNELS})
+RAI_START = re.compile(r'<section\b[^>]*\bdata-channel=["\'](?:Rai 1|Rai 2)["\']', re.IGNORECASE)
+
+def parse_raiplay_page(html):
+    """Extract football programs from a RaiPlay guide page"""
+    soup = parse_sections(html, RAI_STRAINER, 'section', RAI_START)
+    programs = []
+    if soup is None:
+        return programs
+    
+    # Find program cards for RAI 1 and RAI 2
+    for channel in RAI_CHANNELS:
+        channel_section = soup.find('section', {'data-channel': channel})
+        if channel_section:
+            for program in channel_section.find_all('li', class_='program'):
+                title = program.find('h3', class_='program-title')
+                time = program.find('p', class_='program-time')
+                
+                if title and time:
+                    title_text = title.text.strip()
+                    time_text = time.text.strip()
                     
-                    if title and time:
-                        title_text = title.text.strip()
-                        time_text = time.text.strip()
+                    # Check if it's a football program
+                    football = get_matcher().classify(title_text)
+                    if football:
                         
-                        # Check if it's a football program
-                        if any(keyword in title_text.lower() 
-                              for keyword in ['calcio', 'serie a', 'champions', 'europa', 'coppa italia']):
-                            
-                            programs.append({
-                                'channel': channel.upper(),
-                                'time': time_text,
-                                'program': title_text,
-                                'description': 'Diretta su ' + channel
-                            })
-        
-        return programs
+                        programs.append({
+                            'channel': channel.upper(),
+                            'time': time_text,
+                            'program': title_text,
+                            'description': 'Diretta su ' + channel,
+                            **football
+                        })
+    
+    return programs
+
+def fetch_raiplay_schedule(session=None, timeout=DEFAULT_TIMEOUT, cache=None, day=None):
+    """Fetch football matches from RaiPlay guide"""
+    try:
+        url = guide_url("https://www.raiplay.it/guidatv", "https://www.raiplay.it/guidatv?giorno={day:%d-%m-%Y}", day)
+        return scrape_guide(url, parse_raiplay_page, 'section', RAI_START, session, timeout, cache)
     except Exception as e:
         logging.error(f"Error fetching RaiPlay schedule: {e}")
-        return []
+        raise
 
-def fetch_mediaset_schedule():
-    """Fetch football matches from Mediaset guide"""
-    try:
-        url = "https://www.mediaset.it/guidatv"
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        programs = []
-        
-        # Find program listings for Canale 5 and Italia 1
-        channels = {
-            'Canale 5': 'CANALE 5',
-            'Italia 1': 'ITALIA 1'
-        }
-        
-        for channel_name, channel_id in channels.items():
-            channel_section = soup.find('div', {'data-channel': channel_id})
-            if channel_section:
-                for program in channel_section.find_all('div', class_='program'):
-                    title = program.find('h3', class_='program-title')
-                    time = program.find('span', class_='time')
+# Program listings for Canale 5 and Italia 1
+MEDIASET_CHANNELS = {
+    'Canale 5': 'CANALE 5',
+    'Italia 1': 'ITALIA 1'
+}
+MEDIASET_STRAINER = SoupStrainer('div', attrs={'data-channel': list(MEDIASET_CHANNELS.values())})
+MEDIASET_START = re.compile(r'<div\b[^>]*\bdata-channel=["\'](?:CANALE 5|ITALIA 1)["\']', re.IGNORECASE)
+
+def parse_mediaset_page(html):
+    """Extract football programs from a Mediaset guide page"""
+    soup = parse_sections(html, MEDIASET_STRAINER, 'div', MEDIASET_START)
+    programs = []
+    if soup is None:
+        return programs
+    
+    for channel_name, channel_id in MEDIASET_CHANNELS.items():
+        channel_section = soup.find('div', {'data-channel': channel_id})
+        if channel_section:
+            for program in channel_section.find_all('div', class_='program'):
+                title = program.find('h3', class_='program-title')
+                time = program.find('span', class_='time')
+                
+                if title and time:
+                    title_text = title.text.strip()
+                    time_text = time.text.strip()
                     
-                    if title and time:
-                        title_text = title.text.strip()
-                        time_text = time.text.strip()
+                    # Check if it's a football program
+                    football = get_matcher().classify(title_text)
+                    if football:
                         
-                        # Check if it's a football program
-                        if any(keyword in title_text.lower() 
-                              for keyword in ['calcio', 'serie a', 'champions', 'europa', 'coppa italia']):
-                            
-                            programs.append({
-                                'channel': channel_name,
-                                'time': time_text,
-                                'program': title_text,
-                                'description': 'Diretta su ' + channel_name
-                            })
-        
-        return programs
+                        programs.append({
+                            'channel': channel_name,
+                            'time': time_text,
+                            'program': title_text,
+                            'description': 'Diretta su ' + channel_name,
+                            **football
+                        })
+    
+    return programs
+
+def fetch_mediaset_schedule(session=None, timeout=DEFAULT_TIMEOUT, cache=None, day=None):
+    """Fetch football matches from Mediaset guide"""
+    try:
+        url = guide_url("https://www.mediaset.it/guidatv", "https://www.mediaset.it/guidatv?data={day:%Y-%m-%d}", day)
+        return scrape_guide(url, parse_mediaset_page, 'div', MEDIASET_START, session, timeout, cache)
     except Exception as e:
         logging.error(f"Error fetching Mediaset schedule: {e}")
+        raise
+
+def _parse_match_cards(section, card_class, competition_class, channel, description):
+    """Extract time/teams/competition from the match cards of a listing section"""
+    programs = []
+    for match in section.find_all('div', class_=card_class):
+        time = match.find('span', class_='match-time')
+        teams = match.find('div', class_='match-teams')
+        competition = match.find('div', class_=competition_class)
+        
+        if time and teams:
+            time_text = time.text.strip()
+            teams_text = teams.text.strip()
+            competition_text = competition.text.strip() if competition else ''
+            
+            program_text = f"{competition_text}: {teams_text}"
+            football = get_matcher().classify(program_text) or {'teams': [], 'competition': None}
+            programs.append({
+                'channel': channel,
+                'time': time_text,
+                'program': program_text,
+                'description': description,
+                **football
+            })
+    return programs
+
+SKY_STRAINER = SoupStrainer('div', class_='matches-today')
+SKY_START = re.compile(r'<div\b[^>]*\bclass=["\'][^"\']*\bmatches-today\b', re.IGNORECASE)
+
+def parse_sky_sport_page(html):
+    """Extract today's matches from the Sky Sport football page"""
+    soup = parse_sections(html, SKY_STRAINER, 'div', SKY_START)
+    matches_section = soup.find('div', class_='matches-today') if soup else None
+    if not matches_section:
         return []
+    return _parse_match_cards(matches_section, 'match', 'match-competition',
+                              'Sky Sport', 'Diretta su Sky Sport')
 
-def fetch_sky_sport_schedule():
+def fetch_sky_sport_schedule(session=None, timeout=DEFAULT_TIMEOUT, cache=None, day=None):
     """Fetch football matches from Sky Sport guide"""
     try:
         # Using Sky Sport's football section which shows today's matches
         url = "https://sport.sky.it/calcio"
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        programs = []
-        
-        # Find today's matches section
-        matches_section = soup.find('div', class_='matches-today')
-        if matches_section:
-            for match in matches_section.find_all('div', class_='match'):
-                time = match.find('span', class_='match-time')
-                teams = match.find('div', class_='match-teams')
-                competition = match.find('div', class_='match-competition')
-                
-                if time and teams:
-                    time_text = time.text.strip()
-                    teams_text = teams.text.strip()
-                    competition_text = competition.text.strip() if competition else ''
-                    
-                    programs.append({
-                        'channel': 'Sky Sport',
-                        'time': time_text,
-                        'program': f"{competition_text}: {teams_text}",
-                        'description': 'Diretta su Sky Sport'
-                    })
-        
-        return programs
+        return scrape_guide(url, parse_sky_sport_page, 'div', SKY_START, session, timeout, cache)
     except Exception as e:
         logging.error(f"Error fetching Sky Sport schedule: {e}")
+        raise
+
+DAZN_STRAINER = SoupStrainer('section', class_='today-matches')
+DAZN_START = re.compile(r'<section\b[^>]*\bclass=["\'][^"\']*\btoday-matches\b', re.IGNORECASE)
+
+def parse_dazn_page(html):
+    """Extract today's matches from the DAZN football page"""
+    # This is a simplified version as DAZN's actual structure might be different
+    soup = parse_sections(html, DAZN_STRAINER, 'section', DAZN_START)
+    matches_section = soup.find('section', class_='today-matches') if soup else None
+    if not matches_section:
         return []
+    return _parse_match_cards(matches_section, 'match-card', 'competition',
+                              'DAZN', 'In streaming su DAZN')
 
-def fetch_dazn_schedule():
+def fetch_dazn_schedule(session=None, timeout=DEFAULT_TIMEOUT, cache=None, day=None):
     """Fetch football matches from DAZN"""
     try:
         # Since DAZN requires authentication, we'll use their public schedule page
         url = "https://www.dazn.com/it-IT/news/calcio"
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        programs = []
-        
-        # Find today's matches section (this is a simplified version as DAZN's actual structure might be different)
-        matches_section = soup.find('section', class_='today-matches')
-        if matches_section:
-            for match in matches_section.find_all('div', class_='match-card'):
-                time = match.find('span', class_='match-time')
-                teams = match.find('div', class_='match-teams')
-                competition = match.find('div', class_='competition')
-                
-                if time and teams:
-                    time_text = time.text.strip()
-                    teams_text = teams.text.strip()
-                    competition_text = competition.text.strip() if competition else ''
-                    
-                    programs.append({
-                        'channel': 'DAZN',
-                        'time': time_text,
-                        'program': f"{competition_text}: {teams_text}",
-                        'description': 'In streaming su DAZN'
-                    })
-        
-        return programs
+        return scrape_guide(url, parse_dazn_page, 'section', DAZN_START, session, timeout, cache)
     except Exception as e:
         logging.error(f"Error fetching DAZN schedule: {e}")
-        return []
+        raise
 
-def update_tv_schedule():
-    """Update the TV schedule data"""
-    schedule = {}
-    
-    # Fetch RAI schedules
-    rai_programs = fetch_raiplay_schedule()
-    for program in rai_programs:
-        channel = program['channel']
-        if channel not in schedule:
-            schedule[channel] = []
-        schedule[channel].append(program)
-    
-    # Fetch Mediaset schedules
-    mediaset_programs = fetch_mediaset_schedule()
-    for program in mediaset_programs:
-        channel = program['channel']
-        if channel not in schedule:
-            schedule[channel] = []
-        schedule[channel].append(program)
-    
-    # Fetch Sky Sport schedule
-    sky_programs = fetch_sky_sport_schedule()
-    if sky_programs:
-        schedule['Sky Sport'] = sky_programs
+# Broadcaster scrapers run concurrently, so adding one doesn't add its latency
+# to the total. Each entry: (name, scraper, (connect, read) timeout, days ahead
+# its guide covers). Sky Sport and DAZN only publish today's matches.
+BROADCASTERS = [
+    ('RaiPlay', fetch_raiplay_schedule, DEFAULT_TIMEOUT, 7),
+    ('Mediaset', fetch_mediaset_schedule, DEFAULT_TIMEOUT, 7),
+    ('Sky Sport', fetch_sky_sport_schedule, DEFAULT_TIMEOUT, 1),
+    ('DAZN', fetch_dazn_schedule, (5, 20), 1),
+]
+
+# Past day partitions kept for lookups such as "what was on last night"
+KEEP_PAST_DAYS = 1
+
+def _channel_slug(channel):
+    return re.sub(r'[^a-z0-9]+', '-', channel.lower()).strip('-')
+
+def _write_if_changed(path, data):
+    """Atomically replace path with data unless it already holds exactly that"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            if json.load(f) == data:
+                return False
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    atomic_write_json(path, data)
+    return True
+
+def partition_dir(day, shards_dir=SHARDS_DIR):
+    """Directory holding the per-channel shards of one day"""
+    return os.path.join(shards_dir, day.isoformat())
+
+def write_schedule(schedule, shards_dir, schedule_file=None):
+    """Write a day's schedule as one shard per channel plus an index.
+
+    Every file is replaced atomically and only when its content changed, so
+    readers never see a half-written shard. Returns the channels rewritten.
+    """
+    os.makedirs(shards_dir, exist_ok=True)
+    written = [
+        channel for channel, programs in schedule.items()
+        if _write_if_changed(os.path.join(shards_dir, f"{_channel_slug(channel)}.json"), programs)
+    ]
+    index = {channel: f"{_channel_slug(channel)}.json" for channel in sorted(schedule)}
+    _write_if_changed(os.path.join(shards_dir, 'index.json'), index)
+    if schedule_file:
+        _write_if_changed(schedule_file, schedule)
+    return written
+
+def prune_partitions(today, shards_dir=SHARDS_DIR, keep_past_days=KEEP_PAST_DAYS):
+    """Remove day partitions older than keep_past_days"""
+    if not os.path.isdir(shards_dir):
+        return
+    oldest = today - timedelta(days=keep_past_days)
+    for name in os.listdir(shards_dir):
+        try:
+            day = datetime.strptime(name, '%Y-%m-%d').date()
+        except ValueError:
+            continue
+        if day < oldest:
+            shutil.rmtree(os.path.join(shards_dir, name), ignore_errors=True)
+
+def _timed(scraper, *args):
+    start = time.perf_counter()
+    programs = scraper(*args)
+    return programs, round((time.perf_counter() - start) * 1000, 1)
+
+@profiled('fetch_tv_schedule')
+def update_tv_schedule(broadcasters=None, use_cache=True, days=1):
+    """Update the TV schedule data for today and the next days-1 days.
+
+    Each day is stored as its own partition under tv_schedule/<YYYY-MM-DD>/;
+    today's schedule is also written to tv_schedule.json. Returns the
+    schedule of every fetched day keyed by date.
+    """
+    broadcasters = broadcasters or BROADCASTERS
+    cache = GuideCache() if use_cache else None
+    today = datetime.now(ROME_TZ).date()
+    fetch_days = [today + timedelta(days=offset) for offset in range(max(days, 1))]
+    schedules = {day: {} for day in fetch_days}
+    failed_days = set()
+    jobs = [
+        (name, scraper, timeout, day)
+        for name, scraper, timeout, max_days in broadcasters
+        for day in fetch_days[:max_days]
+    ]
+    session = create_session(pool_size=max(min(len(jobs), 20), 1))
     
-    # Fetch DAZN schedule
-    dazn_programs = fetch_dazn_schedule()
-    if dazn_programs:
-        schedule['DAZN'] = dazn_programs
+    # Merge each guide page's programs as soon as its scraper finishes
+    with stage('scrape'), ThreadPoolExecutor(max_workers=min(len(jobs), 20)) as executor:
+        futures = {
+            executor.submit(profile_call, _timed, scraper, session, timeout, cache, day): (name, day)
+            for name, scraper, timeout, day in jobs
+        }
+        for future in as_completed(futures):
+            name, day = futures[future]
+            try:
+                programs, latency_ms = future.result()
+            except Exception as e:
+                logging.error(f"Error fetching {name} schedule for {day}: {e}")
+                failed_days.add(day)
+                continue
+            for program in programs:
+                program = dict(program, date=day.isoformat())
+                schedules[day].setdefault(program['channel'], []).append(program)
+            log_event(logging.getLogger(), 'tv_scrape', f"{name} {day}: {len(programs)} football programs",
+                      source=name, count=len(programs), latency_ms=latency_ms)
+    session.close()
     
+    # A failed broadcaster keeps its channels' last good listings instead of vanishing from the index
+    for day in failed_days:
+        for channel, programs in load_day(day, SHARDS_DIR).items():
+            schedules[day].setdefault(channel, programs)
+
     # Sort programs by time for each channel
-    for channel in schedule:
-        schedule[channel].sort(key=lambda x: x['time'])
+    for schedule in schedules.values():
+        for channel in schedule:
+            schedule[channel].sort(key=program_minutes)
     
-    # Save the schedule
-    with open('tv_schedule.json', 'w', encoding='utf-8') as f:
-        json.dump(schedule, f, ensure_ascii=False, indent=2)
+    with stage('write'):
+        if cache is not None:
+            cache.save()
+        # Unchanged guides only mean nothing to write if every day's partition is already there,
+        # which isn't the case on the first run of a new day
+        current = (
+            cache is not None and not cache.changed and os.path.exists(SCHEDULE_FILE)
+            and all(os.path.exists(os.path.join(partition_dir(day), 'index.json')) for day in fetch_days)
+        )
+        if current:
+            logging.info("TV guides unchanged, schedule not rewritten")
+        else:
+            # Save each day's partition; unchanged days are left untouched
+            for day, schedule in schedules.items():
+                written = write_schedule(schedule, partition_dir(day),
+                                         SCHEDULE_FILE if day == today else None)
+                if written:
+                    logging.info(f"TV schedule for {day}: {len(written)} channels changed")
+            logging.info("TV schedule updated successfully")
+        prune_partitions(today)
     
-    logging.info("TV schedule updated successfully")
-    return schedule
+    return schedules
+
+def main(argv=None):
+    # Set up logging
+    configure_logging(format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='Update the football TV schedule')
+    parser.add_argument('--days', type=int, default=1, help='prefetch this many days of guides (default: today only)')
+    parser.add_argument('--no-cache', action='store_true', help='ignore cached guide pages')
+    args = parser.parse_args(argv)
+    update_tv_schedule(use_cache=not args.no_cache, days=args.days)
 
 if __name__ == "__main__":
-    update_tv_schedule()
+    main()
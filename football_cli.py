@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Single entry point for the football scripts.
+
+Usage:
+    python football_cli.py fetch [YYYY-MM-DD]      # multi_source_matches.py
+    python football_cli.py notify                  # fetch_matches.py, the daily Telegram calendar
+    python football_cli.py tv [--days N]           # fetch_tv_schedule.py
+    python football_cli.py analyze [LOG_FILE]      # analyze_logs.py
+    python football_cli.py verify                  # verify_api_keys.py
+    python football_cli.py serve [--port 8765]     # read_api.py
+    python football_cli.py tick [--window 5] [--replan 60]  # planned refreshes due now, for cron
+    python football_cli.py plan [--hours 24]       # fetch_planner.py plan
+    python football_cli.py --import-times COMMAND ...
+    python football_cli.py --profile COMMAND ...   # see profiling_hooks.py
+
+Only the module behind the chosen command is imported, so requests,
+BeautifulSoup, numpy and the Telegram client are loaded by the commands
+that need them and a tick with nothing to do costs little more than the
+interpreter itself. --import-times runs the command under
+`python -X importtime` and prints where its startup time went.
+"""
+import os
+import sys
+import argparse
+import importlib
+from collections import defaultdict
+
+# command -> (module, arguments put before the user's, or None if main() takes none, help)
+COMMANDS = {
+    'fetch': ('multi_source_matches', [], 'fetch matches from every provider and report changes'),
+    'notify': ('fetch_matches', None, 'send the daily Telegram calendar when it is due'),
+    'tv': ('fetch_tv_schedule', [], 'update the TV schedule'),
+    'analyze': ('analyze_logs', [], 'summarize the notification logs'),
+    'verify': ('verify_api_keys', [], 'check the provider API keys'),
+    'serve': ('read_api', [], 'serve the match store over HTTP'),
+    'tick': ('fetch_planner', ['tick'], 'run the planned refreshes due since the last tick'),
+    'plan': ('fetch_planner', ['plan'], 'plan the refreshes of the next hours'),
+}
+
+
+def import_breakdown(importtime_output):
+    """Self import time in ms per top-level package from `python -X importtime` output, slowest first"""
+    totals = defaultdict(float)
+    for line in importtime_output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        totals[name.strip().split('.')[0]] += int(self_us) / 1000
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def report_import_times(argv, top=15):
+    """Run this CLI again under -X importtime, pass its output through and print the breakdown"""
+    import subprocess
+    result = subprocess.run([sys.executable, '-X', 'importtime', os.path.abspath(__file__), *argv],
+                            stderr=subprocess.PIPE, text=True)
+    lines = result.stderr.splitlines()
+    sys.stderr.write(''.join(f"{line}\n" for line in lines if not line.startswith('import time:')))
+    breakdown = import_breakdown(result.stderr)
+    print(f"\nImport time by package ({sum(ms for _, ms in breakdown):.1f} ms total):", file=sys.stderr)
+    for name, ms in breakdown[:top]:
+        print(f"  {name:<30} {ms:8.1f} ms", file=sys.stderr)
+    return result.returncode
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Football matches toolkit',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='commands:\n' + '\n'.join(f"  {name:<10}{help}" for name, (_, _, help) in COMMANDS.items())
+    )
+    parser.add_argument('--import-times', action='store_true', help='print the import-time breakdown of the command')
+    parser.add_argument('--profile', action='store_true', help='capture cProfile and tracemalloc stats into profiles/')
+    parser.add_argument('command', choices=COMMANDS, metavar='command')
+    parser.add_argument('args', nargs=argparse.REMAINDER, help='arguments of the command')
+    args = parser.parse_args(argv)
+
+    if args.profile:
+        from profiling_hooks import PROFILE_ENV
+        os.environ[PROFILE_ENV] = '1'
+    if args.import_times:
+        return report_import_times([args.command, *args.args])
+
+    module_name, prefix, _ = COMMANDS[args.command]
+    module = importlib.import_module(module_name)
+    if prefix is None:
+        if args.args:
+            parser.error(f"{args.command} takes no arguments")
+        return module.main()
+    return module.main(prefix + args.args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+import re
+import unicodedata
+
+# Canonical name -> aliases as they appear in TV listings and provider feeds.
+# Aliases are matched case-insensitively on word boundaries, accents ignored.
+COMPETITION_ALIASES = {
+    'Serie A': ['serie a', 'serie a tim', 'serie a enilive', 'campionato italiano'],
+    'Serie B': ['serie b', 'serie bkt'],
+    'Coppa Italia': ['coppa italia', 'coppa italia frecciarossa', 'italian cup'],
+    'Supercoppa Italiana': ['supercoppa italiana', 'supercoppa', 'italian super cup'],
+    'UEFA Champions League': ['champions league', 'uefa champions league', 'champions', 'ucl'],
+    'UEFA Europa League': ['europa league', 'uefa europa league', 'europa'],
+    'UEFA Conference League': ['conference league', 'uefa conference league', 'europa conference league'],
+    'UEFA Nations League': ['nations league', 'uefa nations league'],
+    'Premier League': ['premier league', 'english premier league', 'epl'],
+    'FA Cup': ['fa cup', 'coppa d\'inghilterra'],
+    'La Liga': ['la liga', 'laliga', 'primera division', 'liga spagnola'],
+    'Bundesliga': ['bundesliga', 'liga tedesca'],
+    'Ligue 1': ['ligue 1', 'liga francese'],
+    'European Championship': ['europei', 'euro 2028', 'european championship', 'campionato europeo'],
+    'FIFA World Cup': ['mondiali', 'world cup', 'coppa del mondo', 'fifa world cup'],
+    'Qualificazioni Mondiali': ['qualificazioni mondiali', 'world cup qualifiers'],
+    'Club World Cup': ['mondiale per club', 'club world cup'],
+    'Serie A Femminile': ['serie a femminile', 'calcio femminile'],
+}
+
+TEAM_ALIASES = {
+    # Serie A
+    'Inter': ['inter', 'internazionale', 'fc internazionale milano', 'inter milan', 'nerazzurri'],
+    'Milan': ['milan', 'ac milan', 'rossoneri'],
+    'Juventus': ['juventus', 'juve', 'juventus fc', 'bianconeri'],
+    'Napoli': ['napoli', 'ssc napoli', 'partenopei'],
+    'Roma': ['roma', 'as roma', 'giallorossi'],
+    'Lazio': ['lazio', 'ss lazio', 'biancocelesti'],
+    'Atalanta': ['atalanta', 'atalanta bc'],
+    'Fiorentina': ['fiorentina', 'acf fiorentina'],
+    'Bologna': ['bologna', 'bologna fc 1909', 'bologna fc'],
+    'Torino': ['torino', 'torino fc', 'granata'],
+    'Genoa': ['genoa', 'genoa cfc'],
+    'Sampdoria': ['sampdoria', 'uc sampdoria', 'samp'],
+    'Udinese': ['udinese', 'udinese calcio'],
+    'Hellas Verona': ['verona', 'hellas verona', 'hellas verona fc'],
+    'Cagliari': ['cagliari', 'cagliari calcio'],
+    'Lecce': ['lecce', 'us lecce'],
+    'Empoli': ['empoli', 'empoli fc'],
+    'Monza': ['monza', 'ac monza'],
+    'Parma': ['parma', 'parma calcio 1913', 'parma calcio'],
+    'Como': ['como', 'como 1907'],
+    'Venezia': ['venezia', 'venezia fc'],
+    'Sassuolo': ['sassuolo', 'us sassuolo'],
+    'Salernitana': ['salernitana', 'us salernitana 1919'],
+    'Frosinone': ['frosinone', 'frosinone calcio'],
+    'Cremonese': ['cremonese', 'us cremonese'],
+    'Pisa': ['pisa', 'pisa sc'],
+    # Serie B
+    'Palermo': ['palermo', 'palermo fc'],
+    'Bari': ['bari', 'ssc bari'],
+    'Spezia': ['spezia', 'spezia calcio'],
+    'Brescia': ['brescia', 'brescia calcio'],
+    'Modena': ['modena', 'modena fc'],
+    'Catanzaro': ['catanzaro', 'us catanzaro'],
+    'Cesena': ['cesena', 'cesena fc'],
+    'Reggiana': ['reggiana', 'ac reggiana'],
+    'Sudtirol': ['sudtirol', 'fc sudtirol'],
+    'Cittadella': ['cittadella', 'as cittadella'],
+    'Carrarese': ['carrarese'],
+    'Juve Stabia': ['juve stabia'],
+    'Mantova': ['mantova', 'mantova 1911'],
+    'Cosenza': ['cosenza', 'cosenza calcio'],
+    # Premier League
+    'Manchester City': ['manchester city', 'man city'],
+    'Manchester United': ['manchester united', 'man united', 'man utd'],
+    'Liverpool': ['liverpool', 'liverpool fc'],
+    'Arsenal': ['arsenal', 'arsenal fc'],
+    'Chelsea': ['chelsea', 'chelsea fc'],
+    'Tottenham': ['tottenham', 'tottenham hotspur', 'spurs'],
+    'Newcastle': ['newcastle', 'newcastle united'],
+    'Aston Villa': ['aston villa'],
+    'West Ham': ['west ham', 'west ham united'],
+    'Brighton': ['brighton', 'brighton & hove albion'],
+    'Everton': ['everton', 'everton fc'],
+    # La Liga
+    'Real Madrid': ['real madrid', 'real madrid cf'],
+    'Barcelona': ['barcelona', 'fc barcelona', 'barca'],
+    'Atletico Madrid': ['atletico madrid', 'atletico de madrid', 'club atletico de madrid'],
+    'Sevilla': ['sevilla', 'siviglia', 'sevilla fc'],
+    'Real Sociedad': ['real sociedad'],
+    'Villarreal': ['villarreal', 'villarreal cf'],
+    'Athletic Bilbao': ['athletic bilbao', 'athletic club'],
+    'Valencia': ['valencia', 'valencia cf'],
+    'Real Betis': ['real betis', 'betis'],
+    # Bundesliga
+    'Bayern Munich': ['bayern', 'bayern monaco', 'bayern munich', 'fc bayern munchen'],
+    'Borussia Dortmund': ['borussia dortmund', 'dortmund', 'bvb'],
+    'Bayer Leverkusen': ['bayer leverkusen', 'leverkusen', 'bayer 04 leverkusen'],
+    'RB Leipzig': ['rb leipzig', 'lipsia'],
+    'Eintracht Frankfurt': ['eintracht frankfurt', 'eintracht francoforte'],
+    'Borussia Monchengladbach': ['borussia monchengladbach', 'gladbach'],
+    # Ligue 1
+    'Paris Saint-Germain': ['paris saint-germain', 'psg', 'paris sg'],
+    'Marseille': ['marseille', 'marsiglia', 'olympique de marseille'],
+    'Lyon': ['lyon', 'lione', 'olympique lyonnais'],
+    'AS Monaco': ['as monaco'],
+    'Lille': ['lille', 'losc lille'],
+    # Other European clubs
+    'Benfica': ['benfica', 'sl benfica'],
+    'Porto': ['porto', 'fc porto'],
+    'Sporting CP': ['sporting', 'sporting cp', 'sporting lisbona'],
+    'Ajax': ['ajax', 'afc ajax'],
+    'PSV': ['psv', 'psv eindhoven'],
+    'Feyenoord': ['feyenoord'],
+    'Celtic': ['celtic', 'celtic fc'],
+    'Galatasaray': ['galatasaray'],
+    'Club Brugge': ['club brugge', 'bruges'],
+    # National teams
+    'Italia': ['italia', 'italy', 'nazionale', 'azzurri'],
+    'Spagna': ['spagna', 'spain'],
+    'Francia': ['francia', 'france'],
+    'Germania': ['germania', 'germany'],
+    'Inghilterra': ['inghilterra', 'england'],
+    'Portogallo': ['portogallo', 'portugal'],
+    'Olanda': ['olanda', 'paesi bassi', 'netherlands'],
+    'Argentina': ['argentina'],
+    'Brasile': ['brasile', 'brazil'],
+}
+
+# Generic words that mark a program as football without naming a team or competition
+GENERIC_KEYWORDS = [
+    'calcio', 'football', 'soccer', 'partita', 'diretta gol', 'highlights calcio',
+    '90 minuto', '90° minuto', 'novantesimo minuto', 'domenica sportiva', 'la domenica sportiva',
+    'stadio sprint', 'sky calcio show', 'pressing', 'calciomercato', 'derby', 'amichevole',
+]
+
+# Single words that also name things outside football ('Mondiali di nuoto', 'derby ippico',
+# 'Sporting Gijon'): they only count in a title that also names a team or competition
+CONTEXT_ONLY_ALIASES = {
+    'europa', 'champions', 'supercoppa', 'europei', 'mondiali', 'nazionale', 'azzurri',
+    'sporting', 'spurs', 'pressing', 'derby', 'amichevole', 'partita',
+}
+
+
+def normalize(text):
+    """Lowercase and strip accents so 'Mönchengladbach' matches 'monchengladbach'"""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+class KeywordMatcher:
+    """All aliases compiled into one regex, scanned once per title.
+
+    The alternation is ordered longest alias first so 'europa league' wins
+    over 'europa' and 'inter milan' over 'inter'.
+    """
+
+    def __init__(self, competitions=None, teams=None, keywords=None, context_only=None):
+        self.aliases = {}
+        self.context_only = {normalize(alias) for alias in
+                             (CONTEXT_ONLY_ALIASES if context_only is None else context_only)}
+        for kind, index in (('competition', competitions or COMPETITION_ALIASES),
+                            ('team', teams or TEAM_ALIASES)):
+            for canonical, aliases in index.items():
+                for alias in [canonical] + list(aliases):
+                    self.aliases.setdefault(normalize(alias), (kind, canonical))
+        for keyword in keywords or GENERIC_KEYWORDS:
+            self.aliases.setdefault(normalize(keyword), ('keyword', keyword))
+
+        alternation = '|'.join(re.escape(alias) for alias in sorted(self.aliases, key=len, reverse=True))
+        self.pattern = re.compile(rf'(?<!\w)(?:{alternation})(?!\w)')
+
+    def scan(self, title):
+        """Return (kind, canonical) for every alias found in title, in order.
+
+        Context-only aliases are dropped unless another alias in the title
+        names a team or competition.
+        """
+        found = [m.group(0) for m in self.pattern.finditer(normalize(title))]
+        context = any(alias not in self.context_only and self.aliases[alias][0] != 'keyword' for alias in found)
+        return [self.aliases[alias] for alias in found if context or alias not in self.context_only]
+
+    def classify(self, title):
+        """Summarize a title: {'teams': [...], 'competition': name or None}, or None if not football.
+
+        Many clubs share their city's name ('Roma', 'Napoli', 'Torino'), so a
+        single team alias alone isn't enough: a title counts as football when
+        it names a competition, a generic football keyword or two teams.
+        """
+        teams = []
+        competition = None
+        keyword = False
+        for kind, canonical in self.scan(title):
+            if kind == 'team' and canonical not in teams:
+                teams.append(canonical)
+            elif kind == 'competition' and competition is None:
+                competition = canonical
+            elif kind == 'keyword':
+                keyword = True
+        if competition is None and not keyword and len(teams) < 2:
+            return None
+        return {'teams': teams, 'competition': competition}
+
+
+_default_matcher = None
+
+
+def get_matcher():
+    """Return the shared matcher, compiling it on first use"""
+    global _default_matcher
+    if _default_matcher is None:
+        _default_matcher = KeywordMatcher()
+    return _default_matcher
@@ -1,8 +1,238 @@
 #!/usr/bin/env python3
 """
-Legacy entry point that redirects to fetch_matches.py for backward compatibility.
+Export the match store as iCalendar (.ics) feeds.
+
+Single export with filters (written to stdout or --out):
+    python generate_calendar.py --team Inter --from 2025-03-01 --to 2025-03-31
+
+Refresh the per-team and per-competition feeds in calendar_feeds/:
+    python generate_calendar.py --feeds
 """
-import fetch_matches
+import os
+import re
+import sys
+import json
+import hashlib
+import logging
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from match_store import (
+    MATCH_STORE_FILE, load_matches, iter_matches, match_kickoff, atomic_write_json
+)
+from snapshot_diff import fixture_key
+from competition_catalog import api_season, canonical_competition
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+FEEDS_DIR = 'calendar_feeds'
+MANIFEST_FILE = 'manifest.json'
+MATCH_DURATION = timedelta(hours=2)
+PRODID = '-//bert78it//Football Matches//IT'
+
+
+def _escape(text):
+    """Escape a TEXT value as required by RFC 5545"""
+    return (str(text).replace('\\', '\\\\').replace(';', '\\;')
+            .replace(',', '\\,').replace('\n', '\\n'))
+
+
+def _fold(line):
+    """Fold a content line at 75 octets as required by RFC 5545"""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts = []
+    limit = 75
+    while encoded:
+        cut = min(limit, len(encoded))
+        # Never split a multi-byte UTF-8 sequence
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode('utf-8'))
+        encoded = encoded[cut:]
+        limit = 74  # continuation lines start with a space
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def _ics_time(value):
+    return value.strftime('%Y%m%dT%H%M%SZ')
+
+
+def match_uid(match, kickoff):
+    """Stable UID so calendar clients update events instead of duplicating them.
+
+    Built from the teams, competition and season but not the kickoff, so a
+    rescheduled match moves in the calendar instead of appearing twice,
+    while the same pairing in another season stays a separate event.
+    """
+    season = api_season(canonical_competition(match.get('competition')), kickoff.date())
+    key = f"{fixture_key(match)}|{season}"
+    return hashlib.sha1(key.lower().encode('utf-8')).hexdigest() + '@football'
+
+
+def iter_vevents(matches, stamp):
+    """Yield folded VEVENT lines for each match with a usable kickoff"""
+    for match in matches:
+        kickoff = match_kickoff(match)
+        if kickoff is None:
+            continue
+        summary = f"{match.get('home_team', 'Unknown')} vs {match.get('away_team', 'Unknown')}"
+        description = f"Competizione: {match.get('competition', 'Unknown')}"
+        if match.get('status'):
+            description += f"\nStato: {match['status']}"
+
+        yield _fold('BEGIN:VEVENT')
+        yield _fold(f"UID:{match_uid(match, kickoff)}")
+        yield _fold(f"DTSTAMP:{_ics_time(stamp)}")
+        yield _fold(f"DTSTART:{_ics_time(kickoff)}")
+        yield _fold(f"DTEND:{_ics_time(kickoff + MATCH_DURATION)}")
+        yield _fold(f"SUMMARY:{_escape(summary)}")
+        yield _fold(f"DESCRIPTION:{_escape(description)}")
+        yield _fold(f"CATEGORIES:{_escape(match.get('competition', 'Football'))}")
+        yield _fold('END:VEVENT')
+
+
+def iter_calendar(matches, name='Football Matches', stamp=None):
+    """Yield a complete VCALENDAR document line by line; stamp (the DTSTAMP) defaults to now"""
+    stamp = stamp or datetime.now(timezone.utc)
+    yield _fold('BEGIN:VCALENDAR')
+    yield _fold('VERSION:2.0')
+    yield _fold(f"PRODID:{PRODID}")
+    yield _fold('CALSCALE:GREGORIAN')
+    yield _fold(f"X-WR-CALNAME:{_escape(name)}")
+    yield from iter_vevents(matches, stamp)
+    yield _fold('END:VCALENDAR')
+
+
+def write_calendar(path, matches, name='Football Matches', stamp=None):
+    """Stream a calendar to path atomically and return its SHA-256 digest"""
+    digest = hashlib.sha256()
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        for line in iter_calendar(matches, name, stamp):
+            f.write(line)
+            digest.update(line.encode('utf-8'))
+    os.replace(tmp_path, path)
+    return digest.hexdigest()
+
+
+def _slug(text):
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-') or 'unknown'
+
+
+def _fingerprint(matches):
+    """Hash of the fields that end up in a feed, used to skip unchanged feeds"""
+    digest = hashlib.sha256()
+    for match in matches:
+        digest.update(json.dumps(
+            [match.get('home_team'), match.get('away_team'), match.get('date') or match.get('datetime'),
+             match.get('competition'), match.get('status')],
+            ensure_ascii=False
+        ).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def load_manifest(feeds_dir=FEEDS_DIR):
+    try:
+        with open(os.path.join(feeds_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def update_feeds(matches, feeds_dir=FEEDS_DIR):
+    """Regenerate the per-team/per-competition feeds whose matches changed.
+
+    The manifest maps each feed file to its match fingerprint and an ETag
+    (content hash) that an HTTP layer can hand to calendar clients.
+    Returns the list of feed files that were rewritten.
+    """
+    os.makedirs(feeds_dir, exist_ok=True)
+
+    groups = {'all.ics': ('Football Matches', [])}
+    for match in sorted(matches, key=lambda m: match_kickoff(m) or datetime.max.replace(tzinfo=timezone.utc)):
+        for team in (match.get('home_team'), match.get('away_team')):
+            if team:
+                groups.setdefault(f"team-{_slug(team)}.ics", (team, []))[1].append(match)
+        competition = match.get('competition')
+        if competition:
+            groups.setdefault(f"competition-{_slug(competition)}.ics", (competition, []))[1].append(match)
+        groups['all.ics'][1].append(match)
+
+    manifest = load_manifest(feeds_dir)
+    updated = []
+    unchanged = removed = 0
+    # One generation time for every feed written in this run
+    stamp = datetime.now(timezone.utc)
+
+    for filename, (name, group_matches) in groups.items():
+        fingerprint = _fingerprint(group_matches)
+        path = os.path.join(feeds_dir, filename)
+        entry = manifest.get(filename)
+        if entry and entry.get('fingerprint') == fingerprint and os.path.exists(path):
+            unchanged += 1
+            continue
+
+        etag = write_calendar(path, group_matches, name, stamp)
+        manifest[filename] = {
+            'name': name,
+            'fingerprint': fingerprint,
+            'etag': etag,
+            'events': len(group_matches),
+            'updated': stamp.isoformat(timespec='seconds')
+        }
+        updated.append(filename)
+
+    # Drop feeds whose team or competition no longer has any match
+    for filename in list(manifest):
+        if filename not in groups:
+            try:
+                os.remove(os.path.join(feeds_dir, filename))
+            except FileNotFoundError:
+                pass
+            del manifest[filename]
+            updated.append(filename)
+            removed += 1
+
+    if updated:
+        atomic_write_json(os.path.join(feeds_dir, MANIFEST_FILE), manifest)
+    logger.info(f"Calendar feeds: {len(updated) - removed} updated, {removed} removed, {unchanged} unchanged")
+    return updated
+
+
+def _parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export football matches as iCalendar feeds')
+    parser.add_argument('--store', default=MATCH_STORE_FILE, help='match store to read')
+    parser.add_argument('--team', help='only matches involving this team')
+    parser.add_argument('--competition', help='only matches of this competition')
+    parser.add_argument('--from', dest='date_from', type=_parse_date, help='first day (YYYY-MM-DD)')
+    parser.add_argument('--to', dest='date_to', type=_parse_date, help='last day (YYYY-MM-DD)')
+    parser.add_argument('--out', help='write to this file instead of stdout')
+    parser.add_argument('--feeds', action='store_true', help=f'refresh all feeds in {FEEDS_DIR}/')
+    args = parser.parse_args()
+
+    matches = load_matches(args.store)
+
+    if args.feeds:
+        update_feeds(matches)
+        return
+
+    selected = iter_matches(matches, args.team, args.competition, args.date_from, args.date_to)
+    name = args.team or args.competition or 'Football Matches'
+    if args.out:
+        etag = write_calendar(args.out, selected, name)
+        logger.info(f"Calendar written to {args.out} (ETag {etag[:16]})")
+    else:
+        sys.stdout.reconfigure(encoding='utf-8', newline='')
+        for line in iter_calendar(selected, name):
+            sys.stdout.write(line)
+
 
 if __name__ == "__main__":
-    fetch_matches.fetch_matches()
+    main()
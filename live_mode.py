@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Follow IN_PLAY matches from the match store and report what changes.
+
+Usage:
+    python live_mode.py [--once] [--notify]
+
+Polling only happens while fixtures are live (or just about to kick off).
+Each poll is a single request to the cheapest provider whose endpoint covers
+every live competition, and the interval adapts to the number of live
+matches and the quota left. Only changes produce events: kickoff, goal,
+half-time and full-time.
+"""
+import time
+import logging
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from match_store import MATCH_STORE_FILE, load_matches, save_matches, match_kickoff, match_key
+from structured_logging import configure_logging, log_event
+
+logger = logging.getLogger(__name__)
+
+LIVE_STATUSES = {'IN_PLAY', 'PAUSED'}
+PENDING_STATUSES = {'SCHEDULED', 'TIMED'}
+# A match is over by kickoff + MATCH_LENGTH, stoppage time and half-time included
+MATCH_LENGTH = timedelta(minutes=115)
+# Further time a match reported live may take: extra time, penalties and delays
+EXTRA_TIME_SLACK = timedelta(minutes=60)
+# Start polling this long before the next kickoff instead of exiting
+LOOKAHEAD = timedelta(minutes=30)
+# Poll interval for a single live match, shortened as more matches are live
+BASE_INTERVAL = 120  # seconds
+MIN_INTERVAL = 30    # seconds
+MAX_INTERVAL = 600   # seconds
+
+# Competitions on football-data.org's free tier, by the names the store uses
+FOOTBALL_DATA_COMPETITIONS = {
+    'Premier League', 'Championship', 'Primera Division', 'Serie A', 'Bundesliga', 'Ligue 1',
+    'Eredivisie', 'Primeira Liga', 'Campeonato Brasileiro Série A', 'UEFA Champions League',
+    'European Championship', 'FIFA World Cup',
+}
+
+# API-Sports short statuses mapped onto the football-data statuses used by the store
+API_SPORTS_STATUS = {
+    'TBD': 'SCHEDULED', 'NS': 'TIMED',
+    '1H': 'IN_PLAY', '2H': 'IN_PLAY', 'ET': 'IN_PLAY', 'P': 'IN_PLAY', 'LIVE': 'IN_PLAY', 'INT': 'IN_PLAY',
+    'HT': 'PAUSED', 'BT': 'PAUSED',
+    'FT': 'FINISHED', 'AET': 'FINISHED', 'PEN': 'FINISHED',
+    'SUSP': 'SUSPENDED', 'PST': 'POSTPONED', 'CANC': 'CANCELLED', 'ABD': 'CANCELLED', 'AWD': 'AWARDED',
+}
+
+
+def parse_football_data(payload):
+    return [
+        {
+            'home_team': match.get('homeTeam', {}).get('name', 'Unknown'),
+            'away_team': match.get('awayTeam', {}).get('name', 'Unknown'),
+            'date': match.get('utcDate'),
+            'competition': match.get('competition', {}).get('name', 'Unknown League'),
+            'status': match.get('status'),
+            'home_score': match.get('score', {}).get('fullTime', {}).get('home'),
+            'away_score': match.get('score', {}).get('fullTime', {}).get('away'),
+        } for match in payload.get('matches', [])
+    ]
+
+
+def parse_api_sports(payload):
+    return [
+        {
+            'home_team': match.get('teams', {}).get('home', {}).get('name', 'Unknown'),
+            'away_team': match.get('teams', {}).get('away', {}).get('name', 'Unknown'),
+            'date': match.get('fixture', {}).get('date'),
+            'competition': match.get('league', {}).get('name', 'Unknown League'),
+            'status': API_SPORTS_STATUS.get(match.get('fixture', {}).get('status', {}).get('short')),
+            'home_score': match.get('goals', {}).get('home'),
+            'away_score': match.get('goals', {}).get('away'),
+        } for match in payload.get('response', [])
+    ]
+
+
+# Per provider: a one-call endpoint returning every fixture of a day with live status and score.
+# Day listings are used rather than "live only" feeds so that full-time is seen in the same call.
+LIVE_ENDPOINTS = {
+    'football_data': {
+        'path': '/matches',
+        'params': lambda day_from, day_to: {'dateFrom': day_from, 'dateTo': day_to},
+        'headers': lambda key: {'X-Auth-Token': key},
+        'parse': parse_football_data,
+        'competitions': FOOTBALL_DATA_COMPETITIONS,
+    },
+    'api_sports': {
+        'path': '/fixtures',
+        'params': lambda day_from, day_to: {'date': day_to},
+        'headers': lambda key: {'x-rapidapi-key': key, 'x-rapidapi-host': 'v3.football.api-sports.io'},
+        'parse': parse_api_sports,
+        'competitions': None,  # every league
+    },
+    'api_football': {
+        'path': '/fixtures',
+        'params': lambda day_from, day_to: {'date': day_to},
+        'headers': lambda key: {'X-RapidAPI-Key': key, 'X-RapidAPI-Host': 'api-football-v1.p.rapidapi.com'},
+        'parse': parse_api_sports,
+        'competitions': None,
+    },
+}
+
+
+def tracked_matches(matches, now):
+    """Matches to follow now: live ones and pending ones whose kickoff has passed.
+
+    Both are bounded by their kickoff, so a match whose final status never
+    arrived stops being polled once it must be over.
+    """
+    tracked = []
+    for match in matches:
+        kickoff = match_kickoff(match)
+        if kickoff is None:
+            continue
+        status = match.get('status')
+        if status in LIVE_STATUSES and kickoff <= now < kickoff + MATCH_LENGTH + EXTRA_TIME_SLACK:
+            tracked.append(match)
+        elif status in PENDING_STATUSES and kickoff <= now < kickoff + MATCH_LENGTH:
+            tracked.append(match)
+    return tracked
+
+
+def next_kickoff(matches, now):
+    kickoffs = [k for m in matches
+                if m.get('status') in PENDING_STATUSES and (k := match_kickoff(m)) and k > now]
+    return min(kickoffs, default=None)
+
+
+def remaining_quota(sources, provider):
+    """Requests left today for provider, None when it has no daily cap"""
+    limit = sources.apis[provider].get('daily_limit')
+    if limit is None:
+        return None
+    from provider_metrics import get_metrics
+    return limit - get_metrics().requests_today(provider)
+
+
+def choose_provider(sources, tracked):
+    """Cheapest provider covering all tracked competitions in one call, or None.
+
+    A provider without a daily cap costs nothing; otherwise one request costs
+    1/remaining of what is left today, so the fullest quota is drawn first.
+    """
+    competitions = {match.get('competition') for match in tracked}
+    best, best_cost = None, None
+    for provider, endpoint in LIVE_ENDPOINTS.items():
+        if not sources.apis[provider]['key']:
+            continue
+        if endpoint['competitions'] is not None and not competitions <= endpoint['competitions']:
+            continue
+        remaining = remaining_quota(sources, provider)
+        if remaining is not None and remaining <= 0:
+            continue
+        cost = 0 if remaining is None else 1 / remaining
+        if best_cost is None or cost < best_cost:
+            best, best_cost = provider, cost
+    return best
+
+
+def polling_interval(live_count, remaining, seconds_left, rate_limit):
+    """Seconds until the next poll.
+
+    More live matches poll faster (goals are more likely per minute), but
+    never faster than the remaining quota can sustain until the last live
+    match ends, nor than the provider's per-minute limit.
+    """
+    interval = BASE_INTERVAL / max(live_count, 1) ** 0.5
+    if remaining is not None:
+        interval = max(interval, seconds_left / max(remaining, 1))
+    interval = max(interval, 60 / rate_limit)
+    return min(max(interval, MIN_INTERVAL), MAX_INTERVAL)
+
+
+def poll(sources, provider, tracked):
+    """Fetch the tracked matches' day listings in one request, keyed by match_key"""
+    endpoint = LIVE_ENDPOINTS[provider]
+    api = sources.apis[provider]
+    days = sorted(match_kickoff(m).date().isoformat() for m in tracked)
+    try:
+        response = sources._get(
+            provider,
+            f"{api['base_url']}{endpoint['path']}",
+            params=endpoint['params'](days[0], days[-1]),
+            headers=endpoint['headers'](api['key']),
+            timeout=15
+        )
+    except Exception as e:
+        logger.error(f"Live poll of {provider} failed: {e}")
+        return {}
+    if response.status_code != 200:
+        logger.error(f"Live poll of {provider} failed: {response.status_code} - {response.text[:200]}")
+        return {}
+    return {match_key(match): match for match in endpoint['parse'](response.json())}
+
+
+def live_events(previous, current):
+    """Events for what changed between two versions of the same match"""
+    events = []
+    before, after = previous.get('status'), current.get('status')
+    if before in PENDING_STATUSES and after in LIVE_STATUSES | {'FINISHED'}:
+        events.append({'type': 'kickoff'})
+    for side in ('home', 'away'):
+        old, new = previous.get(f'{side}_score') or 0, current.get(f'{side}_score')
+        if new is not None and new > old:
+            events.append({'type': 'goal', 'team': current.get(f'{side}_team')})
+    if before != 'PAUSED' and after == 'PAUSED':
+        events.append({'type': 'half_time'})
+    if before != 'FINISHED' and after == 'FINISHED':
+        events.append({'type': 'full_time'})
+    for event in events:
+        event['match'] = current
+    return events
+
+
+def format_event(event):
+    match = event['match']
+    score = f"{match.get('home_score') or 0}-{match.get('away_score') or 0}"
+    teams = f"{match['home_team']} - {match['away_team']}"
+    if event['type'] == 'kickoff':
+        return f"Calcio d'inizio: {teams}"
+    if event['type'] == 'goal':
+        return f"Gol {event['team']}! {match['home_team']} {score} {match['away_team']}"
+    if event['type'] == 'half_time':
+        return f"Intervallo: {match['home_team']} {score} {match['away_team']}"
+    return f"Finale: {match['home_team']} {score} {match['away_team']}"
+
+
+def log_subscriber(event):
+    match = event['match']
+    log_event(logger, 'live', format_event(event), source=match.get('source'),
+              status=match.get('status'), type=event['type'],
+              home=match.get('home_team'), away=match.get('away_team'))
+    print(format_event(event))
+
+
+def telegram_subscriber(event):
+    from fetch_matches import send_telegram_message
+    send_telegram_message(format_event(event), [event['match']])
+
+
+def apply_updates(matches, tracked, fetched):
+    """Merge fetched status and score into the tracked store entries, returning the events"""
+    events = []
+    for match in tracked:
+        update = fetched.get(match_key(match))
+        if update is None:
+            continue
+        merged = dict(match, status=update['status'] or match.get('status'),
+                      home_score=update['home_score'], away_score=update['away_score'])
+        events.extend(live_events(match, merged))
+        match.update(merged)
+    return events
+
+
+def run(subscribers, store_path=MATCH_STORE_FILE, once=False):
+    from multi_source_matches import FootballDataSources
+    sources = FootballDataSources()
+
+    while True:
+        now = datetime.now(timezone.utc)
+        matches = load_matches(store_path)
+        tracked = tracked_matches(matches, now)
+        if not tracked:
+            upcoming = next_kickoff(matches, now)
+            if once or upcoming is None or upcoming - now > LOOKAHEAD:
+                logger.info("No live matches, live mode stopping")
+                return
+            logger.info(f"No live matches, waiting for kickoff at {upcoming.isoformat()}")
+            time.sleep((upcoming - now).total_seconds())
+            continue
+
+        provider = choose_provider(sources, tracked)
+        if provider is None:
+            logger.error("No provider with quota left covers the live competitions")
+            return
+
+        events = apply_updates(matches, tracked, poll(sources, provider, tracked))
+        try:
+            from provider_metrics import get_metrics
+            get_metrics().save()
+        except OSError as e:
+            logger.warning(f"Could not save provider metrics: {e}")
+        if events:
+            save_matches(matches, store_path)
+            if any(event['type'] == 'full_time' for event in events):
+                from standings import update_standings
+                update_standings(matches)
+            for event in events:
+                for subscriber in subscribers:
+                    try:
+                        subscriber(event)
+                    except Exception as e:
+                        logger.error(f"Live event subscriber {subscriber.__name__} failed: {e}")
+
+        if once:
+            return
+        live_count = sum(1 for m in tracked if m.get('status') in LIVE_STATUSES)
+        last_end = max(match_kickoff(m) for m in tracked) + MATCH_LENGTH
+        interval = polling_interval(live_count, remaining_quota(sources, provider),
+                                    max((last_end - now).total_seconds(), 300),
+                                    sources.apis[provider]['rate_limit'])
+        logger.info(f"Polled {provider}: {len(tracked)} tracked, {len(events)} events, next poll in {interval:.0f}s")
+        time.sleep(interval)
+
+
+def main():
+    configure_logging(filename='multi_source_matches.log',
+                      format='%(asctime)s - %(levelname)s - [%(funcName)s] %(message)s')
+    parser = argparse.ArgumentParser(description='Follow live matches and report changes')
+    parser.add_argument('--once', action='store_true', help='poll once and exit')
+    parser.add_argument('--notify', action='store_true', help='send events to Telegram')
+    args = parser.parse_args()
+
+    subscribers = [log_subscriber]
+    if args.notify:
+        subscribers.append(telegram_subscriber)
+    run(subscribers, once=args.once)
+
+
+if __name__ == "__main__":
+    main()
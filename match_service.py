@@ -0,0 +1,131 @@
+"""
+Serve matches from the last good snapshot and refresh it in the background.
+
+Callers always get an answer right away: the last successful fetch for the
+date, with its age. When that snapshot is older than max_age a refresh is
+started in the background, and concurrent callers for the same date share
+that one refresh. Only when there is no snapshot at all does a caller wait
+for the providers.
+"""
+import json
+import logging
+import threading
+from datetime import datetime, timezone
+
+from match_store import atomic_write_json
+from singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+LAST_GOOD_FILE = 'last_good_matches.json'
+MAX_AGE = 30 * 60  # seconds before a snapshot is refreshed in the background
+KEEP_DATES = 14
+
+
+class MatchService:
+    def __init__(self, sources=None, path=LAST_GOOD_FILE, max_age=MAX_AGE):
+        self._sources = sources
+        self.path = path
+        self.max_age = max_age
+        self.flight = SingleFlight()
+        self.lock = threading.Lock()
+        self.snapshots = self._load()
+
+    @property
+    def sources(self):
+        if self._sources is None:
+            from multi_source_matches import FootballDataSources
+            self._sources = FootballDataSources()
+        return self._sources
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _refresh(self, date):
+        """Fetch date from the providers; keep the previous snapshot if they all fail"""
+        matches = self.sources.fetch_matches(date)
+        if not matches:
+            logger.warning(f"All providers failed for {date}, keeping the last good snapshot")
+            return False
+        with self.lock:
+            self.snapshots[date] = {'fetched_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                                    'matches': matches}
+            for old_date in sorted(self.snapshots)[:-KEEP_DATES]:
+                del self.snapshots[old_date]
+            atomic_write_json(self.path, self.snapshots)
+        return True
+
+    def refresh(self, date=None):
+        """Refresh date now, joining a refresh already in flight; returns whether it succeeded"""
+        date = date or _today()
+        return self.flight.do(date, self._refresh, date)
+
+    def refresh_in_background(self, date=None):
+        date = date or _today()
+        if self.flight.in_flight(date):
+            return
+        thread = threading.Thread(target=self._background, args=(date,), daemon=True)
+        thread.start()
+        return thread
+
+    def _background(self, date):
+        try:
+            self.refresh(date)
+        except Exception as e:
+            logger.error(f"Background refresh of {date} failed: {e}")
+
+    def get_matches(self, date=None, max_age=None, block=False):
+        """Return {'matches', 'fetched_at', 'age_seconds', 'stale', 'refreshing'} for date.
+
+        With block=True an outdated snapshot is refreshed before answering
+        (falling back to it if the providers fail); otherwise the refresh
+        runs in the background and the current snapshot is returned at once.
+        """
+        date = date or _today()
+        max_age = self.max_age if max_age is None else max_age
+        snapshot = self.snapshots.get(date)
+        age = _age(snapshot)
+        refreshed = False
+
+        if snapshot is None or age > max_age:
+            if snapshot is None or block:
+                refreshed = self.refresh(date)
+                snapshot = self.snapshots.get(date)
+                age = _age(snapshot)
+            else:
+                self.refresh_in_background(date)
+
+        if snapshot is None:
+            return {'matches': [], 'fetched_at': None, 'age_seconds': None, 'stale': True, 'refreshing': False}
+        return {
+            'matches': snapshot['matches'],
+            'fetched_at': snapshot['fetched_at'],
+            'age_seconds': int(age),
+            'stale': not refreshed and age > max_age,
+            'refreshing': self.flight.in_flight(date),
+        }
+
+
+def _today():
+    return datetime.now().strftime('%Y-%m-%d')
+
+
+def _age(snapshot):
+    if snapshot is None:
+        return float('inf')
+    return (datetime.now(timezone.utc) - datetime.fromisoformat(snapshot['fetched_at'])).total_seconds()
+
+
+_service = None
+
+
+def get_service():
+    """Process-wide service so every caller shares the same snapshots and in-flight refreshes"""
+    global _service
+    if _service is None:
+        _service = MatchService()
+    return _service
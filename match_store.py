@@ -0,0 +1,126 @@
+import os
+import json
+import logging
+from datetime import datetime, timezone
+
+from football_keywords import get_matcher, normalize
+
+logger = logging.getLogger(__name__)
+
+MATCH_STORE_FILE = 'matches.json'
+
+
+def atomic_write_text(path, text, encoding='utf-8'):
+    """Write text to path atomically so readers never see a partial file"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, 'w', encoding=encoding, newline='') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def atomic_write_json(path, data, indent=2):
+    """Serialize data as JSON and write it atomically"""
+    atomic_write_text(path, json.dumps(data, ensure_ascii=False, indent=indent))
+
+
+def load_matches(path=MATCH_STORE_FILE):
+    """Load the match store, returning an empty list if it doesn't exist yet"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+    except json.JSONDecodeError as e:
+        logger.error(f"Match store {path} is corrupt: {e}")
+        return []
+
+
+def save_matches(matches, path=MATCH_STORE_FILE):
+    """Persist the match store atomically"""
+    atomic_write_json(path, matches)
+
+
+def merge_matches(new_matches, path=MATCH_STORE_FILE):
+    """Upsert many matches into the store with a single read and write.
+
+    Matches are identified by match_key; fetcher-style 'datetime' fields
+    are stored as 'date'. Returns (added, updated).
+    """
+    matches = load_matches(path)
+    index = {match_key(match): position for position, match in enumerate(matches)}
+    added = updated = 0
+    for match in new_matches:
+        entry = {key: value for key, value in match.items() if key != 'datetime'}
+        entry['date'] = match.get('date') or match.get('datetime')
+        key = match_key(entry)
+        position = index.get(key)
+        if position is None:
+            index[key] = len(matches)
+            matches.append(entry)
+            added += 1
+        elif matches[position] != {**matches[position], **entry}:
+            matches[position].update(entry)
+            updated += 1
+    if added or updated:
+        save_matches(matches, path)
+    return added, updated
+
+
+def match_kickoff(match):
+    """Return the kickoff of a match as a timezone-aware UTC datetime, or None"""
+    # Fetchers store the kickoff as 'datetime', the saved store uses 'date'
+    value = match.get('date') or match.get('datetime')
+    if not value:
+        return None
+    try:
+        kickoff = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if kickoff.tzinfo is None:
+        kickoff = kickoff.replace(tzinfo=timezone.utc)
+    return kickoff.astimezone(timezone.utc)
+
+
+def team_key(name):
+    """Provider-independent team name: the canonical alias if known, else the normalized name"""
+    for kind, canonical in get_matcher().scan(name or ''):
+        if kind == 'team':
+            return canonical
+    return ' '.join(normalize(name or '').split())
+
+
+def match_key(match):
+    """Identify a fixture across fetches and providers by its teams and UTC kickoff day"""
+    kickoff = match_kickoff(match)
+    return (team_key(match.get('home_team')), team_key(match.get('away_team')),
+            kickoff.date().isoformat() if kickoff else '')
+
+
+def iter_matches(matches, team=None, competition=None, date_from=None, date_to=None):
+    """Yield matches passing the optional team, competition and date filters.
+
+    team and competition are case-insensitive substrings; date_from and
+    date_to are inclusive datetime.date bounds on the UTC kickoff day.
+    """
+    team = team.lower() if team else None
+    competition = competition.lower() if competition else None
+
+    for match in matches:
+        if team and team not in match.get('home_team', '').lower() \
+                and team not in match.get('away_team', '').lower():
+            continue
+        if competition and competition not in match.get('competition', '').lower():
+            continue
+        if date_from or date_to:
+            kickoff = match_kickoff(match)
+            if kickoff is None:
+                continue
+            if date_from and kickoff.date() < date_from:
+                continue
+            if date_to and kickoff.date() > date_to:
+                continue
+        yield match
@@ -1,56 +1,220 @@
 import os
 import sys
-sys.stdout.reconfigure(encoding='utf-8')
+import time
 import requests
 import logging
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
-
-# Configure logging with more detailed format
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - [%(funcName)s] %(message)s',
-    filename='multi_source_matches.log',
-    filemode='a',
-    datefmt='%Y-%m-%d %H:%M:%S',
-    encoding='utf-8'
+from tv_match_join import join_broadcasts, load_schedule, ROME_TZ
+from tv_guide import load_day
+from structured_logging import configure_logging, log_event
+from provider_metrics import get_metrics
+import odds_tracker
+from live_mode import API_SPORTS_STATUS
+from standings import standings_subscriber
+from match_service import MatchService
+from singleflight import SingleFlight
+from retry_policy import RetryPolicy, describe_error
+from verify_api_keys import get_verifier, VALID, UNREACHABLE, UNKNOWN
+from profiling_hooks import profiled, stage
+from competition_catalog import get_catalog, canonical_competition, api_season, SUPPORTED_COMPETITIONS
+from snapshot_diff import (
+    DiffEngine, describe, store_subscriber, calendar_subscriber, notifier_subscriber, canonical_snapshot, fixture_key
 )
+from match_store import match_kickoff
+
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv()
+# Response header carrying each provider's remaining request quota
+QUOTA_HEADERS = {
+    'football_data': 'X-Requests-Available-Minute',
+    'rapidapi': 'X-RateLimit-Requests-Remaining',
+    'api_sports': 'X-RateLimit-Requests-Remaining',
+    'api_football': 'X-RateLimit-Requests-Remaining',
+    'odds_api': 'X-Requests-Remaining'
+}
+
+# Shared by every FootballDataSources in the process so identical in-flight requests coalesce
+provider_flight = SingleFlight()
+# Retry budgets are per source and shared for the same reason
+retry_policy = RetryPolicy()
+REQUEST_TIMEOUT = (5, 20)  # connect, read seconds
+# Comma-separated competitions (README names or aliases) fetched by default, all when unset
+COMPETITIONS_ENV = 'FOOTBALL_COMPETITIONS'
+# Leagues requested one by one from API-Sports style providers before falling back to one unfiltered call
+PUSHDOWN_MAX_LEAGUES = 2
+FETCH_DEADLINE = 90  # seconds a fetch_matches run may spend waiting to retry
+
+def default_competitions():
+    """Competitions listed in FOOTBALL_COMPETITIONS, or None to fetch all"""
+    names = [name.strip() for name in os.getenv(COMPETITIONS_ENV, '').split(',') if name.strip()]
+    return names or None
 
 class FootballDataSources:
     def __init__(self):
+        # Load environment variables
+        load_dotenv()
+        # time.monotonic() after which no retry starts, set for the duration of fetch_matches
+        self.deadline = None
         # API Configuration with additional validation
         self.apis = {
             'football_data': {
                 'key': os.getenv('FOOTBALL_DATA_API_KEY', ''),
                 'base_url': 'https://api.football-data.org/v4',
-                'rate_limit': 10  # requests per minute
+                'rate_limit': 10,  # requests per minute
+                'daily_limit': None  # requests per day, no daily cap on the free tier
             },
             'rapidapi': {
                 'key': os.getenv('RAPIDAPI_KEY', ''),
                 'base_url': 'https://football-live-data.p.rapidapi.com',
-                'rate_limit': 30  # requests per minute
+                'rate_limit': 30,  # requests per minute
+                'daily_limit': 100  # requests per day
             },
             'api_sports': {
                 'key': os.getenv('API_SPORTS_KEY', ''),
                 'base_url': 'https://v3.football.api-sports.io',
-                'rate_limit': 30  # requests per minute
+                'rate_limit': 30,  # requests per minute
+                'daily_limit': 100  # requests per day
             },
             'api_football': {
                 'key': os.getenv('API_FOOTBALL_KEY', ''),
                 'base_url': 'https://api-football-v1.p.rapidapi.com/v3',
-                'rate_limit': 20  # requests per minute
+                'rate_limit': 20,  # requests per minute
+                'daily_limit': 100  # requests per day
             },
             'odds_api': {
                 'key': os.getenv('ODDS_API_KEY', ''),
-                'base_url': 'https://api.the-odds-api.com/v4/sports/soccer_uefa_champs_league/odds',
-                'rate_limit': 10  # requests per minute
+                'base_url': 'https://api.the-odds-api.com/v4/sports',  # + /{sport_key}/odds
+                'rate_limit': 10,  # requests per minute
+                'daily_limit': 16  # credits per day, 500 per month; see odds_tracker.request_cost
             }
         }
 
+    @staticmethod
+    def _flight_key(api_name, url, params):
+        return (api_name, url, tuple(sorted((params or {}).items())))
+
+    def _get(self, api_name, url, **kwargs):
+        """GET from a provider; concurrent identical requests share one call"""
+        key = self._flight_key(api_name, url, kwargs.get('params'))
+        return provider_flight.do(key, self._request, api_name, url, **kwargs)
+
+    async def _aget(self, api_name, url, **kwargs):
+        """_get for asyncio callers, coalesced with threads asking for the same request"""
+        key = self._flight_key(api_name, url, kwargs.get('params'))
+        return await provider_flight.do_async(key, self._request, api_name, url, **kwargs)
+
+    def _request(self, api_name, url, **kwargs):
+        """GET with retries on transient failures, within the current fetch's deadline"""
+        kwargs.setdefault('timeout', REQUEST_TIMEOUT)
+        return retry_policy.call(api_name, lambda: self._attempt(api_name, url, **kwargs), deadline=self.deadline)
+
+    def _attempt(self, api_name, url, **kwargs):
+        """GET from a provider, logging latency, status and remaining quota"""
+        start = time.perf_counter()
+        try:
+            response = requests.get(url, **kwargs)
+        except requests.RequestException:
+            latency_ms = round((time.perf_counter() - start) * 1000, 1)
+            get_metrics().record(api_name, latency_ms, status=0)
+            log_event(logger, 'api_call', level=logging.WARNING, source=api_name,
+                      latency_ms=latency_ms, status='error')
+            raise
+        latency_ms = round((time.perf_counter() - start) * 1000, 1)
+        quota = response.headers.get(QUOTA_HEADERS.get(api_name, ''))
+        quota_remaining = int(quota) if quota and quota.isdigit() else None
+        get_metrics().record(api_name, latency_ms, len(response.content), response.status_code, quota_remaining)
+        log_event(logger, 'api_call', source=api_name, latency_ms=latency_ms,
+                  status=response.status_code, quota_remaining=quota_remaining)
+        return response
+
+    def auth_headers(self, api_name):
+        """Authentication headers expected by each provider"""
+        key = self.apis[api_name]['key']
+        if api_name == 'football_data':
+            return {'X-Auth-Token': key}
+        if api_name == 'rapidapi':
+            return {'X-RapidAPI-Key': key, 'X-RapidAPI-Host': 'football-live-data.p.rapidapi.com'}
+        if api_name == 'api_football':
+            return {'X-RapidAPI-Key': key, 'X-RapidAPI-Host': 'api-football-v1.p.rapidapi.com'}
+        if api_name == 'api_sports':
+            return {'x-rapidapi-key': key, 'x-rapidapi-host': 'v3.football.api-sports.io'}
+        return {}
+
+    def _fetch_listing(self, api_name, path, params, competitions, date):
+        """GET a fixture listing, pushing the competition filter down to the provider.
+
+        football-data.org takes a list of competition codes in one request;
+        API-Sports style providers take one league per request, so up to
+        PUSHDOWN_MAX_LEAGUES leagues are requested separately and larger
+        selections are fetched unfiltered and trimmed by league id before
+        parsing. Returns (status, error text, raw items).
+        """
+        items_key = 'matches' if api_name == 'football_data' else 'response'
+        url = f"{self.apis[api_name]['base_url']}{path}"
+        requests_params = [params]
+        keep_ids = keep_names = None
+
+        if competitions:
+            catalog = get_catalog()
+            if catalog.known(api_name):
+                ids = catalog.ids(api_name, competitions)
+                if not ids:
+                    logger.info(f"{api_name} carries none of {', '.join(competitions)}")
+                    return 200, '', []
+                if api_name == 'football_data':
+                    requests_params = [{**params, 'competitions': ','.join(ids.values())}]
+                elif len(ids) <= PUSHDOWN_MAX_LEAGUES:
+                    day = datetime.strptime(date, '%Y-%m-%d').date()
+                    requests_params = [{**params, 'league': league, 'season': api_season(name, day)}
+                                       for name, league in ids.items()]
+                else:
+                    keep_ids = set(ids.values())
+            else:
+                keep_names = {canonical_competition(name) for name in competitions}
+
+        items = []
+        for request_params in requests_params:
+            response = self._get(api_name, url, params=request_params, headers=self.auth_headers(api_name))
+            if response.status_code != 200:
+                return response.status_code, response.text, []
+            items.extend(response.json().get(items_key, []))
+
+        if keep_ids is not None:
+            items = [item for item in items if item.get('league', {}).get('id') in keep_ids]
+        elif keep_names is not None:
+            items = [item for item in items
+                     if canonical_competition((item.get('league') or item.get('competition') or {}).get('name'))
+                     in keep_names]
+        return 200, '', items
+
+    @staticmethod
+    def _odds_sport_keys(competitions):
+        """The Odds API sport keys requested for these competitions, all tracked leagues without a filter"""
+        if not competitions:
+            return odds_tracker.SPORT_KEYS
+        catalog = get_catalog()
+        if catalog.known('odds_api'):
+            return list(catalog.ids('odds_api', competitions).values())
+        wanted = {canonical_competition(name) for name in competitions}
+        return [hints['odds_api'] for name, hints in SUPPORTED_COMPETITIONS.items()
+                if name in wanted and 'odds_api' in hints]
+
+    def request_cost(self, api_name, competitions=None):
+        """Quota one fetch from api_name spends for these competitions: requests, or credits for odds_api.
+
+        Mirrors _fetch_listing: API-Sports style providers get one request per
+        pushed-down league, and odds_api one request per sport key.
+        """
+        if api_name == 'odds_api':
+            return len(self._odds_sport_keys(competitions)) * odds_tracker.request_cost()
+        if not competitions or api_name == 'football_data' or not get_catalog().known(api_name):
+            return 1
+        ids = get_catalog().ids(api_name, competitions)
+        if not ids:
+            return 0
+        return len(ids) if len(ids) <= PUSHDOWN_MAX_LEAGUES else 1
+
     def _validate_api_key(self, api_name):
         """Enhanced API key validation with detailed logging"""
         api_key = self.apis.get(api_name, {}).get('key', '')
@@ -59,31 +223,69 @@ class FootballDataSources:
             return False
         return True
 
-    def validate_api_keys(self):
+    def validate_api_keys(self, providers=None):
         """
-        Validate the presence and basic format of API keys.
-        Raises a ValueError if any critical API key is missing.
+        Check the API keys with their providers, reusing cached results.
+        Returns the set of API names whose key may be used: valid ones and
+        those whose provider couldn't be reached or didn't say whether the key
+        is good. The rest are logged and skipped.
         """
-        critical_apis = [
-            'football_data', 
-            'rapidapi', 
-            'api_sports', 
-            'api_football', 
-            'odds_api'
-        ]
-        
-        missing_keys = []
-        for api in critical_apis:
-            key = self.apis[api]['key']
-            if not key or len(key) < 10:  # Basic length check
-                missing_keys.append(api)
-        
-        if missing_keys:
-            error_msg = f"Missing or invalid API keys for: {', '.join(missing_keys)}"
-            logger.critical(error_msg)
-            raise ValueError(error_msg)
-
-    def fetch_football_data_matches(self, date=None):
+        keys = {api: self.apis[api]['key'] for api in (self.apis if providers is None else providers) if api in self.apis}
+        results = get_verifier().verify(keys)
+
+        usable = {api for api, result in results.items() if result['status'] in (VALID, UNREACHABLE, UNKNOWN)}
+        rejected = [f"{api} ({results[api]['status']}: {results[api]['detail']})" for api in keys if api not in usable]
+        if rejected:
+            logger.warning(f"Skipping sources with missing or invalid API keys: {', '.join(rejected)}")
+        return usable
+
+    @staticmethod
+    def _parse_football_data(match, date=None, competition=None):
+        return {
+            'home_team': match.get('homeTeam', {}).get('name', 'Unknown'),
+            'away_team': match.get('awayTeam', {}).get('name', 'Unknown'),
+            'datetime': match.get('utcDate', date),
+            'competition': match.get('competition', {}).get('name', competition or 'Unknown League'),
+            'status': match.get('status'),
+            'home_score': match.get('score', {}).get('fullTime', {}).get('home'),
+            'away_score': match.get('score', {}).get('fullTime', {}).get('away'),
+            'source': 'Football-Data.org'  # Add source key
+        }
+
+    def locate_fixtures(self, matches):
+        """Look fixtures missing from their day up in their season's list on Football-Data.org.
+
+        One request per competition and season. Returns {fixture_key: the
+        fixture as listed now, or None if the season no longer has it};
+        fixtures of competitions football-data.org doesn't carry are left out.
+        """
+        if not self._validate_api_key('football_data'):
+            return {}
+        catalog = get_catalog()
+        if not catalog.known('football_data'):
+            return {}
+        wanted = {}
+        for match in matches:
+            competition = canonical_competition(match.get('competition'))
+            code = catalog.ids('football_data', [competition]).get(competition)
+            kickoff = match_kickoff(match)
+            if code is not None and kickoff is not None:
+                wanted.setdefault((code, api_season(competition, kickoff.date()), competition), []).append(match)
+
+        located = {}
+        for (code, season, competition), fixtures in wanted.items():
+            response = self._get('football_data', f"{self.apis['football_data']['base_url']}/competitions/{code}/matches",
+                                 params={'season': season}, headers=self.auth_headers('football_data'))
+            if response.status_code != 200:
+                logger.warning(f"Football-Data.org season {season} of {competition}: HTTP {response.status_code}")
+                continue
+            listed = canonical_snapshot(self._parse_football_data(match, competition=competition)
+                                        for match in response.json().get('matches', []))
+            for match in fixtures:
+                located[fixture_key(match)] = listed.get(fixture_key(match))
+        return located
+
+    def fetch_football_data_matches(self, date=None, competitions=None):
         """Fetch matches from Football-Data.org with robust error handling"""
         try:
             if not self._validate_api_key('football_data'):
@@ -92,40 +294,26 @@ class FootballDataSources:
 
             date = date or datetime.now().strftime('%Y-%m-%d')
             
-            headers = {
-                'X-Auth-Token': self.apis['football_data']['key']
-            }
-            
             # Detailed logging for troubleshooting
             logger.info(f"Attempting Football-Data.org request for date: {date}")
             
-            response = requests.get(
-                f"{self.apis['football_data']['base_url']}/matches",
-                params={'dateFrom': date, 'dateTo': date},
-                headers=headers
+            status, error_text, matches_data = self._fetch_listing(
+                'football_data', '/matches', {'dateFrom': date, 'dateTo': date}, competitions, date
             )
             
-            if response.status_code == 200:
-                matches_data = response.json().get('matches', [])
-                parsed_matches = [
-                    {
-                        'home_team': match.get('homeTeam', {}).get('name', 'Unknown'),
-                        'away_team': match.get('awayTeam', {}).get('name', 'Unknown'),
-                        'datetime': match.get('utcDate', date),
-                        'competition': match.get('competition', {}).get('name', 'Unknown League'),
-                        'source': 'Football-Data.org'  # Add source key
-                    } for match in matches_data
-                ]
-                logger.info(f"Retrieved {len(parsed_matches)} matches from Football-Data.org")
+            if status == 200:
+                parsed_matches = [self._parse_football_data(match, date) for match in matches_data]
+                log_event(logger, 'fetch', f"Retrieved {len(parsed_matches)} matches from Football-Data.org",
+                          source='Football-Data.org', count=len(parsed_matches), status=status)
                 return parsed_matches
             else:
-                logger.error(f"Football-Data.org API error: {response.status_code} - {response.text}")
+                logger.error(f"Football-Data.org API error: {status} - {error_text}")
                 return []
         except Exception as e:
             logger.error(f"[fetch_football_data_matches] Detailed Football-Data.org error: {str(e)}")
             return []
 
-    def fetch_rapidapi_matches(self, date=None):
+    def fetch_rapidapi_matches(self, date=None, competitions=None):
         """Fetch matches from RapidAPI with robust error handling"""
         try:
             if not self._validate_api_key('rapidapi'):
@@ -134,41 +322,37 @@ class FootballDataSources:
 
             date = date or datetime.now().strftime('%Y-%m-%d')
             
-            headers = {
-                'X-RapidAPI-Key': self.apis['rapidapi']['key'],
-                'X-RapidAPI-Host': 'football-live-data.p.rapidapi.com'
-            }
-            
             # Detailed logging for troubleshooting
             logger.info(f"Attempting RapidAPI request for date: {date}")
             
-            response = requests.get(
-                f"{self.apis['rapidapi']['base_url']}/fixtures",
-                params={'date': date},
-                headers=headers
+            status, error_text, matches_data = self._fetch_listing(
+                'rapidapi', '/fixtures', {'date': date}, competitions, date
             )
             
-            if response.status_code == 200:
-                matches_data = response.json().get('response', [])
+            if status == 200:
                 parsed_matches = [
                     {
                         'home_team': match.get('teams', {}).get('home', {}).get('name', 'Unknown'),
                         'away_team': match.get('teams', {}).get('away', {}).get('name', 'Unknown'),
                         'datetime': match.get('fixture', {}).get('date', date),
                         'competition': match.get('league', {}).get('name', 'Unknown League'),
+                        'status': API_SPORTS_STATUS.get(match.get('fixture', {}).get('status', {}).get('short')),
+                        'home_score': match.get('goals', {}).get('home'),
+                        'away_score': match.get('goals', {}).get('away'),
                         'source': 'RapidAPI'  # Add source key
                     } for match in matches_data
                 ]
-                logger.info(f"Retrieved {len(parsed_matches)} matches from RapidAPI")
+                log_event(logger, 'fetch', f"Retrieved {len(parsed_matches)} matches from RapidAPI",
+                          source='RapidAPI', count=len(parsed_matches), status=status)
                 return parsed_matches
             else:
-                logger.error(f"RapidAPI error: {response.status_code} - {response.text}")
+                logger.error(f"RapidAPI error: {status} - {error_text}")
                 return []
         except Exception as e:
             logger.error(f"[fetch_rapidapi_matches] Detailed RapidAPI error: {str(e)}")
             return []
 
-    def fetch_api_football_matches(self, date=None):
+    def fetch_api_football_matches(self, date=None, competitions=None):
         """Fetch matches from API-Football with robust error handling"""
         try:
             if not self._validate_api_key('api_football'):
@@ -177,42 +361,38 @@ class FootballDataSources:
 
             date = date or datetime.now().strftime('%Y-%m-%d')
             
-            headers = {
-                'X-RapidAPI-Key': self.apis['api_football']['key'],
-                'X-RapidAPI-Host': 'api-football-v1.p.rapidapi.com'
-            }
-            
             # Detailed logging for troubleshooting
             logger.info(f"Attempting API-Football request for date: {date}")
             
-            response = requests.get(
-                f"{self.apis['api_football']['base_url']}/fixtures",
-                params={'date': date},
-                headers=headers
+            status, error_text, matches_data = self._fetch_listing(
+                'api_football', '/fixtures', {'date': date}, competitions, date
             )
             
-            if response.status_code == 200:
-                matches_data = response.json().get('response', [])
+            if status == 200:
                 parsed_matches = [
                     {
                         'home_team': match.get('teams', {}).get('home', {}).get('name', 'Unknown'),
                         'away_team': match.get('teams', {}).get('away', {}).get('name', 'Unknown'),
                         'datetime': match.get('fixture', {}).get('date', date),
                         'competition': match.get('league', {}).get('name', 'Unknown League'),
+                        'status': API_SPORTS_STATUS.get(match.get('fixture', {}).get('status', {}).get('short')),
+                        'home_score': match.get('goals', {}).get('home'),
+                        'away_score': match.get('goals', {}).get('away'),
                         'source': 'API-Football'  # Add source key
                     } for match in matches_data
                 ]
-                logger.info(f"Retrieved {len(parsed_matches)} matches from API-Football")
+                log_event(logger, 'fetch', f"Retrieved {len(parsed_matches)} matches from API-Football",
+                          source='API-Football', count=len(parsed_matches), status=status)
                 return parsed_matches
             else:
-                logger.error(f"API-Football error: {response.status_code} - {response.text}")
+                logger.error(f"API-Football error: {status} - {error_text}")
                 return []
         except Exception as e:
             logger.error(f"[fetch_api_football_matches] Detailed API-Football error: {str(e)}")
             return []
 
-    def fetch_odds_api_matches(self, date=None):
-        """Fetch matches from Odds API with robust error handling"""
+    def fetch_odds_api_matches(self, date=None, competitions=None):
+        """Fetch matches with 1X2 odds from Odds API for every tracked league"""
         try:
             if not self._validate_api_key('odds_api'):
                 logger.error("Odds API key validation failed")
@@ -220,40 +400,30 @@ class FootballDataSources:
 
             date = date or datetime.now().strftime('%Y-%m-%d')
             
-            headers = {
-                'X-API-Key': self.apis['odds_api']['key']
-            }
-            
             # Detailed logging for troubleshooting
             logger.info(f"Attempting Odds API request for date: {date}")
             
-            response = requests.get(
-                f"{self.apis['odds_api']['base_url']}/odds",
-                params={'date': date},
-                headers=headers
-            )
-            
-            if response.status_code == 200:
-                matches_data = response.json().get('data', [])
-                parsed_matches = [
-                    {
-                        'home_team': match.get('teams', [])[0],
-                        'away_team': match.get('teams', [])[1],
-                        'datetime': match.get('commence_time', date),
-                        'competition': match.get('sport_key', 'Unknown League'),
-                        'source': 'Odds API'  # Add source key
-                    } for match in matches_data
-                ]
-                logger.info(f"Retrieved {len(parsed_matches)} matches from Odds API")
-                return parsed_matches
-            else:
-                logger.error(f"Odds API error: {response.status_code} - {response.text}")
-                return []
+            events = odds_tracker.fetch_all(self, self._odds_sport_keys(competitions), date=date)
+            if events:
+                odds_tracker.OddsSeries().append(events)
+            parsed_matches = [
+                {
+                    'home_team': event.get('home_team', 'Unknown'),
+                    'away_team': event.get('away_team', 'Unknown'),
+                    'datetime': event.get('commence_time', date),
+                    'competition': event.get('sport_title', event.get('sport_key', 'Unknown League')),
+                    'odds': odds_tracker.consensus_prices(event),
+                    'source': 'Odds API'  # Add source key
+                } for event in events
+            ]
+            log_event(logger, 'fetch', f"Retrieved {len(parsed_matches)} matches from Odds API",
+                      source='Odds API', count=len(parsed_matches))
+            return parsed_matches
         except Exception as e:
-            logger.error(f"[fetch_odds_api_matches] Detailed Odds API error: {str(e)}")
+            logger.error(f"[fetch_odds_api_matches] Detailed Odds API error: {describe_error(e)}")
             return []
 
-    def fetch_api_sports_matches(self, date=None):
+    def fetch_api_sports_matches(self, date=None, competitions=None):
         """Fetch matches from API-Sports with robust error handling"""
         try:
             if not self._validate_api_key('api_sports'):
@@ -262,49 +432,47 @@ class FootballDataSources:
 
             date = date or datetime.now().strftime('%Y-%m-%d')
             
-            headers = {
-                'x-rapidapi-key': self.apis['api_sports']['key'],
-                'x-rapidapi-host': 'v3.football.api-sports.io'
-            }
-            
             # Detailed logging for troubleshooting
             logger.info(f"Attempting API-Sports request for date: {date}")
             
-            response = requests.get(
-                f"{self.apis['api_sports']['base_url']}/fixtures",
-                params={'date': date},
-                headers=headers
+            status, error_text, matches_data = self._fetch_listing(
+                'api_sports', '/fixtures', {'date': date}, competitions, date
             )
             
-            if response.status_code == 200:
-                matches_data = response.json().get('response', [])
+            if status == 200:
                 parsed_matches = [
                     {
                         'home_team': match.get('teams', {}).get('home', {}).get('name', 'Unknown'),
                         'away_team': match.get('teams', {}).get('away', {}).get('name', 'Unknown'),
                         'datetime': match.get('fixture', {}).get('date', date),
                         'competition': match.get('league', {}).get('name', 'Unknown League'),
+                        'status': API_SPORTS_STATUS.get(match.get('fixture', {}).get('status', {}).get('short')),
+                        'home_score': match.get('goals', {}).get('home'),
+                        'away_score': match.get('goals', {}).get('away'),
                         'source': 'API-Sports'  # Add source key
                     } for match in matches_data
                 ]
-                logger.info(f"Retrieved {len(parsed_matches)} matches from API-Sports")
+                log_event(logger, 'fetch', f"Retrieved {len(parsed_matches)} matches from API-Sports",
+                          source='API-Sports', count=len(parsed_matches), status=status)
                 return parsed_matches
             else:
-                logger.error(f"API-Sports error: {response.status_code} - {response.text}")
+                logger.error(f"API-Sports error: {status} - {error_text}")
                 return []
         except Exception as e:
             logger.error(f"[fetch_api_sports_matches] Detailed API-Sports error: {str(e)}")
             return []
 
-    def fetch_matches(self, date=None):
+    def fetch_matches(self, date=None, providers=None, competitions=None):
         """
         Enhanced match fetching with comprehensive error handling.
+        providers optionally restricts the fetch to these API names,
+        competitions to these competitions (filtered by the providers);
+        it defaults to the comma-separated FOOTBALL_COMPETITIONS variable.
         """
-        try:
-            # Validate API keys before attempting to fetch
-            self.validate_api_keys()
-        except ValueError as key_error:
-            logger.error(f"API Key Validation Failed: {key_error}")
+        # Validate API keys before attempting to fetch
+        usable = self.validate_api_keys(providers)
+        if not usable:
+            logger.critical("No usable API keys, nothing to fetch")
             return []
 
         all_matches = []
@@ -317,59 +485,129 @@ class FootballDataSources:
             self.fetch_api_football_matches,
             self.fetch_api_sports_matches
         ]
+        fetch_sources = [
+            source for source in fetch_sources
+            if source.__name__[len('fetch_'):-len('_matches')] in usable
+        ]
 
-        for source in fetch_sources:
-            try:
-                source_matches = source(date)
-                if source_matches:
-                    all_matches.extend(source_matches)
-                    logger.info(f"Successfully fetched {len(source_matches)} matches from {source.__name__}")
-                else:
+        if competitions is None:
+            competitions = default_competitions()
+
+        self.deadline = time.monotonic() + FETCH_DEADLINE
+        try:
+            if competitions:
+                # Weekly at most: the catalog is cached with a long TTL
+                get_catalog().sync(self, [source.__name__[len('fetch_'):-len('_matches')] for source in fetch_sources])
+
+            for source in fetch_sources:
+                try:
+                    source_matches = source(date, competitions)
+                    if source_matches:
+                        all_matches.extend(source_matches)
+                        logger.info(f"Successfully fetched {len(source_matches)} matches from {source.__name__}")
+                    else:
+                        failed_sources.append(source.__name__)
+                except Exception as e:
+                    logger.warning(f"Failed to fetch matches from {source.__name__}: {e}")
                     failed_sources.append(source.__name__)
-            except Exception as e:
-                logger.warning(f"Failed to fetch matches from {source.__name__}: {e}")
-                failed_sources.append(source.__name__)
+        finally:
+            # The instance is shared, so a failed fetch must not leave its deadline on the next one
+            self.deadline = None
 
         if not all_matches:
             logger.error(f"No matches retrieved. Failed sources: {failed_sources}")
             # Optional: Send an alert or notification about complete API failure
 
+        try:
+            get_metrics().save()
+        except OSError as e:
+            logger.warning(f"Could not save provider metrics: {e}")
+
+        saved = provider_flight.stats()['saved']
+        if saved:
+            log_event(logger, 'singleflight', f"Coalesced requests saved so far: {saved}", count=saved)
+
         return all_matches
 
-def main():
+def publish_changes(matches, scope, competitions=None, sources=None):
+    """Diff a fetch of scope (its date) over competitions, FOOTBALL_COMPETITIONS by default,
+    against the fixture snapshot and hand the changes to the match store, calendar feeds,
+    Telegram notifier and standings. sources, when given, looks up fixtures that went missing."""
+    engine = DiffEngine()
+    for subscriber in (store_subscriber, calendar_subscriber, notifier_subscriber, standings_subscriber):
+        engine.subscribe(subscriber)
+    return engine.process(scope, matches, default_competitions() if competitions is None else competitions,
+                          locate=sources.locate_fixtures if sources is not None else None)
+
+@profiled('multi_source_matches')
+def main(argv=None):
+    sys.stdout.reconfigure(encoding='utf-8')
+    # Configure logging with more detailed format
+    configure_logging(
+        filename='multi_source_matches.log',
+        format='%(asctime)s - %(levelname)s - [%(funcName)s] %(message)s'
+    )
+
     # Allow specifying a date via command line argument
+    argv = sys.argv[1:] if argv is None else argv
     date_to_fetch = None
-    if len(sys.argv) > 1:
+    if argv:
         try:
             # Validate date format
-            datetime.strptime(sys.argv[1], '%Y-%m-%d')
-            date_to_fetch = sys.argv[1]
+            datetime.strptime(argv[0], '%Y-%m-%d')
+            date_to_fetch = argv[0]
         except ValueError:
             logger.error(f"Invalid date format. Use YYYY-MM-DD")
             print("Invalid date format. Use YYYY-MM-DD")
             return
     
-    # Initialize data sources
-    data_sources = FootballDataSources()
-    
-    # Fetch matches
-    matches = data_sources.fetch_matches(date_to_fetch)
+    # Fetch matches, falling back to the last good snapshot if every source fails
+    with stage('fetch'):
+        service = MatchService(FootballDataSources())
+        result = service.get_matches(date_to_fetch, max_age=0, block=True)
+    matches = result['matches']
     
     if not matches:
         print("No matches found from any sources.")
         logger.info("No matches found from any sources.")
         return
+    if result['stale']:
+        age = timedelta(seconds=result['age_seconds'])
+        print(f"All sources failed, showing matches fetched at {result['fetched_at']} ({age} ago)")
+        logger.warning(f"Serving last good snapshot from {result['fetched_at']}")
     
-    # Print matches
-    print(f"Found {len(matches)} matches:")
-    for match in matches:
-        print(f"[{match['source']}] {match['competition']}: {match['home_team']} vs {match['away_team']} at {match['datetime']}".encode('utf-8').decode('utf-8'))
+    # Link matches to the locally stored TV schedule of the fetched day
+    with stage('join_broadcasts'):
+        today = datetime.now(ROME_TZ).date()
+        day = datetime.strptime(date_to_fetch, '%Y-%m-%d').date() if date_to_fetch else today
+        schedule = load_day(day)
+        if not schedule and day == today:
+            # tv_schedule.json only ever holds today's guide
+            schedule = load_schedule()
+        join_broadcasts(matches, schedule, day)
     
-    # Log matches
-    with open('multi_source_matches.log', 'a', encoding='utf-8') as log_file:
-        log_file.write(f"\n--- Matches on {datetime.now().strftime('%Y-%m-%d')} ---\n")
+    # Compare with the fixtures seen so far and only report what changed
+    if result['stale']:
         for match in matches:
-            log_file.write(f"[{match['source']}] {match['competition']}: {match['home_team']} vs {match['away_team']} at {match['datetime']}\n")
+            print(f"[{match['source']}] {match['competition']}: {match['home_team']} vs {match['away_team']} at {match['datetime']}")
+        return
+    scope = date_to_fetch or datetime.now().strftime('%Y-%m-%d')
+    with stage('diff'):
+        changes = publish_changes(matches, scope, sources=service.sources)
+
+    with stage('report'):
+        print(f"Found {len(matches)} matches, {len(changes)} changes since the last fetch:")
+        for change in changes:
+            channels = ', '.join(b['channel'] for b in change.match.get('broadcasts', []))
+            tv_info = f" (TV: {channels})" if channels else ""
+            print(f"{describe(change)}{tv_info}")
+
+        # Log changes
+        if changes:
+            with open('multi_source_matches.log', 'a', encoding='utf-8') as log_file:
+                log_file.write(f"\n--- Changes on {datetime.now().strftime('%Y-%m-%d')} ---\n")
+                for change in changes:
+                    log_file.write(f"[{change.match['source']}] {describe(change)}\n")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+Fetch 1X2 odds for every tracked soccer league and keep them as a time series.
+
+Usage:
+    python odds_tracker.py fetch [YYYY-MM-DD]   # fan out over SPORT_KEYS, append a snapshot
+    python odds_tracker.py report [team]        # consensus probabilities and line movement
+
+Each snapshot is appended to odds_series/ as its own file of column arrays
+(ts, event, bookmaker, market, outcome, price); names are stored once as
+integer codes in codes.json. Implied probabilities, overround and line
+movement are computed with numpy over all rows at once.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from match_store import atomic_write_json
+from profiling_hooks import profile_call
+from retry_policy import describe_error
+
+logger = logging.getLogger(__name__)
+
+SERIES_DIR = 'odds_series'
+CODES_FILE = 'codes.json'
+MAX_WORKERS = 4
+
+# The Odds API sport keys, most important first: when quota is short the tail is skipped
+SPORT_KEYS = [
+    'soccer_italy_serie_a',
+    'soccer_uefa_champs_league',
+    'soccer_epl',
+    'soccer_spain_la_liga',
+    'soccer_germany_bundesliga',
+    'soccer_france_ligue_one',
+    'soccer_uefa_europa_league',
+    'soccer_uefa_europa_conference_league',
+    'soccer_italy_serie_b',
+    'soccer_italy_coppa_italia',
+]
+REGIONS = 'eu'
+MARKETS = ['h2h']
+# Outcome codes within the h2h market
+HOME, DRAW, AWAY = 0, 1, 2
+OUTCOMES = 3
+
+COLUMNS = {
+    'ts': np.float64,      # unix time of the snapshot
+    'event': np.int32,     # code into codes['events']
+    'bookmaker': np.int16,  # code into codes['bookmakers']
+    'market': np.int8,     # index into MARKETS
+    'outcome': np.int8,    # HOME, DRAW or AWAY
+    'price': np.float32,   # decimal odds
+}
+
+
+def request_cost(markets=MARKETS, regions=REGIONS):
+    """Quota used by one odds request: one credit per market per region"""
+    return len(markets) * len(regions.split(','))
+
+
+def fetch_sport(sources, sport_key, date=None):
+    """Upcoming events with odds for one sport key, optionally only those kicking off on date"""
+    api = sources.apis['odds_api']
+    params = {
+        'apiKey': api['key'],
+        'regions': REGIONS,
+        'markets': ','.join(MARKETS),
+        'oddsFormat': 'decimal',
+        'dateFormat': 'iso',
+    }
+    if date:
+        day = datetime.strptime(date, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+        params['commenceTimeFrom'] = day.strftime('%Y-%m-%dT%H:%M:%SZ')
+        params['commenceTimeTo'] = (day + timedelta(days=1)).strftime('%Y-%m-%dT%H:%M:%SZ')
+    response = sources._get('odds_api', f"{api['base_url']}/{sport_key}/odds", params=params, timeout=15)
+    if response.status_code != 200:
+        logger.error(f"Odds API error for {sport_key}: {response.status_code} - {response.text[:200]}")
+        return []
+    return response.json()
+
+
+# Credits claimed by odds requests in flight in this process, not yet in the provider metrics
+_credit_lock = threading.Lock()
+_reserved_credits = 0
+
+
+def reserve_credits(sources, cost):
+    """Claim cost credits of today's Odds API budget before a request; False if they aren't left.
+
+    The budget is daily_limit less the credits spent today and those
+    reserved by other requests, capped by the last remaining-credits
+    header. Every successful call must be paired with release_credits().
+    """
+    global _reserved_credits
+    limit = sources.apis['odds_api'].get('daily_limit')
+    from provider_metrics import get_metrics
+    with _credit_lock:
+        metrics = get_metrics()
+        left = None if limit is None else limit - metrics.requests_today('odds_api') * request_cost()
+        remaining = metrics.last_quota('odds_api')
+        if remaining is not None:
+            left = remaining if left is None else min(left, remaining)
+        if left is not None and left - _reserved_credits < cost:
+            return False
+        _reserved_credits += cost
+        return True
+
+
+def release_credits(cost):
+    """Hand back a reservation once its request is over (and counted by the metrics)"""
+    global _reserved_credits
+    with _credit_lock:
+        _reserved_credits -= cost
+
+
+def fetch_sport_within_budget(sources, sport_key, date=None):
+    """fetch_sport, skipped when today's credits are spent or reserved by other requests"""
+    cost = request_cost()
+    if not reserve_credits(sources, cost):
+        logger.warning(f"Odds API credits for today are used up, skipping {sport_key}")
+        return []
+    try:
+        return fetch_sport(sources, sport_key, date)
+    finally:
+        release_credits(cost)
+
+
+def fetch_all(sources, sport_keys=SPORT_KEYS, date=None, max_workers=MAX_WORKERS):
+    """Fetch several sport keys concurrently, never spending more than today's remaining quota.
+
+    Keys are submitted in order, so when credits run short the tail is skipped.
+    """
+    events = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(profile_call, fetch_sport_within_budget, sources, key, date): key
+                   for key in sport_keys}
+        for future in as_completed(futures):
+            try:
+                events.extend(future.result())
+            except Exception as e:
+                logger.error(f"Odds API fetch of {futures[future]} failed: {describe_error(e)}")
+    return events
+
+
+def consensus_prices(event):
+    """Median decimal price per outcome over all bookmakers, as {'home', 'draw', 'away'}"""
+    prices = {'home': [], 'draw': [], 'away': []}
+    for bookmaker in event.get('bookmakers', []):
+        for market in bookmaker.get('markets', []):
+            if market.get('key') != 'h2h':
+                continue
+            for outcome in market.get('outcomes', []):
+                side = _outcome_side(event, outcome.get('name'))
+                if side is not None:
+                    prices[('home', 'draw', 'away')[side]].append(outcome.get('price'))
+    return {side: round(float(np.median(values)), 2) for side, values in prices.items() if values}
+
+
+def _outcome_side(event, name):
+    if name == event.get('home_team'):
+        return HOME
+    if name == event.get('away_team'):
+        return AWAY
+    if name == 'Draw':
+        return DRAW
+    return None
+
+
+# Serializes appends: codes.json is read, extended and rewritten by each one
+_append_lock = threading.Lock()
+
+
+class OddsSeries:
+    """Append-only columnar odds history in a directory of per-snapshot .npz files"""
+
+    def __init__(self, directory=SERIES_DIR):
+        self.directory = directory
+        self.codes_path = os.path.join(directory, CODES_FILE)
+        self._load_codes()
+
+    def _load_codes(self):
+        try:
+            with open(self.codes_path, 'r', encoding='utf-8') as f:
+                self.codes = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.codes = {'events': [], 'event_info': [], 'bookmakers': []}
+        self._index = {kind: {name: code for code, name in enumerate(self.codes[kind])}
+                       for kind in ('events', 'bookmakers')}
+
+    def _code(self, kind, name, info=None):
+        code = self._index[kind].get(name)
+        if code is None:
+            code = len(self.codes[kind])
+            self.codes[kind].append(name)
+            self._index[kind][name] = code
+            if info is not None:
+                self.codes['event_info'].append(info)
+        return code
+
+    def append(self, events, ts=None):
+        """Add one snapshot of Odds API events; returns the number of rows written.
+
+        Appends from several threads or OddsSeries objects run one at a
+        time, each starting from the codes on disk.
+        """
+        with _append_lock:
+            self._load_codes()
+            return self._append(events, ts or time.time())
+
+    def _append(self, events, ts):
+        rows = {column: [] for column in COLUMNS}
+        for event in events:
+            event_code = self._code('events', event['id'], {
+                'home_team': event.get('home_team'),
+                'away_team': event.get('away_team'),
+                'commence_time': event.get('commence_time'),
+                'sport_key': event.get('sport_key'),
+            })
+            for bookmaker in event.get('bookmakers', []):
+                bookmaker_code = self._code('bookmakers', bookmaker['key'])
+                for market in bookmaker.get('markets', []):
+                    if market.get('key') not in MARKETS:
+                        continue
+                    for outcome in market.get('outcomes', []):
+                        side = _outcome_side(event, outcome.get('name'))
+                        if side is None or not outcome.get('price'):
+                            continue
+                        rows['event'].append(event_code)
+                        rows['bookmaker'].append(bookmaker_code)
+                        rows['market'].append(MARKETS.index(market['key']))
+                        rows['outcome'].append(side)
+                        rows['price'].append(outcome['price'])
+        count = len(rows['price'])
+        if count == 0:
+            return 0
+        rows['ts'] = [ts] * count
+
+        os.makedirs(self.directory, exist_ok=True)
+        name = datetime.fromtimestamp(ts, timezone.utc).strftime('%Y%m%dT%H%M%S')
+        path = os.path.join(self.directory, f"{name}.npz")
+        number = 1
+        while os.path.exists(path):
+            # Another snapshot within the same second
+            path = os.path.join(self.directory, f"{name}_{number}.npz")
+            number += 1
+        tmp_path = f"{path}.tmp.{os.getpid()}.npz"
+        np.savez_compressed(tmp_path, **{column: np.asarray(rows[column], dtype=dtype)
+                                         for column, dtype in COLUMNS.items()})
+        # Codes first: a snapshot never references codes that aren't on disk
+        atomic_write_json(self.codes_path, self.codes, indent=None)
+        os.replace(tmp_path, path)
+        return count
+
+    def load(self, since=None):
+        """All snapshots (optionally from unix time since) concatenated into column arrays"""
+        chunks = {column: [] for column in COLUMNS}
+        try:
+            names = sorted(n for n in os.listdir(self.directory) if n.endswith('.npz') and '.tmp.' not in n)
+        except FileNotFoundError:
+            names = []
+        for name in names:
+            with np.load(os.path.join(self.directory, name)) as snapshot:
+                if since is not None and snapshot['ts'].size and snapshot['ts'][0] < since:
+                    continue
+                for column in COLUMNS:
+                    chunks[column].append(snapshot[column])
+        return {column: np.concatenate(chunks[column]) if chunks[column] else np.zeros(0, dtype=dtype)
+                for column, dtype in COLUMNS.items()}
+
+
+def _group(*keys):
+    """Dense group ids for rows sharing the same combination of integer/float keys"""
+    if len(keys[0]) == 0:
+        return np.zeros(0, dtype=np.int64), 0
+    _, inverse = np.unique(np.stack([np.asarray(k, dtype=np.float64) for k in keys], axis=1),
+                           axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    return inverse, int(inverse.max()) + 1
+
+
+def implied_probabilities(columns):
+    """Per row: raw implied probability, the book's overround and the normalized probability"""
+    implied = 1.0 / columns['price'].astype(np.float64)
+    book, books = _group(columns['ts'], columns['event'], columns['bookmaker'], columns['market'])
+    totals = np.zeros(books)
+    np.add.at(totals, book, implied)
+    return {
+        'implied': implied,
+        'overround': totals[book] - 1.0,
+        'probability': implied / totals[book],
+    }
+
+
+def line_movement(columns):
+    """First and last price of every (event, bookmaker, market, outcome) line.
+
+    Returns column arrays with one row per line: event, bookmaker, market,
+    outcome, first, last, change (relative) and the change in normalized
+    probability.
+    """
+    if len(columns['price']) == 0:
+        return {}
+    probability = implied_probabilities(columns)['probability']
+    line, lines = _group(columns['event'], columns['bookmaker'], columns['market'], columns['outcome'])
+    order = np.lexsort((columns['ts'], line))
+    sorted_lines = line[order]
+    starts = np.flatnonzero(np.r_[True, sorted_lines[1:] != sorted_lines[:-1]])
+    ends = np.r_[starts[1:], len(order)] - 1
+    first, last = order[starts], order[ends]
+    return {
+        'event': columns['event'][first],
+        'bookmaker': columns['bookmaker'][first],
+        'market': columns['market'][first],
+        'outcome': columns['outcome'][first],
+        'first': columns['price'][first],
+        'last': columns['price'][last],
+        'change': columns['price'][last] / columns['price'][first] - 1.0,
+        'probability_change': probability[last] - probability[first],
+    }
+
+
+def consensus(columns):
+    """Mean normalized probability per (event, outcome) over bookmakers in the latest snapshot of each event"""
+    if len(columns['price']) == 0:
+        return np.zeros((0, OUTCOMES)), np.zeros(0, dtype=np.int32)
+    probability = implied_probabilities(columns)['probability']
+    events = columns['event']
+    latest = np.full(events.max() + 1, -np.inf)
+    np.maximum.at(latest, events, columns['ts'])
+    mask = columns['ts'] == latest[events]
+    codes, event_index = np.unique(events[mask], return_inverse=True)
+    sums = np.zeros((len(codes), OUTCOMES))
+    counts = np.zeros((len(codes), OUTCOMES))
+    np.add.at(sums, (event_index, columns['outcome'][mask]), probability[mask])
+    np.add.at(counts, (event_index, columns['outcome'][mask]), 1)
+    return sums / np.maximum(counts, 1), codes
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    command = sys.argv[1] if len(sys.argv) > 1 else 'report'
+    series = OddsSeries()
+
+    if command == 'fetch':
+        from multi_source_matches import FootballDataSources
+        from provider_metrics import get_metrics
+        date = sys.argv[2] if len(sys.argv) > 2 else None
+        events = fetch_all(FootballDataSources(), date=date)
+        print(f"Stored {series.append(events)} prices for {len(events)} events")
+        get_metrics().save()
+        return
+
+    team = sys.argv[2].lower() if len(sys.argv) > 2 else None
+    columns = series.load()
+    probabilities, codes = consensus(columns)
+    movement = line_movement(columns)
+    print(f"{'match':<50}{'1':>7}{'X':>7}{'2':>7}   biggest move")
+    for row, code in enumerate(codes):
+        info = series.codes['event_info'][code]
+        label = f"{info['home_team']} - {info['away_team']}"
+        if team and team not in label.lower():
+            continue
+        moves = np.flatnonzero(movement['event'] == code)
+        move = ''
+        if len(moves):
+            biggest = moves[np.argmax(np.abs(movement['probability_change'][moves]))]
+            move = (f"{'1X2'[movement['outcome'][biggest]]} {movement['first'][biggest]:.2f} -> "
+                    f"{movement['last'][biggest]:.2f} ({series.codes['bookmakers'][movement['bookmaker'][biggest]]})")
+        print(f"{label[:49]:<50}" + ''.join(f"{p:>7.0%}" for p in probabilities[row]) + f"   {move}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Opt-in profiling of pipeline runs.
+
+Usage:
+    FOOTBALL_PROFILE=1 python multi_source_matches.py   # or: python football_cli.py --profile fetch
+    python profiling_hooks.py list
+    python profiling_hooks.py show profiles/multi_source_matches-20250301-120000
+    python profiling_hooks.py diff OLD_RUN NEW_RUN
+
+When profiling is enabled, each run of a @profiled entry point writes
+profiles/<run>-<timestamp>/ with a cProfile dump per stage and
+summary.json. The summary holds each stage's wall time, peak traced
+memory, slowest functions and the allocations tracemalloc saw it make.
+cProfile only follows the thread that enabled it, so work submitted to
+thread pools goes through profile_call(); tracemalloc covers every
+thread. Child processes are not profiled.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import functools
+import threading
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+from match_store import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ENV = 'FOOTBALL_PROFILE'
+PROFILE_DIR = 'profiles'
+TOP_FUNCTIONS = 25
+TOP_ALLOCATIONS = 15
+
+# Allocations made by the profiler itself or by imports are left out of the reports
+ALLOCATION_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+]
+
+
+def enabled():
+    return os.getenv(PROFILE_ENV, '').lower() in ('1', 'true', 'yes')
+
+
+def _label(func):
+    """Readable name of a pstats function key (file, line, name)"""
+    filename, line, name = func
+    if filename == '~':
+        return name
+    return f"{os.path.basename(filename)}:{line}({name})"
+
+
+class ProfileRun:
+    def __init__(self, name, profile_dir=PROFILE_DIR):
+        self.name = name
+        self.started_at = datetime.now()
+        self.path = os.path.join(profile_dir, f"{name}-{self.started_at:%Y%m%d-%H%M%S}")
+        self.stages = []
+        self.current = None  # name of the stage being profiled
+        self.stage_thread = None  # thread whose profiler covers the current stage
+        self.thread_profiles = []  # profiles of pool threads for the current stage
+        self.lock = threading.Lock()
+        self.started_tracing = False
+
+    def __enter__(self):
+        os.makedirs(self.path, exist_ok=True)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        summary = {
+            'run': self.name,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'total_ms': round((time.perf_counter() - self.start) * 1000, 1),
+            'stages': self.stages,
+        }
+        atomic_write_json(os.path.join(self.path, 'summary.json'), summary)
+        if self.started_tracing:
+            tracemalloc.stop()
+        logger.info(f"Profile of {self.name} written to {self.path}")
+        return False
+
+    @contextmanager
+    def stage(self, name):
+        if self.current is not None:
+            # Nested stages are accounted to the enclosing one
+            yield
+            return
+        import cProfile
+
+        self.current, self.stage_thread = name, threading.get_ident()
+        before = tracemalloc.take_snapshot().filter_traces(ALLOCATION_FILTERS)
+        base, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            wall = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot().filter_traces(ALLOCATION_FILTERS)
+            with self.lock:
+                self.current = None
+                profiles, self.thread_profiles = [profile] + self.thread_profiles, []
+            self.stages.append(self._record(name, profiles, wall, peak - base, before, after))
+
+    def profile_call(self, func, *args, **kwargs):
+        """Run func in a pool thread under its own profiler, merged into the current stage"""
+        import cProfile
+
+        if self.current is None or threading.get_ident() == self.stage_thread:
+            return func(*args, **kwargs)
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.disable()
+            with self.lock:
+                self.thread_profiles.append(profile)
+
+    def _record(self, name, profiles, wall, peak, before, after):
+        import pstats
+
+        stats = pstats.Stats()
+        for profile in profiles:
+            profile.create_stats()
+            if profile.stats:
+                stats.add(profile)
+        prof_file = f"{len(self.stages):02d}-{name}.prof"
+        stats.dump_stats(os.path.join(self.path, prof_file))
+
+        slowest = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:TOP_FUNCTIONS]
+        allocations = [stat for stat in after.compare_to(before, 'lineno') if stat.size_diff > 0][:TOP_ALLOCATIONS]
+        return {
+            'stage': name,
+            'profile': prof_file,
+            'wall_ms': round(wall * 1000, 1),
+            'peak_kb': round(peak / 1024, 1),
+            'functions': [
+                {'function': _label(func), 'calls': calls, 'tottime_ms': round(tottime * 1000, 1),
+                 'cumtime_ms': round(cumtime * 1000, 1)}
+                for func, (_, calls, tottime, cumtime, _) in slowest
+            ],
+            'allocations': [
+                {'location': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                 'size_kb': round(stat.size_diff / 1024, 1), 'count': stat.count_diff}
+                for stat in allocations
+            ],
+        }
+
+
+_active = None  # run being profiled in this process
+
+
+def profiled(name):
+    """Decorator profiling each call of an entry point as one run, when profiling is enabled"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            global _active
+            if _active is not None or not enabled():
+                return func(*args, **kwargs)
+            with ProfileRun(name) as run:
+                _active = run
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    _active = None
+        return wrapper
+    return decorator
+
+
+def stage(name):
+    """Context manager marking a stage of the active run; does nothing when not profiling"""
+    if _active is None:
+        return nullcontext()
+    return _active.stage(name)
+
+
+def profile_call(func, *args, **kwargs):
+    """Call func, profiling it into the current stage; submit this to thread pools instead of func"""
+    run = _active
+    if run is None:
+        return func(*args, **kwargs)
+    return run.profile_call(func, *args, **kwargs)
+
+
+def load_run(path):
+    with open(os.path.join(path, 'summary.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def list_runs(profile_dir=PROFILE_DIR):
+    """(path, summary) of every capture, oldest first"""
+    if not os.path.isdir(profile_dir):
+        return []
+    runs = []
+    for entry in sorted(os.listdir(profile_dir)):
+        path = os.path.join(profile_dir, entry)
+        if os.path.exists(os.path.join(path, 'summary.json')):
+            runs.append((path, load_run(path)))
+    return sorted(runs, key=lambda run: run[1]['started_at'])
+
+
+def _cumulative_times(path, stage):
+    """{function label: cumulative seconds} from a stage's cProfile dump"""
+    import pstats
+
+    stats = pstats.Stats(os.path.join(path, stage['profile'])).stats
+    return {_label(func): cumtime for func, (_, _, _, cumtime, _) in stats.items()}
+
+
+def diff_runs(old_path, new_path, top=10):
+    """Per stage: wall time, peak memory, and the functions and allocation sites that changed most"""
+    old, new = load_run(old_path), load_run(new_path)
+    old_stages = {stage['stage']: stage for stage in old['stages']}
+    result = []
+    for new_stage in new['stages']:
+        old_stage = old_stages.get(new_stage['stage'])
+        if old_stage is None:
+            continue
+        old_times = _cumulative_times(old_path, old_stage)
+        new_times = _cumulative_times(new_path, new_stage)
+        functions = sorted(
+            ((name, (new_times.get(name, 0.0) - old_times.get(name, 0.0)) * 1000)
+             for name in set(old_times) | set(new_times)),
+            key=lambda item: abs(item[1]), reverse=True
+        )[:top]
+        old_sizes = {a['location']: a['size_kb'] for a in old_stage['allocations']}
+        new_sizes = {a['location']: a['size_kb'] for a in new_stage['allocations']}
+        allocations = sorted(
+            ((location, new_sizes.get(location, 0.0) - old_sizes.get(location, 0.0))
+             for location in set(old_sizes) | set(new_sizes)),
+            key=lambda item: abs(item[1]), reverse=True
+        )[:top]
+        result.append({
+            'stage': new_stage['stage'],
+            'wall_ms': (old_stage['wall_ms'], new_stage['wall_ms']),
+            'peak_kb': (old_stage['peak_kb'], new_stage['peak_kb']),
+            'functions': functions,
+            'allocations': allocations,
+        })
+    return result
+
+
+def _change(old, new):
+    percent = f" ({(new - old) / old:+.0%})" if old else ''
+    return f"{old:.1f} -> {new:.1f}{percent}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Inspect and compare profiling captures')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list', help=f'list the captures in {PROFILE_DIR}/')
+    show_parser = subparsers.add_parser('show', help='print one capture')
+    show_parser.add_argument('run')
+    diff_parser = subparsers.add_parser('diff', help='compare two captures stage by stage')
+    diff_parser.add_argument('old')
+    diff_parser.add_argument('new')
+    diff_parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    if args.command == 'list':
+        runs = list_runs()
+        if not runs:
+            print(f"No captures in {PROFILE_DIR}/, run with {PROFILE_ENV}=1")
+        for path, summary in runs:
+            stages = ', '.join(f"{s['stage']} {s['wall_ms']:.0f}ms" for s in summary['stages'])
+            print(f"{path:<55} {summary['total_ms']:>9.0f} ms  {stages}")
+    elif args.command == 'show':
+        summary = load_run(args.run)
+        print(f"{summary['run']} at {summary['started_at']}: {summary['total_ms']:.1f} ms")
+        for stage in summary['stages']:
+            print(f"\n[{stage['stage']}] {stage['wall_ms']:.1f} ms, peak {stage['peak_kb']:.1f} KB")
+            for function in stage['functions'][:10]:
+                print(f"  {function['cumtime_ms']:>10.1f} ms cum {function['tottime_ms']:>10.1f} ms own "
+                      f"{function['calls']:>8}x  {function['function']}")
+            for allocation in stage['allocations'][:5]:
+                print(f"  {allocation['size_kb']:>10.1f} KB  {allocation['count']:>8} blocks  {allocation['location']}")
+    else:
+        stages = diff_runs(args.old, args.new, args.top)
+        if not stages:
+            print("The captures have no stage in common")
+            sys.exit(1)
+        for stage in stages:
+            print(f"\n[{stage['stage']}] wall ms {_change(*stage['wall_ms'])}, peak KB {_change(*stage['peak_kb'])}")
+            for name, delta_ms in stage['functions']:
+                print(f"  {delta_ms:>+10.1f} ms  {name}")
+            for location, delta_kb in stage['allocations']:
+                print(f"  {delta_kb:>+10.1f} KB  {location}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Per-provider latency and quota time series.
+
+Every provider request is recorded as (timestamp, latency, bytes, status,
+quota remaining) in a fixed-size ring buffer, and its latency is added to a
+mergeable log-bucketed histogram for the day. Several processes record
+into the same file, so saving merges with what is on disk.
+
+Usage:
+    python provider_metrics.py [YYYY-MM-DD]
+"""
+import os
+import sys
+import time
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+try:
+    import fcntl
+except ImportError:  # Windows: saves are only serialized within a process
+    fcntl = None
+
+METRICS_FILE = 'provider_metrics.npz'
+RING_CAPACITY = 20000
+# Period counted by each provider's quota-remaining header
+QUOTA_PERIODS = {
+    'football_data': 'minute',
+    'rapidapi': 'day',
+    'api_sports': 'day',
+    'api_football': 'day',
+    'odds_api': 'month',
+}
+HISTOGRAM_DAYS = 14
+
+SAMPLE_DTYPE = np.dtype([
+    ('ts', 'f8'),          # unix time of the response
+    ('latency_ms', 'f4'),
+    ('bytes', 'i8'),
+    ('status', 'i2'),      # HTTP status, 0 for connection errors
+    ('quota', 'i4'),       # remaining quota from response headers, -1 if unknown
+])
+
+
+class RingBuffer:
+    """Fixed-capacity buffer of samples, overwriting the oldest when full"""
+
+    def __init__(self, capacity=RING_CAPACITY, data=None, position=0, size=0):
+        self.data = data if data is not None else np.zeros(capacity, dtype=SAMPLE_DTYPE)
+        self.position = position
+        self.size = size
+
+    @classmethod
+    def from_samples(cls, samples, capacity=RING_CAPACITY):
+        """Buffer holding the last capacity of samples, oldest first"""
+        ring = cls(capacity)
+        samples = samples[-capacity:]
+        ring.data[:len(samples)] = samples
+        ring.size = len(samples)
+        ring.position = len(samples) % capacity
+        return ring
+
+    def append(self, sample):
+        self.data[self.position] = sample
+        self.position = (self.position + 1) % len(self.data)
+        self.size = min(self.size + 1, len(self.data))
+
+    def samples(self):
+        """All stored samples, oldest first"""
+        if self.size < len(self.data):
+            return self.data[:self.size]
+        return np.concatenate((self.data[self.position:], self.data[:self.position]))
+
+
+class LatencyHistogram:
+    """HDR-style histogram: logarithmic buckets with a fixed relative error.
+
+    Buckets grow by 2% from 0.1 ms up to 10 minutes, so any percentile is
+    within about 2% of the true latency. Histograms of the same layout merge
+    by adding their counts.
+    """
+    MIN_MS = 0.1
+    MAX_MS = 600000.0
+    GROWTH = 1.02
+    BUCKETS = int(np.ceil(np.log(MAX_MS / MIN_MS) / np.log(GROWTH))) + 1
+
+    def __init__(self, counts=None):
+        self.counts = counts if counts is not None else np.zeros(self.BUCKETS, dtype=np.int64)
+
+    @classmethod
+    def bucket_of(cls, latency_ms):
+        latency_ms = np.clip(np.asarray(latency_ms, dtype=np.float64), cls.MIN_MS, cls.MAX_MS)
+        return (np.log(latency_ms / cls.MIN_MS) / np.log(cls.GROWTH)).astype(np.int64)
+
+    def record(self, latency_ms):
+        np.add.at(self.counts, self.bucket_of(latency_ms), 1)
+
+    def merge(self, other):
+        self.counts += other.counts
+        return self
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+    def percentiles(self, qs=(50, 95, 99)):
+        """Latency in ms at each percentile in qs (upper edge of the bucket)"""
+        total = self.total
+        if total == 0:
+            return {q: None for q in qs}
+        cumulative = np.cumsum(self.counts)
+        ranks = np.ceil(np.asarray(qs, dtype=np.float64) / 100 * total)
+        buckets = np.searchsorted(cumulative, ranks)
+        values = self.MIN_MS * self.GROWTH ** (buckets + 1)
+        return {q: round(float(min(v, self.MAX_MS)), 1) for q, v in zip(qs, values)}
+
+
+@contextmanager
+def _file_lock(path):
+    """Exclusive lock on path's .lock file, held across the read-merge-write of a save"""
+    with open(f"{path}.lock", 'a') as handle:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+class ProviderMetrics:
+    """Ring buffers and daily latency histograms for every provider"""
+
+    def __init__(self):
+        self.rings = {}
+        self.histograms = {}  # (provider, 'YYYY-MM-DD') -> LatencyHistogram
+        # Histogram counts as last read from or written to disk, so a save only adds what was recorded since
+        self.saved_counts = {}
+        self.lock = threading.Lock()
+
+    def record(self, provider, latency_ms, nbytes=0, status=0, quota_remaining=None, ts=None):
+        ts = ts or time.time()
+        day = datetime.fromtimestamp(ts, timezone.utc).date().isoformat()
+        sample = (ts, latency_ms, nbytes, status, -1 if quota_remaining is None else quota_remaining)
+        with self.lock:
+            self.rings.setdefault(provider, RingBuffer()).append(sample)
+            self.histograms.setdefault((provider, day), LatencyHistogram()).record(latency_ms)
+
+    def samples(self, provider, since=None, until=None):
+        ring = self.rings.get(provider)
+        if ring is None:
+            return np.zeros(0, dtype=SAMPLE_DTYPE)
+        samples = ring.samples()
+        mask = np.ones(len(samples), dtype=bool)
+        if since is not None:
+            mask &= samples['ts'] >= since
+        if until is not None:
+            mask &= samples['ts'] < until
+        return samples[mask]
+
+    def percentiles(self, provider, day=None, qs=(50, 95, 99)):
+        """Latency percentiles of provider on day (UTC, default today)"""
+        day = day or datetime.now(timezone.utc).date().isoformat()
+        histogram = self.histograms.get((provider, day), LatencyHistogram())
+        return histogram.percentiles(qs)
+
+    def error_rate(self, provider, window=3600):
+        samples = self.samples(provider, since=time.time() - window)
+        if len(samples) == 0:
+            return 0.0
+        return float(np.mean((samples['status'] == 0) | (samples['status'] >= 500) | (samples['status'] == 429)))
+
+    def requests_today(self, provider, now=None):
+        now = now or time.time()
+        midnight = datetime.fromtimestamp(now, timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        return len(self.samples(provider, since=midnight.timestamp(), until=now + 1))
+
+    def last_quota(self, provider, now=None):
+        """Quota remaining according to the last header seen today, or None"""
+        now = now or time.time()
+        midnight = datetime.fromtimestamp(now, timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        samples = self.samples(provider, since=midnight.timestamp(), until=now + 1)
+        known = samples[samples['quota'] >= 0]
+        return int(known['quota'][-1]) if len(known) else None
+
+    def forecast_quota_exhaustion(self, provider, daily_budget=None, now=None):
+        """Predict when today's quota runs out, as a UTC datetime, or None if it won't.
+
+        With daily_budget the forecast extrapolates today's request rate;
+        otherwise it fits a line to the quota-remaining headers seen today,
+        which only says something when the header counts a day or longer
+        (not football_data's per-minute one).
+        """
+        now = now or time.time()
+        midnight = datetime.fromtimestamp(now, timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        day_end = midnight + timedelta(days=1)
+        samples = self.samples(provider, since=midnight.timestamp(), until=now + 1)
+        if len(samples) == 0:
+            return None
+
+        if daily_budget:
+            rate = len(samples) / max(now - midnight.timestamp(), 60)
+            seconds_left = (daily_budget - len(samples)) / rate
+        else:
+            if QUOTA_PERIODS.get(provider) not in ('day', 'month'):
+                return None
+            known = samples[samples['quota'] >= 0]
+            if len(known) < 2 or np.ptp(known['ts']) == 0:
+                return None
+            slope, _ = np.polyfit(known['ts'] - now, known['quota'].astype(np.float64), 1)
+            if slope >= 0:
+                return None
+            seconds_left = known['quota'][-1] / -slope
+
+        exhaustion = datetime.fromtimestamp(now + max(seconds_left, 0), timezone.utc)
+        return exhaustion if exhaustion < day_end else None
+
+    def source_order(self, providers):
+        """Providers sorted by recent error rate, then by today's median latency"""
+        def key(provider):
+            p50 = self.percentiles(provider, qs=(50,))[50]
+            return (round(self.error_rate(provider), 2), p50 if p50 is not None else float('inf'))
+        return sorted(providers, key=key)
+
+    def _merge(self, other):
+        """Take in the samples and histogram counts other (the file on disk) has that this store lacks"""
+        for provider in set(self.rings) | set(other.rings):
+            # Samples read from the file earlier are in both; np.unique drops them and sorts by time
+            samples = np.unique(np.concatenate((other.samples(provider), self.samples(provider))))
+            self.rings[provider] = RingBuffer.from_samples(samples)
+        for key in set(self.histograms) | set(other.histograms):
+            counts = other.histograms.get(key, LatencyHistogram()).counts.copy()
+            if key in self.histograms:
+                counts += self.histograms[key].counts - self.saved_counts.get(key, 0)
+            self.histograms[key] = LatencyHistogram(counts)
+
+    def save(self, path=METRICS_FILE):
+        """Merge with the file on disk and persist rings and the last HISTOGRAM_DAYS of histograms.
+
+        The file is locked from the read to the replace, so processes saving
+        at the same time each add their requests instead of the last one
+        overwriting the others'. Afterwards this store holds the merged data.
+        """
+        oldest = (datetime.now(timezone.utc).date() - timedelta(days=HISTOGRAM_DAYS)).isoformat()
+        with _file_lock(path):
+            on_disk = ProviderMetrics.load(path)
+            arrays = {}
+            with self.lock:
+                self._merge(on_disk)
+                for provider, ring in self.rings.items():
+                    arrays[f"ring|{provider}"] = ring.samples()
+                for (provider, day), histogram in self.histograms.items():
+                    if day >= oldest:
+                        arrays[f"hist|{provider}|{day}"] = histogram.counts
+                self.saved_counts = {key: histogram.counts.copy() for key, histogram in self.histograms.items()}
+            tmp_path = f"{path}.tmp.{os.getpid()}.npz"
+            np.savez_compressed(tmp_path, **arrays)
+            os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=METRICS_FILE):
+        metrics = cls()
+        try:
+            with np.load(path) as archive:
+                for name in archive.files:
+                    parts = name.split('|')
+                    if parts[0] == 'ring':
+                        metrics.rings[parts[1]] = RingBuffer.from_samples(archive[name])
+                    elif parts[0] == 'hist':
+                        metrics.histograms[(parts[1], parts[2])] = LatencyHistogram(archive[name].copy())
+        except (FileNotFoundError, OSError, ValueError):
+            pass
+        metrics.saved_counts = {key: histogram.counts.copy() for key, histogram in metrics.histograms.items()}
+        return metrics
+
+
+_metrics = None
+
+
+def get_metrics():
+    """Process-wide metrics store, loaded from disk on first use"""
+    global _metrics
+    if _metrics is None:
+        _metrics = ProviderMetrics.load()
+    return _metrics
+
+
+def main():
+    day = sys.argv[1] if len(sys.argv) > 1 else datetime.now(timezone.utc).date().isoformat()
+    metrics = ProviderMetrics.load()
+    providers = sorted(metrics.rings)
+    if not providers:
+        print(f"No provider metrics recorded yet in {METRICS_FILE}")
+        return
+
+    print(f"Provider latency for {day} (ms)")
+    print(f"{'provider':<15}{'requests':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'errors':>8}  quota exhausted at")
+    for provider in providers:
+        histogram = metrics.histograms.get((provider, day), LatencyHistogram())
+        p = histogram.percentiles()
+        exhaustion = metrics.forecast_quota_exhaustion(provider)
+        print(f"{provider:<15}{histogram.total:>9}"
+              + ''.join(f"{'-' if p[q] is None else p[q]:>9}" for q in (50, 95, 99))
+              + f"{metrics.error_rate(provider, window=86400):>8.0%}  "
+              + (exhaustion.strftime('%H:%M UTC') if exhaustion else 'not today'))
+
+
+if __name__ == "__main__":
+    main()
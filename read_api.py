@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Local read-only HTTP/JSON API over the match store.
+
+Usage:
+    python read_api.py [--host 127.0.0.1] [--port 8765]
+
+Endpoints:
+    GET /matches?date=YYYY-MM-DD&team=Inter&competition=Serie A&status=TIMED
+    GET /today
+    GET /week
+    GET /health
+
+Internal clients read fixtures from here instead of calling the providers,
+so one fetch cycle serves all of them. The store is indexed in memory by
+date, team, competition and status and re-indexed when matches.json
+changes on disk. Responses carry an ETag derived from the store version,
+"today" and "this week" are prebuilt, and other queries are streamed.
+"""
+import os
+import json
+import hashlib
+import logging
+import argparse
+import threading
+import urllib.parse
+import urllib.request
+from collections import namedtuple
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from match_store import MATCH_STORE_FILE, load_matches, match_kickoff, team_key, iter_matches
+from tv_match_join import ROME_TZ
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+READ_API_URL = os.getenv('FOOTBALL_READ_API', f'http://{DEFAULT_HOST}:{DEFAULT_PORT}')
+
+
+# Everything a reader needs, built together and published with one assignment
+IndexState = namedtuple('IndexState', ['version', 'day', 'matches', 'by_date', 'by_team',
+                                       'by_competition', 'by_status', 'prebuilt'])
+EMPTY_STATE = IndexState(None, None, [], {}, {}, {}, {}, {})
+
+
+class MatchIndex:
+    """In-memory indexes over the match store, rebuilt when the file changes"""
+
+    def __init__(self, path=MATCH_STORE_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.state = EMPTY_STATE
+
+    @property
+    def version(self):
+        return self.state.version
+
+    @property
+    def matches(self):
+        return self.state.matches
+
+    def refresh(self):
+        """Re-index if matches.json changed since the last build; cheap when it hasn't.
+
+        Returns the current state; readers keep using it for the whole
+        request even if a rebuild is swapped in meanwhile.
+        """
+        try:
+            stat = os.stat(self.path)
+            version = f"{stat.st_mtime_ns}-{stat.st_size}"
+        except FileNotFoundError:
+            version = 'empty'
+        today = datetime.now(ROME_TZ).date()
+        state = self.state
+        if version == state.version and state.day == today:
+            return state
+        with self.lock:
+            state = self.state
+            if version == state.version and state.day == today:
+                return state
+            self.state = state = self._build(load_matches(self.path), version, today)
+            return state
+
+    def _build(self, matches, version, today):
+        by_date, by_team, by_competition, by_status = {}, {}, {}, {}
+        for position, match in enumerate(matches):
+            kickoff = match_kickoff(match)
+            if kickoff is not None:
+                by_date.setdefault(kickoff.astimezone(ROME_TZ).date().isoformat(), []).append(position)
+            for side in ('home_team', 'away_team'):
+                by_team.setdefault(team_key(match.get(side)), []).append(position)
+            by_competition.setdefault(match.get('competition', '').lower(), []).append(position)
+            by_status.setdefault(match.get('status') or '', []).append(position)
+
+        state = IndexState(version, today, matches, by_date, by_team, by_competition, by_status, {})
+        week = [(today + timedelta(days=offset)).isoformat() for offset in range(7)]
+        state.prebuilt['/today'] = self._body(self.select(date=today.isoformat(), state=state))
+        state.prebuilt['/week'] = self._body(self.select(dates=week, state=state))
+        logger.info(f"Indexed {len(matches)} matches (version {version})")
+        return state
+
+    @staticmethod
+    def _body(matches):
+        return json.dumps(matches, ensure_ascii=False).encode('utf-8')
+
+    def select(self, date=None, dates=None, team=None, competition=None, status=None, state=None):
+        """Positions matching every filter are intersected from the indexes, then sorted by kickoff"""
+        state = self.state if state is None else state
+        candidates = None
+
+        def narrow(positions):
+            nonlocal candidates
+            positions = set(positions)
+            candidates = positions if candidates is None else candidates & positions
+
+        if date:
+            narrow(state.by_date.get(date, ()))
+        if dates:
+            narrow(p for day in dates for p in state.by_date.get(day, ()))
+        if status:
+            narrow(state.by_status.get(status.upper(), ()))
+        if competition:
+            competition = competition.lower()
+            narrow(p for name, positions in state.by_competition.items() if competition in name for p in positions)
+        if team:
+            positions = state.by_team.get(team_key(team))
+            if positions is None:
+                # Unknown alias: fall back to a substring scan of the candidates
+                pool = state.matches if candidates is None else [state.matches[p] for p in candidates]
+                return sorted(iter_matches(pool, team=team), key=self._kickoff_key)
+            narrow(positions)
+
+        selected = state.matches if candidates is None else [state.matches[p] for p in candidates]
+        return sorted(selected, key=self._kickoff_key)
+
+    @staticmethod
+    def _kickoff_key(match):
+        return match.get('date') or match.get('datetime') or ''
+
+
+class ReadApiHandler(BaseHTTPRequestHandler):
+    index = None  # set by serve()
+    server_version = 'FootballReadAPI/1.0'
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    @staticmethod
+    def _etag(state, key):
+        # The day is part of it: /today and /week change at midnight without the store changing
+        return '"' + hashlib.sha1(f"{state.version}|{state.day}|{key}".encode('utf-8')).hexdigest()[:20] + '"'
+
+    def _not_modified(self, etag):
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return True
+        return False
+
+    def _send_json(self, status, body, etag=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream_json(self, matches, etag):
+        """Write the array one match at a time instead of building the whole body"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(b'[')
+        for number, match in enumerate(matches):
+            self.wfile.write((b',' if number else b'') + json.dumps(match, ensure_ascii=False).encode('utf-8'))
+        self.wfile.write(b']')
+
+    def do_GET(self):
+        state = self.index.refresh()
+        url = urllib.parse.urlsplit(self.path)
+        query = {key: values[-1] for key, values in urllib.parse.parse_qs(url.query).items()}
+
+        if url.path == '/health':
+            self._send_json(200, json.dumps({'matches': len(state.matches),
+                                             'version': state.version}).encode('utf-8'))
+        elif url.path in ('/today', '/week'):
+            etag = self._etag(state, url.path)
+            if not self._not_modified(etag):
+                self._send_json(200, state.prebuilt[url.path], etag)
+        elif url.path == '/matches':
+            unknown = set(query) - {'date', 'team', 'competition', 'status'}
+            if unknown:
+                self._send_json(400, json.dumps({'error': f"unknown filters: {', '.join(sorted(unknown))}"}).encode())
+                return
+            etag = self._etag(state, json.dumps(sorted(query.items())))
+            if not self._not_modified(etag):
+                self._stream_json(self.index.select(**query, state=state), etag)
+        else:
+            self._send_json(404, b'{"error": "not found"}')
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, path=MATCH_STORE_FILE):
+    ReadApiHandler.index = MatchIndex(path)
+    ReadApiHandler.index.refresh()
+    server = ThreadingHTTPServer((host, port), ReadApiHandler)
+    logger.info(f"Read API listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def query_matches(base_url=READ_API_URL, timeout=5, **filters):
+    """Client helper: matches from the read API, or from the local store if it isn't running"""
+    filters = {key: value for key, value in filters.items() if value}
+    url = f"{base_url}/matches?{urllib.parse.urlencode(filters)}"
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return json.load(response)
+    except OSError as e:
+        logger.debug(f"Read API unavailable ({e}), reading {MATCH_STORE_FILE}")
+        index = MatchIndex()
+        return index.select(**filters, state=index.refresh())
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='Serve the match store over HTTP')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+    serve(args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
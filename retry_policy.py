@@ -0,0 +1,173 @@
+"""
+Retries for provider requests.
+
+Failures are classified as retryable (timeouts, connection errors, 408,
+425, 429 and 5xx) or fatal (any other status, e.g. a bad key). Retries
+wait for the provider's Retry-After or quota-reset header when it sends
+one and otherwise back off with decorrelated jitter. A retry is never
+started if its wait would overrun the run's deadline, or if the provider
+asks for a wait longer than max_delay. Each source has a retry budget
+that drains on failures and refills on successes, so during an outage
+retries stop instead of multiplying the load.
+"""
+import time
+import random
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from datetime import timezone
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+# Headers telling when a provider's quota resets, in seconds or as a unix time
+RESET_HEADERS = {
+    'football_data': 'X-RequestCounter-Reset',
+    'rapidapi': 'X-RateLimit-Requests-Reset',
+    'api_sports': 'X-RateLimit-Reset',
+    'api_football': 'X-RateLimit-Requests-Reset',
+}
+
+OK, RETRY, FATAL = 'ok', 'retry', 'fatal'
+
+
+class RetryBudget:
+    """Token bucket of retries for one source.
+
+    Every failure costs a token and every success refunds token_ratio of
+    one; retries are only allowed while more than half the tokens are left.
+    """
+
+    def __init__(self, max_tokens=10, token_ratio=0.1):
+        self.max_tokens = max_tokens
+        self.token_ratio = token_ratio
+        self.tokens = float(max_tokens)
+        self.lock = threading.Lock()
+
+    def on_success(self):
+        with self.lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.token_ratio)
+
+    def on_failure(self):
+        with self.lock:
+            self.tokens = max(0.0, self.tokens - 1)
+
+    def can_retry(self):
+        with self.lock:
+            return self.tokens > self.max_tokens / 2
+
+
+def classify(response=None, error=None):
+    """OK, RETRY or FATAL for one attempt"""
+    if error is not None:
+        if isinstance(error, (requests.Timeout, requests.ConnectionError)):
+            return RETRY
+        return FATAL
+    if response.status_code < 400:
+        return OK
+    if response.status_code in RETRYABLE_STATUSES:
+        return RETRY
+    return FATAL
+
+
+def describe_error(error):
+    """Exception class and HTTP status for logs; the message is left out since it can hold the URL and its key"""
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None)
+    return error.__class__.__name__ + (f" (HTTP {status})" if status is not None else '')
+
+
+def _header_seconds(value, now=None):
+    """Seconds to wait from a header holding seconds, a unix time or an HTTP date"""
+    if not value:
+        return None
+    now = now or time.time()
+    try:
+        number = float(value)
+    except ValueError:
+        try:
+            moment = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        return max(0.0, moment.timestamp() - now)
+    # Large numbers are absolute unix times, small ones relative seconds
+    return max(0.0, number - now) if number > 1e9 else max(0.0, number)
+
+
+def server_delay(response, provider=None):
+    """How long the provider asked us to wait, or None if it didn't say"""
+    if response is None:
+        return None
+    delay = _header_seconds(response.headers.get('Retry-After'))
+    if delay is None and response.status_code == 429 and provider in RESET_HEADERS:
+        delay = _header_seconds(response.headers.get(RESET_HEADERS[provider]))
+    return delay
+
+
+class RetryPolicy:
+    def __init__(self, max_attempts=4, base_delay=0.5, max_delay=30.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budgets = {}
+        self.lock = threading.Lock()
+
+    def budget(self, source):
+        with self.lock:
+            return self.budgets.setdefault(source, RetryBudget())
+
+    def backoff(self, previous):
+        """Decorrelated jitter: uniform between the base delay and three times the previous one"""
+        return min(self.max_delay, random.uniform(self.base_delay, previous * 3))
+
+    def call(self, source, send, deadline=None, sleep=time.sleep):
+        """Call send() until it succeeds, fails fatally or may not be retried.
+
+        deadline is a time.monotonic() value no retry may wait past; with
+        or without one, no retry waits longer than max_delay.
+        Returns the last response (callers still check its status) or
+        raises the last request error.
+        """
+        budget = self.budget(source)
+        delay = self.base_delay
+        for attempt in range(1, self.max_attempts + 1):
+            response, error = None, None
+            try:
+                response = send()
+            except requests.RequestException as e:
+                error = e
+            outcome = classify(response, error)
+            if outcome == OK:
+                budget.on_success()
+                return response
+            if outcome == FATAL:
+                break
+            budget.on_failure()
+            if attempt == self.max_attempts:
+                break
+            if not budget.can_retry():
+                logger.warning(f"Retry budget of {source} exhausted, not retrying")
+                break
+
+            wait = server_delay(response, source)
+            if wait is None:
+                delay = self.backoff(delay)
+                wait = delay
+            elif wait > self.max_delay:
+                # Retrying sooner than asked would only be refused again
+                logger.warning(f"{source} asked to wait {wait:.0f}s, more than {self.max_delay:.0f}s, giving up")
+                break
+            if deadline is not None and time.monotonic() + wait > deadline:
+                logger.warning(f"Retrying {source} in {wait:.1f}s would overrun the deadline, giving up")
+                break
+            reason = error.__class__.__name__ if error is not None else response.status_code
+            logger.info(f"Retrying {source} in {wait:.1f}s after {reason} (attempt {attempt}/{self.max_attempts})")
+            sleep(wait)
+
+        if error is not None:
+            raise error
+        return response
@@ -0,0 +1,95 @@
+"""
+Coalesce concurrent identical calls into one.
+
+While a call for a key is in flight, other callers asking for the same key
+wait for it and receive its result (or its exception) instead of repeating
+the work. Threads and asyncio tasks share the same in-flight calls: a task
+can join a call started by a thread and the other way round.
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """Per-key call coalescing for threads and asyncio tasks"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.executed = {}
+        self.shared = {}
+
+    @staticmethod
+    def _label(key):
+        # Keys like (provider, url, params) are counted per provider
+        return key[0] if isinstance(key, tuple) and key else key
+
+    def in_flight(self, key):
+        with self.lock:
+            return key in self.calls
+
+    def _join(self, key):
+        """Return (future, leader): the in-flight call for key, or a new one this caller must run"""
+        label = self._label(key)
+        with self.lock:
+            future = self.calls.get(key)
+            if future is not None:
+                self.shared[label] = self.shared.get(label, 0) + 1
+                return future, False
+            future = self.calls[key] = Future()
+            self.executed[label] = self.executed.get(label, 0) + 1
+            return future, True
+
+    def _finish(self, key, future, result=None, error=None):
+        with self.lock:
+            del self.calls[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) unless a call for key is already running; share its outcome"""
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    async def do_async(self, key, fn, *args, **kwargs):
+        """Async variant of do(): fn may be a coroutine function or a blocking function.
+
+        Blocking functions run in the loop's default executor so the event
+        loop keeps serving other tasks while the call is in flight.
+        """
+        future, leader = self._join(key)
+        if not leader:
+            return await asyncio.wrap_future(future)
+        try:
+            if asyncio.iscoroutinefunction(fn):
+                result = await fn(*args, **kwargs)
+            else:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(None, lambda: fn(*args, **kwargs))
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    def stats(self):
+        """Calls executed and requests saved by sharing, in total and per label"""
+        with self.lock:
+            labels = sorted(set(self.executed) | set(self.shared), key=str)
+            return {
+                'executed': sum(self.executed.values()),
+                'saved': sum(self.shared.values()),
+                'by_label': {label: {'executed': self.executed.get(label, 0), 'saved': self.shared.get(label, 0)}
+                             for label in labels},
+            }
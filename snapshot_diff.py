@@ -0,0 +1,280 @@
+"""
+Compare successive match snapshots and publish what changed.
+
+A snapshot is the canonical list of fixtures seen by the fetches: the
+same match reported by several providers collapses to one entry under its
+fixture_key. The key leaves the kickoff out, so a fixture moved to another
+day is the same fixture with a new kickoff. Diffing a fetch against the
+snapshot is a single pass over two dicts, and each difference becomes a
+typed ChangeEvent handed to every subscriber.
+"""
+import os
+import json
+import logging
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+from match_store import (
+    MATCH_STORE_FILE, load_matches, save_matches, match_kickoff, match_key, team_key, atomic_write_json
+)
+from competition_catalog import canonical_competition
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FILE = 'match_snapshots.json'
+# Fixtures that kicked off longer ago than this are dropped from the snapshot
+KEEP_DAYS = 14
+# A fixture missing from the fetch of its day may have been moved up to this many days
+# later; it is only reported removed once fetches of all those days went without it
+RESCHEDULE_DAYS = 7
+
+NEW_FIXTURE = 'new_fixture'
+KICKOFF_MOVED = 'kickoff_moved'
+STATUS_CHANGED = 'status_changed'
+SCORE_CHANGED = 'score_changed'
+REMOVED = 'removed'
+
+ChangeEvent = namedtuple('ChangeEvent', ['type', 'key', 'match', 'previous'])
+
+
+def fixture_key(match):
+    """Identify a fixture across fetches, providers and kickoff changes by its teams and competition"""
+    return '|'.join((team_key(match.get('home_team')), team_key(match.get('away_team')),
+                     canonical_competition(match.get('competition')) or ''))
+
+
+def canonical_snapshot(matches):
+    """Collapse provider duplicates into {fixture_key: match}.
+
+    The first provider to report a match wins (fetch order is reliability
+    order); later providers only fill in fields it left empty.
+    """
+    snapshot = {}
+    for match in matches:
+        key = fixture_key(match)
+        existing = snapshot.get(key)
+        if existing is None:
+            snapshot[key] = dict(match)
+            continue
+        for field, value in match.items():
+            if existing.get(field) in (None, '', 'Unknown') and value not in (None, ''):
+                existing[field] = value
+    return snapshot
+
+
+def _scores(match):
+    return match.get('home_score'), match.get('away_score')
+
+
+def diff_snapshots(previous, current):
+    """Events turning previous into current, both {fixture_key: match}.
+
+    Only what current reports is compared; fixtures it lacks are left to
+    missing_fixtures, since a fetch covers one day and some competitions.
+    """
+    events = []
+    for key, match in current.items():
+        before = previous.get(key)
+        if before is None:
+            events.append(ChangeEvent(NEW_FIXTURE, key, match, None))
+            continue
+        if match_kickoff(match) != match_kickoff(before):
+            events.append(ChangeEvent(KICKOFF_MOVED, key, match, before))
+        if match.get('status') != before.get('status') and match.get('status') is not None:
+            events.append(ChangeEvent(STATUS_CHANGED, key, match, before))
+        if _scores(match) != _scores(before) and _scores(match) != (None, None):
+            events.append(ChangeEvent(SCORE_CHANGED, key, match, before))
+    return events
+
+
+def _covered_by(before, responding, competitions):
+    """Whether a fetch answered by responding sources over competitions should have returned before.
+
+    Only a source that answered counts, so a provider outage doesn't look
+    like a wave of cancellations, and dropping a competition from the fetch
+    doesn't remove its fixtures.
+    """
+    if before.get('source') not in responding:
+        return False
+    return competitions is None or canonical_competition(before.get('competition')) in competitions
+
+
+def missing_fixtures(previous, current, day, competitions=None):
+    """Keys of previous fixtures kicking off on day that this fetch of day didn't return.
+
+    The fetch covered the UTC day `day` (YYYY-MM-DD) and the canonical
+    competitions (None for all).
+    """
+    responding = {match.get('source') for match in current.values()}
+    missing = []
+    for key, before in previous.items():
+        if key in current or not _covered_by(before, responding, competitions):
+            continue
+        kickoff = match_kickoff(before)
+        if kickoff is not None and kickoff.date().isoformat() == day:
+            missing.append(key)
+    return missing
+
+
+def reschedule_days(match):
+    """The days (YYYY-MM-DD) a missing fixture may have been moved to: its own and RESCHEDULE_DAYS after"""
+    day = match_kickoff(match).date()
+    return [(day + timedelta(days=offset)).isoformat() for offset in range(RESCHEDULE_DAYS + 1)]
+
+
+def describe(event):
+    match = event.match
+    teams = f"{match.get('home_team')} vs {match.get('away_team')}"
+    if event.type == NEW_FIXTURE:
+        return f"New fixture: {match.get('competition')}: {teams} at {match.get('date') or match.get('datetime')}"
+    if event.type == KICKOFF_MOVED:
+        return (f"Kickoff moved: {teams} from {event.previous.get('date') or event.previous.get('datetime')} "
+                f"to {match.get('date') or match.get('datetime')}")
+    if event.type == STATUS_CHANGED:
+        return f"Status changed: {teams} {event.previous.get('status')} -> {match.get('status')}"
+    if event.type == SCORE_CHANGED:
+        return f"Score: {teams} {match.get('home_score')}-{match.get('away_score')}"
+    return f"Removed: {teams}"
+
+
+class DiffEngine:
+    """Keep one snapshot of every recent fixture and publish the changes each fetch makes to it"""
+
+    def __init__(self, snapshot_file=SNAPSHOT_FILE):
+        self.snapshot_file = snapshot_file
+        self.subscribers = []
+
+    def subscribe(self, subscriber):
+        """subscriber(events) is called once per fetch with a non-empty list of ChangeEvent"""
+        self.subscribers.append(subscriber)
+        return subscriber
+
+    def _load(self):
+        """(fixtures, {fixture_key: days fetched without it}) from the snapshot file"""
+        try:
+            with open(self.snapshot_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return [], {}
+        if 'fixtures' in data:
+            missing = {key: days for key, days in data.get('missing', {}).items() if isinstance(days, list)}
+            return data['fixtures'], missing
+        # Snapshots kept per fetch date by earlier versions, most recent last
+        return [match for scope in sorted(data) for match in data[scope]], {}
+
+    def process(self, scope, matches, competitions=None, locate=None):
+        """Diff a fetch of the day scope (YYYY-MM-DD) over competitions (None for all) and publish.
+
+        A fixture missing from the fetch of its day is not reported removed
+        straight away, since it has most likely been moved to a day this
+        fetch didn't cover. locate(matches), when given, asks a provider for
+        those fixtures and returns {fixture_key: its current entry, or None
+        if the provider no longer has it}, leaving out the ones it can't
+        tell. A fixture it finds elsewhere is a moved kickoff. One nobody
+        can locate is removed once fetches of each of its reschedule_days
+        went without it.
+        """
+        fixtures, missing = self._load()
+        previous = canonical_snapshot(fixtures)
+        current = canonical_snapshot(matches)
+        events = diff_snapshots(previous, current)
+        if competitions is not None:
+            competitions = {canonical_competition(name) for name in competitions}
+
+        snapshot = {**previous, **current}
+        missing = {key: days for key, days in missing.items() if key in previous and key not in current}
+        responding = {match.get('source') for match in current.values()}
+        for key in missing:
+            if scope in reschedule_days(previous[key]) and _covered_by(previous[key], responding, competitions):
+                missing[key] = sorted(set(missing[key]) | {scope})
+        new = [key for key in missing_fixtures(previous, current, scope, competitions) if key not in missing]
+        for key in new:
+            missing[key] = [scope]
+
+        if locate is not None and new:
+            try:
+                located = locate([previous[key] for key in new])
+            except Exception as e:
+                logger.warning(f"Could not look up {len(new)} missing fixtures: {e.__class__.__name__}")
+                located = {}
+            for key in new:
+                if key not in located:
+                    continue
+                match = located[key]
+                if match is None:
+                    events.append(ChangeEvent(REMOVED, key, previous[key], previous[key]))
+                    del snapshot[key]
+                else:
+                    # Found on another day (or the listing just missed it): not removed
+                    events.extend(diff_snapshots({key: previous[key]}, {key: match}))
+                    snapshot[key] = {**previous[key], **match}
+                del missing[key]
+
+        for key, days in list(missing.items()):
+            if set(reschedule_days(previous[key])) <= set(days):
+                events.append(ChangeEvent(REMOVED, key, previous[key], previous[key]))
+                del snapshot[key], missing[key]
+
+        horizon = datetime.now(timezone.utc) - timedelta(days=KEEP_DAYS)
+        for key, match in list(snapshot.items()):
+            kickoff = match_kickoff(match)
+            if kickoff is None or kickoff < horizon:
+                del snapshot[key]
+                missing.pop(key, None)
+        atomic_write_json(self.snapshot_file, {
+            'fixtures': [{k: v for k, v in m.items() if k != 'broadcasts'} for m in snapshot.values()],
+            'missing': missing,
+        })
+
+        if events:
+            for subscriber in self.subscribers:
+                try:
+                    subscriber(events)
+                except Exception as e:
+                    logger.error(f"Change subscriber {subscriber.__name__} failed: {e}")
+        return events
+
+
+def store_subscriber(events, path=MATCH_STORE_FILE):
+    """Apply changes to the match store.
+
+    The store is keyed by match_key, which includes the kickoff day, so an
+    event finds its row under the kickoff it had before the change.
+    """
+    matches = load_matches(path)
+    index = {match_key(match): position for position, match in enumerate(matches)}
+    removed = set()
+    for event in events:
+        entry = {key: value for key, value in event.match.items() if key not in ('datetime', 'broadcasts')}
+        entry['date'] = event.match.get('date') or event.match.get('datetime')
+        position = index.get(match_key(event.previous or event.match))
+        if position is None:
+            position = index.get(match_key(event.match))
+        if event.type == REMOVED:
+            if position is not None:
+                removed.add(position)
+        elif position is None:
+            index[match_key(event.match)] = len(matches)
+            matches.append(entry)
+        else:
+            index.pop(match_key(matches[position]), None)
+            matches[position].update(entry)
+            index[match_key(matches[position])] = position
+    save_matches([match for position, match in enumerate(matches) if position not in removed], path)
+
+
+def calendar_subscriber(events):
+    """Refresh the calendar feeds; unchanged feeds keep their fingerprint"""
+    from generate_calendar import update_feeds
+    update_feeds(load_matches())
+
+
+def notifier_subscriber(events):
+    """Send the kickoff changes and removals to Telegram, when a bot is configured"""
+    if not os.getenv('TELEGRAM_BOT_TOKEN'):
+        return
+    relevant = [event for event in events if event.type in (KICKOFF_MOVED, REMOVED)]
+    if relevant:
+        from fetch_matches import send_telegram_message
+        send_telegram_message("Variazioni partite:\n" + "\n".join(describe(event) for event in relevant),
+                              [event.match for event in relevant])
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+League tables, home/away splits and recent form from the match store.
+
+Usage:
+    python standings.py                          # list competitions with results
+    python standings.py "Serie A" [--season 2025] [--home|--away] [--form 5]
+
+Finished matches are folded into per-competition, per-season numpy arrays
+once and the arrays are saved in standings.npz, so a later update only touches the
+matches that finished since, and printing a table is a sort over at most a
+few dozen rows.
+"""
+import os
+import sys
+import argparse
+import logging
+
+import numpy as np
+
+from match_store import load_matches, match_kickoff, match_key, team_key
+from competition_catalog import api_season, canonical_competition, CALENDAR_YEAR
+
+logger = logging.getLogger(__name__)
+
+STANDINGS_FILE = 'standings.npz'
+FORM_LENGTH = 10
+
+# Columns of each team's row: home results then away results
+WON, DRAWN, LOST, SCORED, CONCEDED = range(5)
+HOME, AWAY = 0, 5
+COLUMNS = 10
+# Values in the form arrays
+FORM_EMPTY, FORM_LOSS, FORM_DRAW, FORM_WIN = -1, 0, 1, 3
+
+
+class CompetitionTable:
+    """Accumulated results of one competition season: a (teams, COLUMNS) array plus recent form.
+
+    Rows are keyed by team_key; names maps each key to the spelling shown
+    in the table.
+    """
+
+    def __init__(self, teams=None, results=None, form=None, form_time=None, names=None):
+        self.teams = list(teams) if teams is not None else []
+        self.index = {team: code for code, team in enumerate(self.teams)}
+        self.names = dict(names) if names is not None else {}
+        self.results = results if results is not None else np.zeros((0, COLUMNS), dtype=np.int32)
+        self.form = form if form is not None else np.zeros((0, FORM_LENGTH), dtype=np.int8)
+        self.form_time = form_time if form_time is not None else np.zeros((0, FORM_LENGTH))
+
+    def _codes(self, names):
+        for name in names:
+            if name not in self.index:
+                self.index[name] = len(self.teams)
+                self.teams.append(name)
+        grow = len(self.teams) - len(self.results)
+        if grow:
+            self.results = np.vstack([self.results, np.zeros((grow, COLUMNS), dtype=np.int32)])
+            self.form = np.vstack([self.form, np.full((grow, FORM_LENGTH), FORM_EMPTY, dtype=np.int8)])
+            self.form_time = np.vstack([self.form_time, np.full((grow, FORM_LENGTH), -np.inf)])
+        return np.fromiter((self.index[name] for name in names), dtype=np.int64, count=len(names))
+
+    def _tally(self, home, away, home_goals, away_goals, weight):
+        """Add (weight 1) or take back (weight -1) a batch of results; returns the outcomes"""
+        home_goals = np.asarray(home_goals, dtype=np.int32)
+        away_goals = np.asarray(away_goals, dtype=np.int32)
+        outcome = np.sign(home_goals - away_goals)  # 1 home win, 0 draw, -1 away win
+
+        for side, teams, scored, conceded, sign in ((HOME, home, home_goals, away_goals, 1),
+                                                    (AWAY, away, away_goals, home_goals, -1)):
+            np.add.at(self.results[:, side + WON], teams, weight * (outcome == sign))
+            np.add.at(self.results[:, side + DRAWN], teams, weight * (outcome == 0))
+            np.add.at(self.results[:, side + LOST], teams, weight * (outcome == -sign))
+            np.add.at(self.results[:, side + SCORED], teams, weight * scored)
+            np.add.at(self.results[:, side + CONCEDED], teams, weight * conceded)
+        return outcome
+
+    def apply(self, home, away, home_goals, away_goals, kickoff, names=None):
+        """Fold a batch of results (parallel arrays) into the table; names maps team keys to display names"""
+        self.names.update(names or {})
+        home, away = self._codes(home), self._codes(away)
+        outcome = self._tally(home, away, home_goals, away_goals, 1)
+        self._update_form(np.concatenate([home, away]),
+                          np.concatenate([np.asarray(kickoff, dtype=np.float64)] * 2),
+                          np.concatenate([np.choose(outcome + 1, [FORM_LOSS, FORM_DRAW, FORM_WIN]),
+                                          np.choose(outcome + 1, [FORM_WIN, FORM_DRAW, FORM_LOSS])]))
+
+    def revert(self, home, away, home_goals, away_goals, kickoff):
+        """Take a batch of results applied earlier back out of the table, form included"""
+        home, away = self._codes(home), self._codes(away)
+        self._tally(home, away, home_goals, away_goals, -1)
+        teams = np.concatenate([home, away])
+        times = np.concatenate([np.asarray(kickoff, dtype=np.float64)] * 2)
+        for team in np.unique(teams):
+            drop = np.isin(self.form_time[team], times[teams == team])
+            keep = ~drop & (self.form[team] != FORM_EMPTY)
+            # Shift the remaining results right so the most recent stays in the last column
+            points, played = self.form[team][keep], self.form_time[team][keep]
+            self.form[team] = FORM_EMPTY
+            self.form_time[team] = -np.inf
+            if len(points):
+                self.form[team, -len(points):] = points
+                self.form_time[team, -len(points):] = played
+
+    def _update_form(self, teams, times, points):
+        """Merge new results into each team's last FORM_LENGTH, ordered by kickoff"""
+        touched = np.unique(teams)
+        old_teams = np.repeat(touched, FORM_LENGTH)
+        old_times = self.form_time[touched].ravel()
+        old_points = self.form[touched].ravel()
+        keep = old_points != FORM_EMPTY
+        all_teams = np.concatenate([old_teams[keep], teams])
+        all_times = np.concatenate([old_times[keep], times])
+        all_points = np.concatenate([old_points[keep], points])
+
+        order = np.lexsort((all_times, all_teams))
+        all_teams, all_times, all_points = all_teams[order], all_times[order], all_points[order]
+        group_end = np.searchsorted(all_teams, all_teams, side='right')
+        from_end = group_end - np.arange(len(all_teams)) - 1  # 0 = most recent
+        recent = from_end < FORM_LENGTH
+
+        self.form[touched] = FORM_EMPTY
+        self.form_time[touched] = -np.inf
+        # Most recent result goes in the last column
+        column = FORM_LENGTH - 1 - from_end[recent]
+        self.form[all_teams[recent], column] = all_points[recent]
+        self.form_time[all_teams[recent], column] = all_times[recent]
+
+    def table(self, split=None, form_length=5):
+        """Rows sorted by points, goal difference, goals scored.
+
+        split is None for the full table, 'home' or 'away' for that half only.
+        Each row is (team, played, won, drawn, lost, scored, conceded,
+        difference, points, form string oldest first).
+        """
+        if split == 'home':
+            r = self.results[:, HOME:HOME + 5]
+        elif split == 'away':
+            r = self.results[:, AWAY:AWAY + 5]
+        else:
+            r = self.results[:, HOME:HOME + 5] + self.results[:, AWAY:AWAY + 5]
+        won, drawn, lost, scored, conceded = r.T
+        points = 3 * won + drawn
+        difference = scored - conceded
+        played = won + drawn + lost
+        order = np.lexsort((-scored, -difference, -points))
+        symbols = {FORM_WIN: 'W', FORM_DRAW: 'D', FORM_LOSS: 'L'}
+        return [
+            (self.names.get(self.teams[i], self.teams[i]), int(played[i]), int(won[i]), int(drawn[i]),
+             int(lost[i]), int(scored[i]), int(conceded[i]), int(difference[i]), int(points[i]),
+             ''.join(symbols[p] for p in self.form[i, FORM_LENGTH - form_length:] if p != FORM_EMPTY))
+            for i in order if played[i]
+        ]
+
+
+def season_label(competition, season):
+    """'2025/26' for European seasons, '2024' for competitions played within a calendar year"""
+    return str(season) if competition in CALENDAR_YEAR else f"{season}/{(season + 1) % 100:02d}"
+
+
+class Standings:
+    """Tables for every competition season plus what was counted for each match.
+
+    Tables are keyed by (canonical competition, api_season), teams by
+    match_store.team_key, so every provider's spelling lands in the same row
+    and one season's results never carry over into the next.
+    """
+
+    def __init__(self):
+        self.tables = {}
+        # match key -> (competition, season, home goals, away goals, kickoff timestamp) as counted
+        self.applied = {}
+
+    def update(self, matches):
+        """Count finished matches with a score that aren't counted yet, and recount those whose
+        score or competition was corrected since; returns how many changed the tables"""
+        reverts, batches, names = {}, {}, {}
+        for match in matches:
+            if match.get('status') != 'FINISHED' or match.get('home_score') is None \
+                    or match.get('away_score') is None:
+                continue
+            kickoff = match_kickoff(match)
+            if kickoff is None:
+                continue
+            home, away, day = match_key(match)
+            key = '|'.join((home, away, day))
+            competition = canonical_competition(match.get('competition')) or 'Unknown'
+            season = api_season(competition, kickoff.date())
+            names.setdefault((competition, season), {}).update(
+                {home: match.get('home_team'), away: match.get('away_team')})
+            counted = (competition, season, int(match['home_score']), int(match['away_score']),
+                       kickoff.timestamp())
+            previous = self.applied.get(key)
+            if previous is not None and previous[:4] == counted[:4]:
+                continue
+            if previous is not None:
+                reverts.setdefault(previous[:2], []).append((home, away) + previous[2:])
+            self.applied[key] = counted
+            batches.setdefault(counted[:2], []).append((home, away) + counted[2:])
+
+        for table_key, rows in reverts.items():
+            home, away, home_goals, away_goals, kickoff = zip(*rows)
+            self.tables[table_key].revert(list(home), list(away), home_goals, away_goals, kickoff)
+        for table_key, rows in batches.items():
+            home, away, home_goals, away_goals, kickoff = zip(*rows)
+            self.tables.setdefault(table_key, CompetitionTable()).apply(
+                list(home), list(away), home_goals, away_goals, kickoff, names[table_key])
+        return sum(len(rows) for rows in batches.values())
+
+    def save(self, path=STANDINGS_FILE):
+        keys = sorted(self.applied)
+        arrays = {
+            'applied': np.array(keys, dtype=str),
+            'applied_competition': np.array([self.applied[key][0] for key in keys], dtype=str),
+            'applied_season': np.array([self.applied[key][1] for key in keys], dtype=np.int32),
+            'applied_goals': np.array([self.applied[key][2:4] for key in keys], dtype=np.int32).reshape(-1, 2),
+            'applied_kickoff': np.array([self.applied[key][4] for key in keys], dtype=np.float64),
+        }
+        for number, ((competition, season), table) in enumerate(self.tables.items()):
+            arrays[f"{number}|name"] = np.array(competition)
+            arrays[f"{number}|season"] = np.array(season, dtype=np.int32)
+            arrays[f"{number}|teams"] = np.array(table.teams, dtype=str)
+            arrays[f"{number}|names"] = np.array([table.names.get(team, team) for team in table.teams], dtype=str)
+            arrays[f"{number}|results"] = table.results
+            arrays[f"{number}|form"] = table.form
+            arrays[f"{number}|form_time"] = table.form_time
+        tmp_path = f"{path}.tmp.{os.getpid()}.npz"
+        np.savez_compressed(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=STANDINGS_FILE):
+        standings = cls()
+        try:
+            with np.load(path) as archive:
+                if 'applied_season' not in archive.files:
+                    # Saved before tables were split by season: recount everything from the store
+                    return standings
+                standings.applied = {
+                    key: (competition, int(season), int(goals[0]), int(goals[1]), float(kickoff))
+                    for key, competition, season, goals, kickoff in zip(
+                        archive['applied'].tolist(), archive['applied_competition'].tolist(),
+                        archive['applied_season'], archive['applied_goals'], archive['applied_kickoff'])
+                }
+                numbers = {name.split('|')[0] for name in archive.files if '|' in name}
+                for number in numbers:
+                    teams = archive[f"{number}|teams"].tolist()
+                    table_key = (str(archive[f"{number}|name"]), int(archive[f"{number}|season"]))
+                    standings.tables[table_key] = CompetitionTable(
+                        teams, archive[f"{number}|results"], archive[f"{number}|form"],
+                        archive[f"{number}|form_time"], zip(teams, archive[f"{number}|names"].tolist()))
+        except (FileNotFoundError, OSError, ValueError, KeyError):
+            pass
+        return standings
+
+
+def update_standings(matches=None, path=STANDINGS_FILE):
+    """Fold newly finished matches from the store into the saved standings"""
+    standings = Standings.load(path)
+    added = standings.update(load_matches() if matches is None else matches)
+    if added:
+        standings.save(path)
+        logger.info(f"Standings updated with {added} finished matches")
+    return standings
+
+
+def standings_subscriber(events):
+    """Change subscriber: recount when fixtures finish"""
+    if any(event.match.get('status') == 'FINISHED' for event in events):
+        update_standings()
+
+
+def format_table(rows, title):
+    lines = [title, f"{'#':>2} {'team':<28}{'P':>4}{'W':>4}{'D':>4}{'L':>4}{'GF':>5}{'GA':>5}{'GD':>5}{'Pts':>5}  form"]
+    for position, (team, played, won, drawn, lost, scored, conceded, difference, points, form) in enumerate(rows, 1):
+        lines.append(f"{position:>2} {team[:27]:<28}{played:>4}{won:>4}{drawn:>4}{lost:>4}"
+                     f"{scored:>5}{conceded:>5}{difference:>+5}{points:>5}  {form}")
+    return '\n'.join(lines)
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='League tables from the match store')
+    parser.add_argument('competition', nargs='?')
+    parser.add_argument('--season', type=int, help='starting year of the season (default: the latest)')
+    split = parser.add_mutually_exclusive_group()
+    split.add_argument('--home', action='store_const', const='home', dest='split')
+    split.add_argument('--away', action='store_const', const='away', dest='split')
+    parser.add_argument('--form', type=int, default=5, help=f'form length, up to {FORM_LENGTH}')
+    args = parser.parse_args()
+
+    standings = update_standings()
+    if not args.competition:
+        for (competition, season), table in sorted(standings.tables.items()):
+            print(f"{competition} {season_label(competition, season)}: {len(table.teams)} teams")
+        return
+    competition = canonical_competition(args.competition)
+    seasons = sorted(season for name, season in standings.tables if name == competition)
+    season = args.season if args.season is not None else (seasons[-1] if seasons else None)
+    table = standings.tables.get((competition, season))
+    if table is None:
+        print(f"No results for {args.competition}" + (f" {args.season}" if args.season is not None else ''))
+        sys.exit(1)
+    title = f"{args.competition} {season_label(competition, season)}" + (f" ({args.split})" if args.split else '')
+    print(format_table(table.table(args.split, min(args.form, FORM_LENGTH)), title))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import os
+import json
+import queue
+import atexit
+import logging
+import logging.handlers
+from datetime import datetime
+
+# Set FOOTBALL_LOG_FORMAT=jsonl to write one JSON event per line instead of free text
+FORMAT_ENV = 'FOOTBALL_LOG_FORMAT'
+
+# Fixed event fields understood by analyze_logs without regexes
+EVENT_FIELDS = ('event', 'source', 'count', 'latency_ms', 'status', 'quota_remaining')
+
+_listeners = []
+
+
+def structured_enabled():
+    return os.getenv(FORMAT_ENV, '').lower() in ('json', 'jsonl')
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Format records as single-line JSON objects with the fixed event fields"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'func': record.funcName,
+        }
+        fields = getattr(record, 'event_fields', None)
+        if fields:
+            entry.update(fields)
+        entry['message'] = record.getMessage()
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def log_event(logger, event, message=None, level=logging.INFO, **fields):
+    """Log a structured event; free-text handlers still get a readable message.
+
+    fields should use the names in EVENT_FIELDS where they apply; any other
+    keyword (e.g. home/away for notifications) is kept as extra detail.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    fields = {key: value for key, value in fields.items() if value is not None}
+    if message is None:
+        message = f"{event} " + ' '.join(f"{key}={value}" for key, value in fields.items())
+    logger.log(level, message, extra={'event_fields': {'event': event, **fields}}, stacklevel=2)
+
+
+def configure_logging(filename=None, level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
+                      datefmt='%Y-%m-%d %H:%M:%S'):
+    """Configure root logging for a script, in free-text or JSON Lines mode.
+
+    In JSON Lines mode records are handed to a queue and written by a
+    background listener thread, so logging never blocks on file I/O. Like
+    logging.basicConfig, only the first call configures anything; later
+    ones (a script run from another, a CLI command) keep the handlers.
+    """
+    if not structured_enabled():
+        kwargs = {'filename': filename, 'filemode': 'a', 'encoding': 'utf-8'} if filename else {}
+        logging.basicConfig(level=level, format=format, datefmt=datefmt, **kwargs)
+        return
+
+    if _listeners:
+        return
+    if filename:
+        handler = logging.FileHandler(filename, mode='a', encoding='utf-8')
+    else:
+        handler = logging.StreamHandler()
+    handler.setFormatter(JsonLinesFormatter())
+
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=False)
+    listener.start()
+    _listeners.append(listener)
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+
+
+@atexit.register
+def _stop_listeners():
+    """Flush queued records before the interpreter exits"""
+    while _listeners:
+        _listeners.pop().stop()
@@ -0,0 +1,42 @@
+import time
+
+from provider_metrics import ProviderMetrics
+
+NOW = time.time()
+
+
+def test_concurrent_savers_keep_each_others_requests():
+    first, second = ProviderMetrics.load('metrics.npz'), ProviderMetrics.load('metrics.npz')
+    first.record('api_sports', 120, status=200, quota_remaining=90, ts=NOW - 20)
+    second.record('api_sports', 300, status=200, quota_remaining=89, ts=NOW - 10)
+    second.record('odds_api', 80, status=200, ts=NOW - 5)
+    first.save('metrics.npz')
+    second.save('metrics.npz')
+
+    merged = ProviderMetrics.load('metrics.npz')
+    assert merged.requests_today('api_sports', now=NOW) == 2
+    assert merged.requests_today('odds_api', now=NOW) == 1
+    assert merged.last_quota('api_sports', now=NOW) == 89
+    assert sum(h.total for h in merged.histograms.values()) == 3
+
+
+def test_saving_again_does_not_count_twice():
+    metrics = ProviderMetrics.load('metrics.npz')
+    metrics.record('football_data', 150, status=200, ts=NOW - 30)
+    metrics.save('metrics.npz')
+    metrics.save('metrics.npz')
+    metrics.record('football_data', 160, status=200, ts=NOW - 20)
+    metrics.save('metrics.npz')
+
+    reloaded = ProviderMetrics.load('metrics.npz')
+    assert reloaded.requests_today('football_data', now=NOW) == 2
+    assert sum(h.total for h in reloaded.histograms.values()) == 2
+
+
+def test_saver_sees_the_other_processes_requests():
+    first, second = ProviderMetrics.load('metrics.npz'), ProviderMetrics.load('metrics.npz')
+    first.record('rapidapi', 100, status=200, ts=NOW - 20)
+    first.save('metrics.npz')
+    second.record('rapidapi', 100, status=200, ts=NOW - 10)
+    second.save('metrics.npz')
+    assert second.requests_today('rapidapi', now=NOW) == 2
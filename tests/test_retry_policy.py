@@ -0,0 +1,91 @@
+import time
+
+import pytest
+import requests
+
+from retry_policy import RetryPolicy, describe_error
+
+
+class Response:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+def sender(*outcomes):
+    """send() returning (or raising) outcomes in turn, counting its calls"""
+    outcomes = list(outcomes)
+
+    def send():
+        send.calls += 1
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    send.calls = 0
+    return send
+
+
+def test_waits_for_retry_after():
+    waits = []
+    send = sender(Response(429, {'Retry-After': '7'}), Response(200))
+    assert RetryPolicy().call('football_data', send, sleep=waits.append).status_code == 200
+    assert waits == [7.0]
+
+
+def test_waits_for_the_quota_reset_header_on_429():
+    waits = []
+    send = sender(Response(429, {'X-RateLimit-Requests-Reset': '12'}), Response(200))
+    RetryPolicy().call('rapidapi', send, sleep=waits.append)
+    assert waits == [12.0]
+
+
+@pytest.mark.parametrize('headers', [{'Retry-After': '3600'}, {'X-RateLimit-Requests-Reset': '86400'}])
+def test_gives_up_when_the_server_asks_for_more_than_max_delay(headers):
+    waits = []
+    send = sender(Response(429, headers), Response(200))
+    response = RetryPolicy(max_delay=30).call('rapidapi', send, sleep=waits.append)
+    assert response.status_code == 429
+    assert send.calls == 1 and waits == []
+
+
+def test_gives_up_when_the_wait_would_overrun_the_deadline():
+    waits = []
+    send = sender(Response(503, {'Retry-After': '10'}), Response(200))
+    response = RetryPolicy().call('football_data', send, deadline=time.monotonic() + 5, sleep=waits.append)
+    assert response.status_code == 503
+    assert send.calls == 1 and waits == []
+
+
+def test_retries_within_the_deadline():
+    waits = []
+    send = sender(Response(503, {'Retry-After': '1'}), Response(200))
+    response = RetryPolicy().call('football_data', send, deadline=time.monotonic() + 60, sleep=waits.append)
+    assert response.status_code == 200 and waits == [1.0]
+
+
+def test_backoff_stays_within_max_delay():
+    waits = []
+    send = sender(requests.Timeout(), requests.ConnectionError(), Response(500), Response(200))
+    RetryPolicy(max_attempts=4, base_delay=1, max_delay=2).call('api_sports', send, sleep=waits.append)
+    assert len(waits) == 3 and all(1 <= wait <= 2 for wait in waits)
+
+
+def test_fatal_status_is_not_retried():
+    send = sender(Response(403), Response(200))
+    assert RetryPolicy().call('football_data', send, sleep=lambda wait: None).status_code == 403
+    assert send.calls == 1
+
+
+def test_last_error_is_raised():
+    send = sender(requests.Timeout(), requests.Timeout())
+    with pytest.raises(requests.Timeout):
+        RetryPolicy(max_attempts=2).call('football_data', send, sleep=lambda wait: None)
+
+
+def test_described_errors_leave_the_url_out():
+    response = requests.Response()
+    response.status_code = 401
+    error = requests.HTTPError('401 Client Error for url: https://api.example/v4?apiKey=secret', response=response)
+    assert describe_error(error) == 'HTTPError (HTTP 401)'
+    assert 'secret' not in describe_error(requests.ConnectionError('Max retries exceeded with url: /?apiKey=secret'))
@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from match_store import load_matches
+from snapshot_diff import (
+    DiffEngine, store_subscriber, fixture_key, NEW_FIXTURE, KICKOFF_MOVED, SCORE_CHANGED, REMOVED,
+    RESCHEDULE_DAYS,
+)
+
+DAY = datetime.now(timezone.utc).date() + timedelta(days=1)
+
+
+def day(offset=0):
+    return (DAY + timedelta(days=offset)).isoformat()
+
+
+def match(home='Inter', away='Milan', offset=0, source='rapidapi', competition='Serie A', **fields):
+    return {'home_team': home, 'away_team': away, 'competition': competition,
+            'datetime': f"{day(offset)}T18:45:00Z", 'status': 'TIMED', 'source': source, **fields}
+
+
+@pytest.fixture
+def engine():
+    engine = DiffEngine('snapshots.json')
+    engine.subscribe(lambda events: store_subscriber(events, 'store.json'))
+    return engine
+
+
+def types(events):
+    return [event.type for event in events]
+
+
+def test_first_fetch_reports_new_fixtures(engine):
+    assert types(engine.process(day(), [match(), match('Roma', 'Lazio')])) == [NEW_FIXTURE, NEW_FIXTURE]
+    assert len(load_matches('store.json')) == 2
+
+
+def test_fixture_moved_to_a_later_fetched_day_is_a_moved_kickoff(engine):
+    engine.process(day(), [match(), match('Roma', 'Lazio')])
+    for _ in range(3):
+        assert engine.process(day(), [match('Roma', 'Lazio')]) == []
+    events = engine.process(day(3), [match(offset=3)])
+    assert types(events) == [KICKOFF_MOVED]
+    store = load_matches('store.json')
+    assert [m['date'] for m in store if m['home_team'] == 'Inter'] == [f"{day(3)}T18:45:00Z"]
+
+
+def test_located_fixture_is_a_moved_kickoff(engine):
+    engine.process(day(), [match(), match('Roma', 'Lazio')])
+    asked = []
+
+    def locate(matches):
+        asked.extend(matches)
+        return {fixture_key(m): match(offset=3, source='Football-Data.org') for m in matches}
+
+    events = engine.process(day(), [match('Roma', 'Lazio')], locate=locate)
+    assert [m['home_team'] for m in asked] == ['Inter']
+    assert types(events) == [KICKOFF_MOVED]
+    assert events[0].match['datetime'].startswith(day(3))
+    # Settled: later fetches of the old day neither ask again nor remove it
+    assert engine.process(day(), [match('Roma', 'Lazio')], locate=locate) == []
+    assert len(asked) == 1
+
+
+def test_fixture_the_provider_no_longer_lists_is_removed(engine):
+    engine.process(day(), [match(), match('Roma', 'Lazio')])
+    events = engine.process(day(), [match('Roma', 'Lazio')], locate=lambda matches: {fixture_key(matches[0]): None})
+    assert types(events) == [REMOVED]
+    assert [m['home_team'] for m in load_matches('store.json')] == ['Roma']
+
+
+def test_unlocated_fixture_is_removed_once_its_reschedule_days_were_fetched(engine):
+    engine.process(day(), [match(), match('Roma', 'Lazio')])
+    assert engine.process(day(), [match('Roma', 'Lazio')]) == []
+    # Each day's fetch returns that day's other fixtures, so the source is answering
+    for offset in range(1, RESCHEDULE_DAYS):
+        assert REMOVED not in types(engine.process(day(offset), [match('Bologna', f'Team {offset}', offset=offset)]))
+    events = engine.process(day(RESCHEDULE_DAYS), [match('Bologna', 'Last', offset=RESCHEDULE_DAYS)])
+    assert [(e.type, e.match['home_team']) for e in events if e.type == REMOVED] == [(REMOVED, 'Inter')]
+
+
+def test_fixture_of_a_silent_source_is_not_removed(engine):
+    engine.process(day(), [match(), match('Roma', 'Lazio', source='Football-Data.org')])
+    for offset in range(RESCHEDULE_DAYS + 1):
+        events = engine.process(day(offset), [match('Roma', 'Lazio', offset=offset, source='Football-Data.org')])
+        assert REMOVED not in types(events)
+
+
+def test_fixture_of_a_competition_not_fetched_is_not_removed(engine):
+    engine.process(day(), [match(), match('Arsenal', 'Chelsea', competition='Premier League')])
+    for offset in range(RESCHEDULE_DAYS + 1):
+        events = engine.process(day(offset), [match('Arsenal', 'Chelsea', offset=offset, competition='Premier League')],
+                                competitions=['Premier League'])
+        assert REMOVED not in types(events)
+
+
+def test_score_only_change_reaches_the_store(engine):
+    engine.process(day(), [match()])
+    events = engine.process(day(), [match(home_score=2, away_score=1)])
+    assert types(events) == [SCORE_CHANGED]
+    assert (load_matches('store.json')[0]['home_score'], load_matches('store.json')[0]['away_score']) == (2, 1)
@@ -0,0 +1,50 @@
+from standings import Standings, update_standings
+
+
+def result(home, away, home_score, away_score, date='2025-10-05T18:45:00Z', competition='Serie A'):
+    return {'home_team': home, 'away_team': away, 'competition': competition, 'date': date,
+            'status': 'FINISHED', 'home_score': home_score, 'away_score': away_score}
+
+
+def row(standings, team, key=('Serie A', 2025)):
+    return next(r for r in standings.tables[key].table() if r[0] == team)
+
+
+def test_corrected_score_is_recounted():
+    standings = Standings()
+    assert standings.update([result('Inter', 'Milan', 2, 1)]) == 1
+    assert row(standings, 'Inter')[1:9] == (1, 1, 0, 0, 2, 1, 1, 3)
+
+    assert standings.update([result('Inter', 'Milan', 1, 1)]) == 1
+    assert row(standings, 'Inter')[1:10] == (1, 0, 1, 0, 1, 1, 0, 1, 'D')
+    assert row(standings, 'Milan')[1:10] == (1, 0, 1, 0, 1, 1, 0, 1, 'D')
+
+
+def test_unchanged_result_is_not_counted_twice():
+    standings = Standings()
+    standings.update([result('Inter', 'Milan', 2, 1)])
+    assert standings.update([result('FC Internazionale Milano', 'AC Milan', 2, 1)]) == 0
+    assert row(standings, 'Inter')[1] == 1
+
+
+def test_corrected_competition_moves_the_result():
+    standings = Standings()
+    standings.update([result('Inter', 'Milan', 2, 1, competition='Coppa Italia')])
+    standings.update([result('Inter', 'Milan', 2, 1)])
+    assert standings.tables[('Coppa Italia', 2025)].table() == []
+    assert row(standings, 'Inter')[1:9] == (1, 1, 0, 0, 2, 1, 1, 3)
+
+
+def test_seasons_get_separate_tables():
+    standings = Standings()
+    standings.update([result('Inter', 'Milan', 2, 1, date='2025-03-01T18:45:00Z'),
+                      result('Inter', 'Milan', 0, 3, date='2025-10-05T18:45:00Z')])
+    assert row(standings, 'Inter', ('Serie A', 2024))[8] == 3
+    assert row(standings, 'Inter', ('Serie A', 2025))[8] == 0
+
+
+def test_saved_standings_recount_a_correction():
+    update_standings([result('Inter', 'Milan', 2, 1)], 'standings.npz')
+    standings = update_standings([result('Inter', 'Milan', 0, 0)], 'standings.npz')
+    assert row(standings, 'Inter')[1:9] == (1, 0, 1, 0, 0, 0, 0, 1)
+    assert row(Standings.load('standings.npz'), 'Milan')[1:9] == (1, 0, 1, 0, 0, 0, 0, 1)
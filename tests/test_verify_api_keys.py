@@ -0,0 +1,81 @@
+import pytest
+import requests
+
+import verify_api_keys
+from verify_api_keys import probe, KeyVerifier, VALID, INVALID, MISSING, UNREACHABLE, UNKNOWN
+
+KEY = 'k' * 32
+
+
+class Response:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self.headers = {}
+        self.body = body
+
+    def json(self):
+        if self.body is None:
+            raise ValueError('no JSON')
+        return self.body
+
+
+@pytest.fixture
+def answer(monkeypatch):
+    """Make every probe request get the given response, or raise the given error"""
+    def set_answer(outcome):
+        def get(url, **kwargs):
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+        monkeypatch.setattr(verify_api_keys.requests, 'get', get)
+    return set_answer
+
+
+@pytest.mark.parametrize('status, expected', [
+    (200, VALID), (204, VALID),
+    (401, INVALID), (403, INVALID),
+    (400, UNKNOWN), (404, UNKNOWN), (410, UNKNOWN),
+    (408, UNREACHABLE), (429, UNREACHABLE), (500, UNREACHABLE), (503, UNREACHABLE),
+])
+def test_status_code_classification(answer, status, expected):
+    answer(Response(status))
+    assert probe('football_data', KEY)[0] == expected
+
+
+@pytest.mark.parametrize('errors, expected', [
+    ({'token': 'Error/Missing application key. Go to https://www.api-football.com/documentation-v3'}, INVALID),
+    ({'access': 'Your account is suspended'}, UNKNOWN),
+    ({'requests': 'You have reached the request limit for the day'}, UNKNOWN),
+    ([], VALID),
+])
+def test_errors_in_body(answer, errors, expected):
+    answer(Response(200, {'errors': errors, 'response': []}))
+    assert probe('api_sports', KEY)[0] == expected
+
+
+def test_body_is_ignored_by_providers_without_errors_in_it(answer):
+    answer(Response(200, {'errors': {'token': 'bad key'}}))
+    assert probe('football_data', KEY)[0] == VALID
+
+
+def test_request_errors_are_unreachable(answer):
+    answer(requests.ConnectTimeout())
+    assert probe('football_data', KEY) == (UNREACHABLE, 'ConnectTimeout')
+
+
+def test_local_checks():
+    assert probe('football_data', '')[0] == MISSING
+    assert probe('football_data', 'short')[0] == INVALID
+
+
+def test_only_valid_and_invalid_are_cached(answer):
+    verifier = KeyVerifier('status.json')
+    answer(Response(404))
+    assert verifier.verify({'football_data': KEY})['football_data']['status'] == UNKNOWN
+    assert 'football_data' not in KeyVerifier('status.json').results
+
+    answer(Response(401))
+    verifier.verify({'football_data': KEY})
+    answer(Response(200))
+    result = KeyVerifier('status.json').verify({'football_data': KEY})['football_data']
+    assert (result['status'], result['cached']) == (INVALID, True)
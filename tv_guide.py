@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Answer TV questions from the locally prefetched schedule, without network.
+
+Usage:
+    python tv_guide.py tonight
+    python tv_guide.py day 2025-03-15
+    python tv_guide.py find "Inter" [--days 7]
+
+Run `python fetch_tv_schedule.py --days 7` beforehand to prefetch the guides.
+"""
+import os
+import json
+import argparse
+from datetime import datetime, timedelta
+
+from football_keywords import get_matcher, normalize
+from tv_match_join import ROME_TZ, program_minutes
+
+SHARDS_DIR = 'tv_schedule'
+TONIGHT_FROM = 18 * 60  # minutes after midnight
+
+
+def load_day(day, shards_dir=SHARDS_DIR):
+    """Return the channel -> programs schedule stored for day, or {} if not prefetched"""
+    directory = os.path.join(shards_dir, day.isoformat())
+    try:
+        with open(os.path.join(directory, 'index.json'), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+    schedule = {}
+    for channel, filename in index.items():
+        try:
+            with open(os.path.join(directory, filename), 'r', encoding='utf-8') as f:
+                schedule[channel] = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            continue
+    return schedule
+
+
+def available_days(shards_dir=SHARDS_DIR):
+    """Days that have a stored partition, in order"""
+    if not os.path.isdir(shards_dir):
+        return []
+    days = []
+    for name in os.listdir(shards_dir):
+        try:
+            days.append(datetime.strptime(name, '%Y-%m-%d').date())
+        except ValueError:
+            continue
+    return sorted(days)
+
+
+def whats_on(day=None, start_minutes=0, end_minutes=24 * 60):
+    """Programs on day between two times of day, ordered by time"""
+    day = day or datetime.now(ROME_TZ).date()
+    programs = [
+        program for programs in load_day(day).values() for program in programs
+        if start_minutes <= program_minutes(program) < end_minutes
+    ]
+    return sorted(programs, key=lambda p: (program_minutes(p), p['channel']))
+
+
+def tonight():
+    """Football on TV from 18:00 today"""
+    return whats_on(start_minutes=TONIGHT_FROM)
+
+
+def find_broadcasts(team, days=7):
+    """Programs in the next days that show team, e.g. find_broadcasts('Inter')"""
+    wanted = {canonical for kind, canonical in get_matcher().scan(team) if kind == 'team'}
+    text = normalize(team)
+    today = datetime.now(ROME_TZ).date()
+    results = []
+    for day in available_days():
+        if not today <= day < today + timedelta(days=days):
+            continue
+        for programs in load_day(day).values():
+            for program in programs:
+                if wanted & set(program.get('teams') or []) or text in normalize(program.get('program', '')):
+                    results.append(program)
+    return sorted(results, key=lambda p: (p.get('date', ''), program_minutes(p)))
+
+
+def _print_programs(programs):
+    if not programs:
+        print("Nothing found in the stored TV schedule.")
+    for program in programs:
+        print(f"{program.get('date', '')} {program['time']:>5}  {program['channel']:<10} {program['program']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query the stored football TV schedule')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('tonight', help="tonight's football on TV")
+    day_parser = subparsers.add_parser('day', help='all football programs of a day')
+    day_parser.add_argument('date', type=lambda v: datetime.strptime(v, '%Y-%m-%d').date())
+    find_parser = subparsers.add_parser('find', help='where a team is broadcast')
+    find_parser.add_argument('team')
+    find_parser.add_argument('--days', type=int, default=7)
+    args = parser.parse_args()
+
+    if args.command == 'tonight':
+        _print_programs(tonight())
+    elif args.command == 'day':
+        _print_programs(whats_on(args.date))
+    else:
+        _print_programs(find_broadcasts(args.team, args.days))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Link fixtures from the match store to the TV programs that broadcast them.
+
+Usage:
+    python tv_match_join.py [YYYY-MM-DD]
+"""
+import re
+import sys
+import json
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from football_keywords import get_matcher, normalize
+from match_store import load_matches, match_kickoff
+
+logger = logging.getLogger(__name__)
+
+ROME_TZ = ZoneInfo("Europe/Rome")
+BUCKET = timedelta(minutes=30)
+# A broadcast starts up to an hour before kickoff (pre-match show) and no later than 15 minutes after
+WINDOW_BEFORE = timedelta(minutes=60)
+WINDOW_AFTER = timedelta(minutes=15)
+
+TIME_PATTERN = re.compile(r'(\d{1,2})[:.](\d{2})')
+# Tokens too common in club names to identify a team on their own
+STOPWORDS = {'fc', 'ac', 'as', 'ss', 'ssc', 'us', 'cf', 'sc', 'afc', 'cfc', 'bc', 'calcio', 'club',
+             'de', 'del', 'di', 'the', 'vs', 'v', '1907', '1909', '1913', '1919', 'united', 'city', 'real'}
+
+
+def parse_program_time(time_text, day, tz=ROME_TZ):
+    """Turn a listing time like '20:45' or 'ore 21.00' on day into an aware UTC datetime"""
+    match = TIME_PATTERN.search(time_text or '')
+    if not match:
+        return None
+    hour, minute = int(match.group(1)), int(match.group(2))
+    if hour > 23 or minute > 59:
+        return None
+    local = datetime(day.year, day.month, day.day, hour, minute, tzinfo=tz)
+    return local.astimezone(timezone.utc)
+
+
+def program_minutes(program):
+    """Sort key for programs within a day: minutes after midnight, unknown times last"""
+    match = TIME_PATTERN.search(program.get('time') or '')
+    return int(match.group(1)) * 60 + int(match.group(2)) if match else 24 * 60
+
+
+def team_tokens(name):
+    """(canonical teams named in text, its distinctive words)"""
+    normalized = normalize(name)
+    words = {word for word in re.findall(r'\w+', normalized) if word not in STOPWORDS and len(word) > 2}
+    teams = {canonical for kind, canonical in get_matcher().scan(normalized) if kind == 'team'}
+    return teams, words
+
+
+def _bucket(timestamp):
+    return int(timestamp.timestamp() // BUCKET.total_seconds())
+
+
+def build_program_index(schedule, day):
+    """Index programs by 30-minute bucket of their start time.
+
+    schedule is the channel -> programs mapping of tv_schedule.json; programs
+    carrying their own 'date' (YYYY-MM-DD) use it, the others use day.
+    """
+    index = defaultdict(list)
+    for channel, programs in schedule.items():
+        for program in programs:
+            program_day = day
+            if program.get('date'):
+                program_day = datetime.strptime(program['date'], '%Y-%m-%d').date()
+            start = parse_program_time(program.get('time'), program_day)
+            if start is None:
+                continue
+            teams, words = team_tokens(program.get('program') or '')
+            teams.update(program.get('teams') or [])
+            index[_bucket(start)].append((start, teams, words, channel, program))
+    return index
+
+
+def join_broadcasts(fixtures, schedule, day=None):
+    """Attach a 'broadcasts' list to each fixture shown on TV.
+
+    Each fixture only looks at the buckets overlapping its kickoff window,
+    so the cost grows with fixtures + programs rather than their product.
+    Returns the number of fixtures that found at least one broadcast.
+    """
+    day = day or datetime.now(ROME_TZ).date()
+    index = build_program_index(schedule, day)
+    linked = 0
+
+    for fixture in fixtures:
+        kickoff = match_kickoff(fixture)
+        if kickoff is None:
+            continue
+        home_teams, home_words = team_tokens(fixture.get('home_team') or '')
+        away_teams, away_words = team_tokens(fixture.get('away_team') or '')
+        broadcasts = []
+
+        for bucket in range(_bucket(kickoff - WINDOW_BEFORE), _bucket(kickoff + WINDOW_AFTER) + 1):
+            for start, teams, words, channel, program in index.get(bucket, ()):
+                if not kickoff - WINDOW_BEFORE <= start <= kickoff + WINDOW_AFTER:
+                    continue
+                home_named = bool(home_teams & teams)
+                away_named = bool(away_teams & teams)
+                both_teams = (home_named or bool(home_words & words)) and (away_named or bool(away_words & words))
+                # Both teams named is a sure match; one team is enough for listings like "Diretta Inter",
+                # but only when it is recognized as that club: a shared word like 'sporting' is not
+                if both_teams or home_named or away_named:
+                    broadcasts.append({
+                        'channel': channel,
+                        'program': program.get('program'),
+                        'start': start.isoformat(),
+                        'both_teams': both_teams
+                    })
+
+        if broadcasts:
+            broadcasts.sort(key=lambda b: (not b['both_teams'], b['start']))
+            fixture['broadcasts'] = broadcasts
+            linked += 1
+    return linked
+
+
+def load_schedule(path='tv_schedule.json'):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    day = datetime.now(ROME_TZ).date()
+    if len(sys.argv) > 1:
+        try:
+            day = datetime.strptime(sys.argv[1], '%Y-%m-%d').date()
+        except ValueError:
+            print("Invalid date format. Use YYYY-MM-DD")
+            return
+
+    fixtures = [m for m in load_matches() if (k := match_kickoff(m)) and k.astimezone(ROME_TZ).date() == day]
+    # Prefer the day's partition from the multi-day prefetch (tv_guide imports this module)
+    from tv_guide import load_day
+    linked = join_broadcasts(fixtures, load_day(day) or load_schedule(), day)
+    logger.info(f"Linked {linked}/{len(fixtures)} fixtures to TV broadcasts")
+
+    for fixture in fixtures:
+        channels = ', '.join(b['channel'] for b in fixture.get('broadcasts', [])) or 'no broadcast found'
+        print(f"{fixture['home_team']} vs {fixture['away_team']}: {channels}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,145 +1,191 @@
+"""
+Verify provider API keys.
+
+Usage:
+    python verify_api_keys.py [--force]
+
+Every provider is probed at the same time with a short timeout, on an
+endpoint that doesn't count against its quota where one exists. Results
+are cached in api_key_status.json per key: a valid key is trusted for a
+day and a rejected one for an hour, so regular fetch runs don't probe
+again. Only 401/403 or an authentication error in the body reject a key;
+timeouts, server errors and any other answer say nothing about it, are
+not cached and leave the provider enabled.
+"""
 import os
+import re
+import json
+import hashlib
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
 import requests
 from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
-
-def verify_football_data_api():
-    """Verify Football-Data.org API key"""
-    api_key = os.getenv('FOOTBALL_DATA_API_KEY')
-    if not api_key:
-        print("Football-Data.org API key not found")
-        return False
-    
-    headers = {'X-Auth-Token': api_key}
-    try:
-        response = requests.get(
-            'https://api.football-data.org/v4/competitions', 
-            headers=headers
-        )
-        if response.status_code == 200:
-            print("Football-Data.org API key is valid")
-            return True
-        else:
-            print(f"Football-Data.org API error: {response.status_code}")
-            return False
-    except Exception as e:
-        print(f"Football-Data.org API verification failed: {e}")
-        return False
-
-def verify_rapidapi():
-    """Verify RapidAPI key"""
-    api_key = os.getenv('RAPIDAPI_KEY')
-    if not api_key:
-        print("RapidAPI key not found")
-        return False
-    
-    headers = {
-        'X-RapidAPI-Key': api_key,
-        'X-RapidAPI-Host': 'api-football-v1.p.rapidapi.com'
-    }
-    try:
-        response = requests.get(
-            'https://api-football-v1.p.rapidapi.com/v3/leagues', 
-            headers=headers
-        )
-        if response.status_code == 200:
-            print("RapidAPI key is valid")
-            return True
-        else:
-            print(f"RapidAPI error: {response.status_code}")
-            return False
-    except Exception as e:
-        print(f"RapidAPI verification failed: {e}")
-        return False
-
-def verify_sportmonks_api():
-    """Verify SportMonks API key"""
-    api_key = os.getenv('SPORTMONKS_API_KEY')
-    if not api_key:
-        print("SportMonks API key not found")
-        return False
-    
-    headers = {
-        'Authorization': f'Bearer {api_key}',
-        'Accept': 'application/json'
-    }
-    try:
-        response = requests.get(
-            'https://api.sportmonks.com/v3/leagues', 
-            headers=headers
-        )
-        if response.status_code == 200:
-            print("SportMonks API key is valid")
-            return True
-        else:
-            print(f"SportMonks API error: {response.status_code}")
-            return False
-    except Exception as e:
-        print(f"SportMonks API verification failed: {e}")
-        return False
-
-def verify_odds_api():
-    """Verify Odds API key"""
-    api_key = os.getenv('ODDS_API_KEY')
-    if not api_key:
-        print("Odds API key not found")
-        return False
-    
-    try:
-        response = requests.get(
-            f'https://api.the-odds-api.com/v4/sports', 
-            params={'apiKey': api_key}
-        )
-        if response.status_code == 200:
-            print("Odds API key is valid")
-            return True
-        else:
-            print(f"Odds API error: {response.status_code}")
-            return False
-    except Exception as e:
-        print(f"Odds API verification failed: {e}")
-        return False
-
-def verify_api_sports():
-    """Verify API-Sports key"""
-    api_key = os.getenv('API_SPORTS_KEY')
-    if not api_key:
-        print("API-Sports key not found")
-        return False
-    
-    headers = {
-        'x-rapidapi-key': api_key,
-        'x-rapidapi-host': 'v3.football.api-sports.io'
-    }
+from match_store import atomic_write_json
+from retry_policy import classify, RETRY
+
+logger = logging.getLogger(__name__)
+
+KEY_STATUS_FILE = 'api_key_status.json'
+PROBE_TIMEOUT = (3, 5)  # connect, read seconds
+MIN_KEY_LENGTH = 10
+
+VALID, INVALID, MISSING, UNREACHABLE, UNKNOWN = 'valid', 'invalid', 'missing', 'unreachable', 'unknown'
+# How long a probe result is reused; UNREACHABLE and UNKNOWN are never cached
+TTL = {VALID: timedelta(hours=24), INVALID: timedelta(hours=1)}
+
+# provider -> (display name, environment variable, probe url, headers(key), params(key))
+PROBES = {
+    'football_data': ('Football-Data.org', 'FOOTBALL_DATA_API_KEY', 'https://api.football-data.org/v4/competitions',
+                      lambda key: {'X-Auth-Token': key}, None),
+    # Same host and endpoint family as the fetcher; one league keeps it to a single small request
+    'rapidapi': ('RapidAPI', 'RAPIDAPI_KEY', 'https://football-live-data.p.rapidapi.com/leagues',
+                 lambda key: {'X-RapidAPI-Key': key, 'X-RapidAPI-Host': 'football-live-data.p.rapidapi.com'},
+                 lambda key: {'id': 135}),
+    # The API-Football /status endpoints are free of quota
+    'api_football': ('API-Football', 'API_FOOTBALL_KEY', 'https://api-football-v1.p.rapidapi.com/v3/status',
+                     lambda key: {'X-RapidAPI-Key': key, 'X-RapidAPI-Host': 'api-football-v1.p.rapidapi.com'}, None),
+    'api_sports': ('API-Sports', 'API_SPORTS_KEY', 'https://v3.football.api-sports.io/status',
+                   lambda key: {'x-rapidapi-key': key, 'x-rapidapi-host': 'v3.football.api-sports.io'}, None),
+    'sportmonks': ('SportMonks', 'SPORTMONKS_API_KEY', 'https://api.sportmonks.com/v3/leagues',
+                   lambda key: {'Authorization': f'Bearer {key}', 'Accept': 'application/json'}, None),
+    # Listing sports costs no Odds API credits
+    'odds_api': ('Odds API', 'ODDS_API_KEY', 'https://api.the-odds-api.com/v4/sports',
+                 lambda key: {}, lambda key: {'apiKey': key}),
+}
+# Providers that answer 200 and report a rejected key in the body's 'errors'
+ERRORS_IN_BODY = {'rapidapi', 'api_football', 'api_sports'}
+# Statuses that mean the provider refused the key itself
+AUTH_STATUSES = {401, 403}
+# Body errors about the key, as opposed to e.g. a daily request limit
+AUTH_ERROR = re.compile(r'token|key|subscri|unauthori[sz]ed|forbidden', re.IGNORECASE)
+
+
+def _fingerprint(key):
+    """Identifies a key in the cache without storing it"""
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+
+
+def probe(provider, key, timeout=PROBE_TIMEOUT):
+    """(status, detail) of one key checked against its provider"""
+    if not key:
+        return MISSING, 'no key configured'
+    if len(key) < MIN_KEY_LENGTH:
+        return INVALID, 'key too short'
+    _, _, url, headers, params = PROBES[provider]
     try:
-        response = requests.get(
-            'https://v3.football.api-sports.io/leagues', 
-            headers=headers
-        )
-        if response.status_code == 200:
-            print("API-Sports key is valid")
-            return True
-        else:
-            print(f"API-Sports error: {response.status_code}")
-            return False
-    except Exception as e:
-        print(f"API-Sports verification failed: {e}")
-        return False
+        response = requests.get(url, headers=headers(key), params=params(key) if params else None, timeout=timeout)
+    except requests.RequestException as e:
+        return UNREACHABLE, e.__class__.__name__
+    detail = f"HTTP {response.status_code}"
+    if response.status_code in AUTH_STATUSES:
+        return INVALID, detail
+    if classify(response) == RETRY:
+        return UNREACHABLE, detail
+    if not 200 <= response.status_code < 300:
+        return UNKNOWN, detail
+    if provider in ERRORS_IN_BODY:
+        try:
+            errors = response.json().get('errors')
+        except (ValueError, AttributeError):
+            errors = None
+        if errors:
+            text = json.dumps(errors)
+            return (INVALID if AUTH_ERROR.search(text) else UNKNOWN), text[:200]
+    return VALID, detail
+
+
+class KeyVerifier:
+    def __init__(self, path=KEY_STATUS_FILE):
+        self.path = path
+        # Guards self.results and the file: fetches on several threads may verify at once
+        self.lock = threading.Lock()
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.results = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.results = {}
+
+    def cached(self, provider, key, now=None):
+        """The cached result for this key if it is still within its TTL"""
+        entry = self.results.get(provider)
+        if not entry or not key or entry['fingerprint'] != _fingerprint(key):
+            return None
+        now = now or datetime.now(timezone.utc)
+        if now - datetime.fromisoformat(entry['checked_at']) >= TTL[entry['status']]:
+            return None
+        return entry
+
+    def verify(self, keys, force=False):
+        """Status of each {provider: key}, probing concurrently only those without a fresh result.
+
+        Returns {provider: {'status', 'detail', 'checked_at', 'cached'}}.
+        """
+        results, to_probe = {}, []
+        with self.lock:
+            for provider, key in keys.items():
+                entry = None if force else self.cached(provider, key)
+                if entry:
+                    results[provider] = {'status': entry['status'], 'detail': entry['detail'],
+                                         'checked_at': entry['checked_at'], 'cached': True}
+                else:
+                    to_probe.append(provider)
+        if not to_probe:
+            return results
+
+        with ThreadPoolExecutor(max_workers=len(to_probe)) as executor:
+            probed = dict(zip(to_probe, executor.map(lambda provider: probe(provider, keys[provider]), to_probe)))
+        now = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        with self.lock:
+            for provider, (status, detail) in probed.items():
+                results[provider] = {'status': status, 'detail': detail, 'checked_at': now, 'cached': False}
+                if status in TTL:
+                    self.results[provider] = {'status': status, 'detail': detail, 'checked_at': now,
+                                              'fingerprint': _fingerprint(keys[provider])}
+                else:
+                    self.results.pop(provider, None)
+            # atomic_write_json's temp name is per process, so threads must not save concurrently
+            atomic_write_json(self.path, self.results)
+        return results
+
+
+_verifier = None
+_verifier_lock = threading.Lock()
+
+
+def get_verifier():
+    """Process-wide verifier, read from disk on first use"""
+    global _verifier
+    with _verifier_lock:
+        if _verifier is None:
+            _verifier = KeyVerifier()
+        return _verifier
+
+
+def main(argv=None):
+    # Load environment variables
+    load_dotenv()
+    parser = argparse.ArgumentParser(description='Verify provider API keys')
+    parser.add_argument('--force', action='store_true', help='probe every provider, ignoring cached results')
+    args = parser.parse_args(argv)
 
-def main():
     print("Verifying API Keys:")
-    apis = [
-        verify_football_data_api,
-        verify_rapidapi,
-        verify_sportmonks_api,
-        verify_odds_api,
-        verify_api_sports
-    ]
-    
-    valid_apis = sum(api() for api in apis)
-    print(f"\nSummary: {valid_apis}/{len(apis)} APIs verified")
+    keys = {provider: os.getenv(env, '') for provider, (_, env, _, _, _) in PROBES.items()}
+    results = get_verifier().verify(keys, force=args.force)
+    for provider, result in results.items():
+        name = PROBES[provider][0]
+        cached = f" (cached {result['checked_at']})" if result['cached'] else ''
+        if result['status'] == VALID:
+            print(f"{name} API key is valid{cached}")
+        else:
+            print(f"{name} API key is {result['status']}: {result['detail']}{cached}")
+
+    valid_apis = sum(result['status'] == VALID for result in results.values())
+    print(f"\nSummary: {valid_apis}/{len(results)} APIs verified")
 
 if __name__ == "__main__":
     main()